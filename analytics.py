@@ -0,0 +1,290 @@
+# 리드타임 분석: 단계별 소요일(접수→도면접수→자재입고→샘플완료→출하), 납기 준수율,
+# 업체/차종별 미출하 잔량 추이를 월별 집계(rollup)로 계산 (관리자 화면 분석 탭)
+# 집계에는 더할 수 있는 건수/일수 합계만 담으므로, 데이터가 바뀌면 바뀐 행의 기여분만
+# 빼고 다시 더해서 갱신 (대장 전체를 다시 집계하지 않음)
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_manager
+import profiling
+import status
+from storage import ID_COLUMN
+
+# (시작 컬럼, 끝 컬럼, 표시 이름): 소요일은 끝 날짜가 속한 달에 집계
+STAGES = [
+    ("접수일", "도면접수일", "접수→도면접수"),
+    ("도면접수일", "자재입고일", "도면접수→자재입고"),
+    ("자재입고일", "샘플완료일", "자재입고→샘플완료"),
+    ("샘플완료일", "출하일", "샘플완료→출하"),
+]
+LEAD_TIME = ("접수일", "출하일", "접수→출하")
+
+GROUP_COLUMNS = ["업체명", "차종"]
+MONTH = "월"
+KEYS = [MONTH] + GROUP_COLUMNS
+DATE_SOURCES = list(dict.fromkeys(["납기일", *(c for s in STAGES for c in s[:2])]))
+SOURCE_COLUMNS = [*GROUP_COLUMNS, *DATE_SOURCES]
+# 업체명/차종이 비어 있는 행의 그룹 이름
+NO_VALUE = "(미지정)"
+
+# 집계 컬럼 (모두 정수 합계라 빼고 더해도 오차가 없음)
+#   received: 접수 건수 (접수월), shipped: 출하 건수 (출하월)
+#   closed: 접수일이 있는 요청의 출하 건수 (미출하 잔량 = 누적 received - 누적 closed)
+#   due_shipped / on_time: 납기일이 있는 출하 건수 / 그중 납기일까지 출하된 건수
+#   stage{i}_days / stage{i}_n: 단계별 소요일 합계와 건수, lead_days / lead_n: 접수→출하
+METRICS = (
+    ["received", "shipped", "closed", "due_shipped", "on_time"]
+    + [f"stage{i}_{part}" for i in range(len(STAGES)) for part in ("days", "n")]
+    + ["lead_days", "lead_n"]
+)
+
+
+def _labels(series):
+    values = series.astype(object)
+    return values.where(status.has_value(values.to_frame(), values.name), NO_VALUE).astype(str)
+
+
+def _source(df):
+    """Columns the rollups need, keyed by 관리번호 (plus 중복 순번 if repeated) so rows can be diffed."""
+    rows = df.reindex(columns=[ID_COLUMN, *SOURCE_COLUMNS])
+    out = pd.DataFrame(index=rows.index)
+    for col in GROUP_COLUMNS:
+        out[col] = _labels(rows[col].rename(col))
+    for col in DATE_SOURCES:
+        out[col] = status.parse_dates(rows[col]).dt.normalize()
+    ids = pd.Index(rows[ID_COLUMN].astype(str), name=ID_COLUMN)
+    if not ids.is_unique:
+        ids = pd.MultiIndex.from_arrays([ids, ids.to_series().groupby(ids).cumcount()], names=[ID_COLUMN, "n"])
+    out.index = ids
+    return out
+
+
+def _days(rows, start, end):
+    days = (rows[end] - rows[start]).dt.days
+    valid = days.notna() & (days >= 0)
+    return days.where(valid, 0).astype("int64"), valid.astype("int64")
+
+
+def _month(dates):
+    return dates.to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+
+
+def rollup(rows):
+    """Monthly counters (METRICS) of source rows, indexed by (월, 업체명, 차종)."""
+    if rows.empty:
+        return pd.DataFrame(columns=METRICS, dtype="int64", index=pd.MultiIndex.from_arrays([[], [], []], names=KEYS))
+    zero = pd.Series(0, index=rows.index, dtype="int64")
+    counters = {date_col: {} for date_col in ["접수일", "출하일"] + [end for _, end, _ in STAGES]}
+
+    counters["접수일"]["received"] = rows["접수일"].notna().astype("int64")
+    shipped = rows["출하일"].notna()
+    counters["출하일"]["shipped"] = shipped.astype("int64")
+    counters["출하일"]["closed"] = (shipped & rows["접수일"].notna()).astype("int64")
+    has_due = shipped & rows["납기일"].notna()
+    counters["출하일"]["due_shipped"] = has_due.astype("int64")
+    counters["출하일"]["on_time"] = (has_due & (rows["출하일"] <= rows["납기일"])).astype("int64")
+    for i, (start, end, _) in enumerate(STAGES):
+        counters[end][f"stage{i}_days"], counters[end][f"stage{i}_n"] = _days(rows, start, end)
+    counters["출하일"]["lead_days"], counters["출하일"]["lead_n"] = _days(rows, *LEAD_TIME[:2])
+
+    # 기준 날짜(달)마다 한 번씩 묶어서 합산
+    parts = []
+    for date_col, values in counters.items():
+        present = rows[date_col].notna().to_numpy()
+        frame = pd.DataFrame({
+            MONTH: _month(rows[date_col])[present],
+            **{col: rows[col].to_numpy()[present] for col in GROUP_COLUMNS},
+            **{m: values.get(m, zero).to_numpy()[present] for m in METRICS},
+        })
+        parts.append(frame)
+    table = pd.concat(parts, ignore_index=True).groupby(KEYS, sort=True).sum()[METRICS]
+    return table[(table != 0).any(axis=1)].astype("int64")
+
+
+def _differs(a, b):
+    """Row mask of aligned source frames a and b that differ in any column (NaT == NaT)."""
+    differ = np.zeros(len(a), dtype=bool)
+    for col in a.columns:
+        x, y = a[col].to_numpy(), b[col].to_numpy()
+        differ |= (x != y) & ~(pd.isna(x) & pd.isna(y))
+    return differ
+
+
+class LeadTimeRollups:
+    """Monthly rollups kept in step with the ledger.
+
+    refresh() diffs the source columns against the previous version and
+    only re-counts the rows that were added, changed or deleted; apply()
+    does the same from just the changed rows when the store can list them.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.table = None
+        self.changed = 0
+        self._rows = None
+
+    def refresh(self, df, version):
+        rows = _source(df)
+        old = self._rows
+        if old is None or type(old.index) is not type(rows.index):
+            table = rollup(rows)
+            self.changed = len(rows)
+        else:
+            if old.index.equals(rows.index):
+                # 행 구성이 같으면 (수정만 있었으면) 위치별로 바로 비교
+                differ = _differs(old, rows)
+                before, after = old[differ], rows[differ]
+            else:
+                common = old.index.intersection(rows.index)
+                changed = common[_differs(old.loc[common], rows.loc[common])]
+                before = old.loc[changed.append(old.index.difference(rows.index))]
+                after = rows.loc[changed.append(rows.index.difference(old.index))]
+            self.changed = len(before) + len(after)
+            table = self.table
+            if self.changed:
+                table = table.sub(rollup(before), fill_value=0).add(rollup(after), fill_value=0)
+                table = table[(table != 0).any(axis=1)].astype("int64").sort_index()
+        self._rows, self.table, self.version = rows, table, version
+        return table
+
+    def apply(self, rows, deleted, version):
+        """Bring the table to version from only the rows changed since self.version.
+
+        rows: the changed rows (current values), deleted: 관리번호 removed
+        since. Returns False (nothing applied) if rows can't be matched by
+        관리번호 (repeated IDs); refresh() with the whole ledger then.
+        """
+        after = _source(rows)
+        old = self._rows
+        if isinstance(old.index, pd.MultiIndex) or isinstance(after.index, pd.MultiIndex):
+            return False
+        before = old.loc[old.index.intersection(after.index.append(pd.Index(deleted, dtype=object)))]
+        self.changed = len(before) + len(after)
+        table = self.table
+        if self.changed:
+            table = table.sub(rollup(before), fill_value=0).add(rollup(after), fill_value=0)
+            table = table[(table != 0).any(axis=1)].astype("int64").sort_index()
+            self._rows = pd.concat([old.drop(before.index), after])
+        self.table, self.version = table, version
+        return True
+
+
+_rollups = LeadTimeRollups()
+_lock = threading.Lock()
+
+
+@profiling.timed
+def get_rollups():
+    """Monthly rollup table for the current data version (refreshed incrementally).
+
+    After the first full read only the rows changed since the stored
+    version are read (data_manager.load_changes) and re-counted.
+    """
+    with _lock:
+        if _rollups.table is not None:
+            changes = data_manager.load_changes(_rollups.version, [ID_COLUMN, *SOURCE_COLUMNS])
+            if changes is not None and (changes[2] == _rollups.version or _rollups.apply(*changes)):
+                return _rollups.table
+        # 처음이거나 변경분을 알 수 없으면 (전체 저장 등) 대장 전체와 비교
+        df = data_manager.load_data()
+        _rollups.refresh(df, df.attrs.get("data_version"))
+        return _rollups.table
+
+
+def _select(table, companies=None, projects=None, since=None):
+    mask = np.ones(len(table), dtype=bool)
+    if companies:
+        mask &= table.index.get_level_values("업체명").isin(companies)
+    if projects:
+        mask &= table.index.get_level_values("차종").isin(projects)
+    if since is not None:
+        mask &= table.index.get_level_values(MONTH) >= pd.Timestamp(since)
+    return table[mask]
+
+
+def _ratio(numerator, denominator, scale=1):
+    if np.ndim(denominator) == 0:
+        return round(numerator * scale / denominator, 1) if denominator else None
+    return (numerator * scale / denominator.where(denominator > 0)).round(1)
+
+
+def _months(frame, start=None):
+    """Fill the month index so every month from the first (or start) to the current one appears.
+
+    Months without activity get zeros, so cumulative figures (미출하 잔량)
+    carry forward to this month instead of stopping at the last data month.
+    """
+    if frame.empty:
+        return frame
+    first = frame.index.min() if start is None else min(frame.index.min(), pd.Timestamp(start))
+    last = max(frame.index.max(), pd.Timestamp.now().to_period("M").to_timestamp())
+    return frame.reindex(pd.date_range(first, last, freq="MS", name=MONTH), fill_value=0)
+
+
+def monthly(table, companies=None, projects=None, since=None):
+    """Per-month 접수/출하 건수, 납기 준수율, 평균 소요일 and 미출하 잔량 (month index)."""
+    # 잔량은 처음부터 누적해야 하므로 기간 제한 없이 계산한 뒤 잘라냄
+    t = _months(_select(table, companies, projects).groupby(level=MONTH).sum())
+    if t.empty:
+        return pd.DataFrame()
+    out = pd.DataFrame(index=t.index)
+    out["접수"] = t["received"]
+    out["출하"] = t["shipped"]
+    out["납기 준수율(%)"] = _ratio(t["on_time"], t["due_shipped"], 100)
+    out[f"평균 리드타임(일, {LEAD_TIME[2]})"] = _ratio(t["lead_days"], t["lead_n"])
+    for i, (_, _, label) in enumerate(STAGES):
+        out[f"{label}(일)"] = _ratio(t[f"stage{i}_days"], t[f"stage{i}_n"])
+    out["미출하 잔량"] = (t["received"] - t["closed"]).cumsum()
+    return out if since is None else out[out.index >= pd.Timestamp(since)]
+
+
+def overview(table, companies=None, projects=None, since=None):
+    """Headline figures for the selected months, plus the current 미출하 잔량."""
+    t = _select(table, companies, projects, since).sum()
+    total = _select(table, companies, projects).sum()
+    return {
+        "received": int(t["received"]),
+        "shipped": int(t["shipped"]),
+        "on_time_rate": _ratio(t["on_time"], t["due_shipped"], 100),
+        "lead_days": _ratio(t["lead_days"], t["lead_n"]),
+        "backlog": int(total["received"] - total["closed"]),
+    }
+
+
+def stage_summary(table, companies=None, projects=None, since=None):
+    """Average days and counts per stage (and overall) over the selected months."""
+    t = _select(table, companies, projects, since).sum()
+    parts = [(label, f"stage{i}_days", f"stage{i}_n") for i, (_, _, label) in enumerate(STAGES)]
+    parts.append((f"전체 ({LEAD_TIME[2]})", "lead_days", "lead_n"))
+    return pd.DataFrame([
+        {"단계": label, "평균 소요일": _ratio(t[days], t[n]), "건수": int(t[n])} for label, days, n in parts
+    ])
+
+
+def by_group(table, by="업체명", companies=None, projects=None, since=None):
+    """Per 업체명/차종: 출하, 납기 준수율, 평균 리드타임 and current 미출하 잔량."""
+    t = _select(table, companies, projects).groupby(level=by).sum()
+    recent = _select(table, companies, projects, since).groupby(level=by).sum().reindex(t.index, fill_value=0)
+    out = pd.DataFrame(index=t.index)
+    out["출하"] = recent["shipped"]
+    out["납기 준수율(%)"] = _ratio(recent["on_time"], recent["due_shipped"], 100)
+    out["평균 리드타임(일)"] = _ratio(recent["lead_days"], recent["lead_n"])
+    out["미출하 잔량"] = t["received"] - t["closed"]
+    return out.sort_values(["미출하 잔량", "출하"], ascending=False)
+
+
+def backlog(table, by="업체명", top=5, companies=None, projects=None, since=None):
+    """Month × group 미출하 잔량 for the top groups (the rest summed as 기타)."""
+    t = _select(table, companies, projects).groupby(level=[MONTH, by]).sum()
+    if t.empty:
+        return pd.DataFrame()
+    delta = (t["received"] - t["closed"]).unstack(by, fill_value=0)
+    levels = _months(delta).cumsum()
+    order = levels.iloc[-1].sort_values(ascending=False).index
+    result = levels[order[:top]].copy()
+    if len(order) > top:
+        result["기타"] = levels[order[top:]].sum(axis=1)
+    return result if since is None else result[result.index >= pd.Timestamp(since)]
@@ -2,9 +2,14 @@ import streamlit as st
 import pandas as pd
 import auth
 import data_manager
+import status
+import export
+import attachments
+import digest
+import analytics
+import profiling
 import time
-import io
-from datetime import datetime
+from styling import style_dataframe
 
 # Page Config
 st.set_page_config(
@@ -25,109 +30,145 @@ try:
 except:
     pass
 
-def get_status_color(status):
-    """진행상태에 따른 색상 반환"""
-    status_str = str(status).lower()
-    # 접수 / 자재준비 / 생산중 / 출하준비 / 출하완료
-    if '접수' in status_str:
-        return '#fbbf24'  # 노란색
-    elif '자재준비' in status_str:
-        return '#3b82f6'  # 파란색
-    elif '생산중' in status_str:
-        return '#10b981'  # 초록색
-    elif '출하준비' in status_str:
-        return '#f59e0b'  # 주황색
-    elif '출하완료' in status_str or '완료' in status_str:
-        return '#22c55e'  # 밝은 초록색 (완료)
-    else:
-        return '#94a3b8'  # 회색 (기본)
-
-def get_progress_status(row):
-    """
-    날짜/진행 정보를 기반으로 진행상태 기본값 계산
-    - 출하일 있으면: 출하완료
-    - 샘플완료일 있으면: 출하준비
-    - 자재입고일 있으면: 생산중
-    - 자재요청 또는 도면접수일 있으면: 자재준비
-    - 그 외: 접수
-    """
-    # 출하완료
-    if pd.notna(row.get('출하일')) and str(row.get('출하일')) not in ['', 'nan', 'NaT']:
-        return '출하완료'
-    # 출하준비 (샘플완료까지 끝난 상태)
-    if pd.notna(row.get('샘플완료일')) and str(row.get('샘플완료일')) not in ['', 'nan', 'NaT']:
-        return '출하준비'
-    # 생산중 (자재입고 이후)
-    if pd.notna(row.get('자재입고일')) and str(row.get('자재입고일')) not in ['', 'nan', 'NaT']:
-        return '생산중'
-    # 자재준비 (자재요청 또는 도면접수)
-    if (
-        pd.notna(row.get('자재요청')) and str(row.get('자재요청')) not in ['', 'nan', 'NaT']
-    ) or (
-        pd.notna(row.get('도면접수일')) and str(row.get('도면접수일')) not in ['', 'nan', 'NaT']
-    ):
-        return '자재준비'
-    # 기본값: 접수
-    return '접수'
-
-def is_overdue(row):
-    """납기가 지났는지 확인"""
-    if '납기일' not in row.index:
-        return False
-    try:
-        due_date_str = str(row['납기일'])
-        if not due_date_str or due_date_str == 'nan' or due_date_str == 'NaT':
-            return False
-        
-        # 날짜 파싱
-        if isinstance(row['납기일'], pd.Timestamp):
-            due_date = row['납기일'].date()
-        else:
-            due_date = pd.to_datetime(due_date_str).date()
-        
-        today = datetime.now().date()
-        
-        # 납기가 지났고 완료되지 않은 경우
-        if due_date < today:
-            # 출하일이 있으면 완료로 간주
-            if pd.notna(row.get('출하일')) and str(row.get('출하일')) not in ['', 'nan', 'NaT']:
-                return False
-            return True
-    except:
-        pass
-    return False
-
-def style_dataframe(df):
-    """데이터프레임에 색상 스타일 적용하여 HTML로 반환"""
-    if df.empty:
-        return df
-    
-    # 진행상태 계산 (날짜 필드 기반)
-    if '진행상태' not in df.columns:
-        df['진행상태'] = df.apply(get_progress_status, axis=1)
-    
-    # 진행상태 컬럼에 색상 배경 적용
-    def style_status(val):
-        color = get_status_color(val)
-        return f'background-color: {color}; color: white; font-weight: bold; padding: 5px; border-radius: 4px; text-align: center;'
-    
-    # 납기 지난 항목 체크
-    overdue_mask = df.apply(is_overdue, axis=1)
-    
-    # 스타일 적용
-    styled_df = df.style.applymap(style_status, subset=['진행상태'])
-    
-    # 납기 지난 행에 빨간색 텍스트 적용
-    def highlight_overdue(row):
-        if overdue_mask[row.name]:
-            return ['color: #dc2626; font-weight: bold;'] * len(row)
-        return [''] * len(row)
-    
-    styled_df = styled_df.apply(highlight_overdue, axis=1)
-    
-    return styled_df
+# 날짜 입력 컬럼 (관리 대장 에디터에서 캘린더로 선택)
+DATE_COLUMNS = data_manager.DATE_COLUMNS
+CATEGORY_COLUMNS = data_manager.CATEGORY_COLUMNS
+
+# 다운로드 형식 (엑셀은 사람이 보는 용도, CSV/Parquet은 대량 데이터 처리용)
+EXPORT_LABELS = {"xlsx": "Excel (.xlsx)", "csv": "CSV (.csv)", "parquet": "Parquet (.parquet)"}
+
+# 납기 임박으로 보는 일수 (일일 요약과 같은 기준)
+DUE_SOON_DAYS = digest.DUE_SOON_DAYS
+# 대시보드 납기 알림 표에 보여줄 최대 행 수
+DUE_PANEL_ROWS = 100
+
+# 관리 대장 페이지당 행 수 선택지
+PAGE_SIZES = [50, 100, 200, 500]
+
+# 리드타임 분석 기간 (개월, 0이면 전체)
+ANALYTICS_PERIODS = {6: "최근 6개월", 12: "최근 12개월", 24: "최근 24개월", 0: "전체 기간"}
+ANALYTICS_TOP_GROUPS = 5
+
+def editor_changes(source_df, editor_state):
+    """st.data_editor 변경 내역(edited/added/deleted rows)을 관리번호 기준 패치로 변환"""
+    ids = source_df['관리번호'].astype(str).tolist()
+
+    def clean(col, val):
+        # 캘린더에서 고른 날짜는 ISO 문자열로 들어오므로 YYYY-MM-DD로 통일
+        if col in DATE_COLUMNS:
+            parsed = pd.to_datetime(val, errors='coerce')
+            return None if pd.isna(parsed) else parsed.strftime("%Y-%m-%d")
+        return val
+
+    updated = {}
+    for pos, values in editor_state.get("edited_rows", {}).items():
+        # '선택'(삭제 체크박스)은 저장 대상이 아님
+        values = {col: clean(col, val) for col, val in values.items() if col != "선택"}
+        if values:
+            updated[ids[int(pos)]] = values
+
+    added = []
+    for row in editor_state.get("added_rows", []):
+        row = {col: clean(col, val) for col, val in row.items() if col != "선택"}
+        if any(val not in (None, "") for val in row.values()):
+            added.append(row)
+
+    deleted = [ids[int(pos)] for pos in editor_state.get("deleted_rows", [])]
+    return {"updated": updated, "added": added, "deleted": deleted}
+
+def profiling_panel(trace, last=None):
+    """관리자 전용: 방금 끝난 실행(rerun)의 구간별 시간/메모리와 직전 실행 합계"""
+    with st.expander("⏱️ 성능 프로파일 (이번 실행)", expanded=False):
+        if trace is None:
+            st.caption("측정된 구간이 없습니다. (PROFILING=0)")
+            return
+        rows = pd.DataFrame([
+            {
+                "구간": "　" * s["depth"] + s["name"],
+                "시작(ms)": s["start_ms"],
+                "소요(ms)": s["ms"],
+                "메모리 변화(MB)": s["mem_mb"],
+                "오류": s.get("error", ""),
+            }
+            for s in trace["spans"]
+        ])
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        caption = f"이번 실행 전체: {trace['total_ms']:,.0f} ms"
+        if last:
+            caption += f" · 직전 실행: {last['total_ms']:,.0f} ms"
+        st.caption(f"{caption} · 기록: {profiling.TRACE_FILE}")
+
+def analytics_panel():
+    """관리자 전용: 리드타임/납기 준수율/미출하 잔량 분석 (월별 집계만으로 그림)"""
+    profiling.section("render.analytics")
+    table = analytics.get_rollups()
+    if table.empty:
+        st.info("분석할 데이터가 없습니다.")
+        return
+
+    f1, f2, f3 = st.columns(3)
+    with f1:
+        companies = st.multiselect("업체명", sorted(table.index.unique("업체명")), key="analytics_companies")
+    with f2:
+        projects = st.multiselect("차종", sorted(table.index.unique("차종")), key="analytics_projects")
+    with f3:
+        months = st.selectbox("기간", list(ANALYTICS_PERIODS), index=1, format_func=ANALYTICS_PERIODS.get, key="analytics_months")
+    since = None
+    if months:
+        since = pd.Timestamp.now().to_period("M").to_timestamp() - pd.DateOffset(months=months - 1)
+    scope = {"companies": companies, "projects": projects, "since": since}
+
+    figures = analytics.overview(table, **scope)
+    m1, m2, m3, m4 = st.columns(4)
+    with m1:
+        st.metric("기간 내 출하", f"{figures['shipped']:,}건")
+    with m2:
+        rate = figures["on_time_rate"]
+        st.metric("납기 준수율", "-" if rate is None else f"{rate}%")
+    with m3:
+        lead = figures["lead_days"]
+        st.metric("평균 리드타임 (접수→출하)", "-" if lead is None else f"{lead}일")
+    with m4:
+        st.metric("현재 미출하 잔량", f"{figures['backlog']:,}건")
+
+    monthly = analytics.monthly(table, **scope)
+    if monthly.empty:
+        st.info("선택한 조건에 해당하는 데이터가 없습니다.")
+        return
+    monthly.index = monthly.index.strftime("%Y-%m")
+    stage_columns = [f"{label}(일)" for _, _, label in analytics.STAGES]
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.caption("월별 접수/출하 건수")
+        st.bar_chart(monthly[["접수", "출하"]], stack=False)
+    with c2:
+        st.caption("월별 납기 준수율(%) (출하월 기준)")
+        st.line_chart(monthly["납기 준수율(%)"], color="#10b981")
+
+    c3, c4 = st.columns(2)
+    with c3:
+        st.caption("단계별 평균 소요일 (단계 완료월 기준)")
+        st.line_chart(monthly[stage_columns])
+    with c4:
+        by = st.radio("미출하 잔량 기준", ["업체명", "차종"], horizontal=True, key="analytics_backlog_by")
+        levels = analytics.backlog(table, by=by, top=ANALYTICS_TOP_GROUPS, **scope)
+        levels.index = levels.index.strftime("%Y-%m")
+        st.line_chart(levels)
+
+    s1, s2 = st.columns([2, 3])
+    with s1:
+        st.caption("단계별 평균 소요일")
+        st.dataframe(analytics.stage_summary(table, **scope), use_container_width=True, hide_index=True)
+    with s2:
+        st.caption(f"{by}별 출하/납기 준수율 (잔량은 현재 기준)")
+        st.dataframe(analytics.by_group(table, by=by, **scope), use_container_width=True)
+
+    with st.expander("월별 상세", expanded=False):
+        st.dataframe(monthly, use_container_width=True)
 
 def login_page():
+    profiling.section("render.login")
     st.markdown("<div style='margin-top: 100px;'></div>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -188,6 +229,7 @@ def login_page():
                             st.error(message)
 
 def dashboard_page(user):
+    profiling.section("render.header")
     # Top Bar
     c1, c2 = st.columns([8, 2])
     with c1:
@@ -248,15 +290,26 @@ def dashboard_page(user):
 
     st.markdown("---")
 
-    # Data Handling
-    df = data_manager.get_filtered_data(user["role"], user["company"])
+    # 저장/삭제 후 새로고침된 화면에서 결과 안내
+    notice = st.session_state.pop("notice", None)
+    if notice:
+        st.success(notice)
 
     # --- CLIENT VIEW ---
     if user["role"] == "client":
+        profiling.section("render.client_table")
+        # Data Handling (관리자 화면은 페이지/집계 단위로 조회하므로 전체 데이터를 읽지 않음)
+        df = data_manager.get_filtered_data(user["role"], user["company"])
+
         tab1, tab2 = st.tabs(["📋 내 요청 목록", "➕ 새 샘플 요청"])
         
         with tab1:
             st.info("💡 요청하신 샘플의 진행 현황을 실시간으로 확인하실 수 있습니다. 관리자가 입력한 자재요청 및 비고 사항도 확인하실 수 있습니다.")
+            # 검색은 자기 업체 요청 안에서만 (검색 색인, 일치도 순)
+            client_search = st.text_input("검색 (품명, 품번, 차종, 요청사항 등)", key="client_search").strip()
+            if client_search and not df.empty:
+                df = data_manager.search_requests(client_search, company=user["company"])
+                st.caption(f"검색 결과 {len(df):,}건")
             if not df.empty:
                 # 고객사 화면에서도 모든 컬럼 표시 (자재요청, 비고 포함)
                 display_df = df.copy()
@@ -273,10 +326,13 @@ def dashboard_page(user):
                 # 자재요청과 비고 필드 안내
                 if "자재요청" in df.columns or "비고" in df.columns:
                     st.caption("📝 자재요청 및 비고는 관리자가 입력한 내용입니다.")
+            elif client_search:
+                st.warning("검색 결과가 없습니다.")
             else:
                 st.warning("아직 요청 내역이 없습니다.")
 
         with tab2:
+            profiling.section("render.client_form")
             st.subheader("새로운 샘플 개발 요청")
             with st.form("new_request"):
                 # Row 1: 담당자 정보
@@ -320,31 +376,6 @@ def dashboard_page(user):
                     if not project or not part_name:
                         st.error("차종과 품명은 필수 입력입니다.")
                     else:
-                        file_name = ""
-                        # 폼 제출 시점에 파일 저장
-                        if uploaded_file is not None:
-                            try:
-                                # 파일 저장 디렉토리 생성
-                                import os
-                                save_dir = "attachments"
-                                if not os.path.exists(save_dir):
-                                    os.makedirs(save_dir)
-                                
-                                # 타임스탬프와 원본 파일명을 조합하여 저장
-                                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                                # 파일명에 특수문자 제거
-                                safe_filename = "".join(c for c in uploaded_file.name if c.isalnum() or c in "._- ")
-                                file_name = f"{timestamp}_{safe_filename}"
-                                file_path = os.path.join(save_dir, file_name)
-                                
-                                # 파일 저장
-                                with open(file_path, "wb") as f:
-                                    f.write(uploaded_file.getbuffer())
-                                
-                                st.success(f"파일 저장 완료: {uploaded_file.name}")
-                            except Exception as e:
-                                st.warning(f"파일 저장 중 오류 발생: {e}. 요청은 등록되지만 파일은 저장되지 않았습니다.")
-                        
                         new_data = {
                             "담당자": req_name,
                             "부서": dept,
@@ -356,11 +387,12 @@ def dashboard_page(user):
                             "요청수량": qty,
                             "납기일": target_date.strftime("%Y-%m-%d"),
                             "요청사항": remarks,
-                            "첨부파일": file_name
                         }
-                        if data_manager.add_request(new_data):
-                            st.success("요청이 성공적으로 등록되었습니다.")
-                            time.sleep(1)
+                        # 첨부파일은 내용 기준으로 중복 없이 나눠 저장 (요청 등록과 함께 처리)
+                        files = [uploaded_file] if uploaded_file is not None else None
+                        if data_manager.add_request(new_data, files=files):
+                            # 저장은 쓰기 큐에서 반영되므로 기다리지 않고 새로고침 후 안내
+                            st.session_state["notice"] = "요청이 성공적으로 등록되었습니다."
                             st.rerun()
                         else:
                             st.error("저장 중 오류가 발생했습니다.")
@@ -368,6 +400,19 @@ def dashboard_page(user):
     # --- ADMIN VIEW ---
     else:
         st.info("🔧 관리자 모드: 모든 고객사의 요청 내역을 확인하고 관리할 수 있습니다.")
+
+        # 선택한 화면만 그림 (분석 화면에서는 관리 대장을 조회하지 않음)
+        admin_view = st.radio(
+            "화면", ["📋 관리 대장", "📊 리드타임 분석"], horizontal=True, label_visibility="collapsed", key="admin_view"
+        )
+        if admin_view == "📊 리드타임 분석":
+            analytics_panel()
+            return
+
+        profiling.section("render.summary")
+
+        # 집계는 데이터 버전별로 캐시되므로 행 수와 관계없이 바로 표시
+        summary = data_manager.get_dashboard_summary()
         
         # Tools
         co1, co2, co3 = st.columns([1, 1, 4])
@@ -375,44 +420,65 @@ def dashboard_page(user):
              if st.button("🔄 데이터 새로고침"):
                  st.rerun()
         with co2:
-            if not df.empty:
-                # Use BytesIO for Excel download
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Sheet1')
-                processed_data = output.getvalue()
-                
+            if summary["total"]:
+                # 다운로드 파일은 버튼을 누를 때 생성 (데이터 버전별 캐시)
+                export_format = st.selectbox(
+                    "내보내기 형식",
+                    list(EXPORT_LABELS),
+                    format_func=EXPORT_LABELS.get,
+                    label_visibility="collapsed",
+                    key="export_format"
+                )
                 st.download_button(
-                    "📥 엑셀 다운로드",
-                    data=processed_data,
-                    file_name="sample_data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key='download-xlsx'
+                    "📥 엑셀 다운로드" if export_format == "xlsx" else f"📥 {export_format.upper()} 다운로드",
+                    data=lambda: data_manager.read_export(export_format),
+                    file_name=f"sample_data.{export_format}",
+                    mime=export.FORMATS[export_format],
+                    key=f'download-{export_format}'
                 )
 
         # --- Mini Dashboard ---
-        if not df.empty:
+        if summary["total"]:
             st.markdown("### 📈 전체 현황 요약")
             
             # Metrics Row
             m1, m2, m3, m4 = st.columns(4)
             with m1:
-                st.metric("총 요청 건수", f"{len(df)}건")
+                st.metric("총 요청 건수", f"{summary['total']}건")
             with m2:
-                # 진행상태 계산 (없으면 기본값 생성)
-                if '진행상태' not in df.columns:
-                    df['진행상태'] = df.apply(get_progress_status, axis=1)
                 # 진행/대기: 접수, 자재준비, 생산중, 출하준비
-                pending_mask = df['진행상태'].astype(str).isin(['접수', '자재준비', '생산중', '출하준비'])
-                pending_count = pending_mask.sum()
-                st.metric("진행/대기 중", f"{pending_count}건")
+                st.metric("진행/대기 중", f"{summary['pending']}건")
             with m3:
                 # 완료: 출하완료
-                completed_count = len(df[df['진행상태'].astype(str).str.contains('출하완료', na=False)])
-                st.metric("완료 건수", f"{completed_count}건")
+                st.metric("완료 건수", f"{summary['completed']}건")
             with m4:
-                company_count = df['업체명'].nunique()
-                st.metric("참여 업체", f"{company_count}개사")
+                st.metric("참여 업체", f"{summary['company_count']}개사")
+
+            # 납기 알림: 납기 인덱스로 범위 조회 (대장 전체를 그리지 않고 지연/임박 건만)
+            today = pd.Timestamp.now().normalize()
+            overdue_df, overdue_total = data_manager.get_due_requests("open", end=today, limit=DUE_PANEL_ROWS)
+            due_soon_df, due_soon_total = data_manager.get_due_requests(
+                "open", start=today, end=today + pd.Timedelta(days=DUE_SOON_DAYS + 1), limit=DUE_PANEL_ROWS
+            )
+            with st.expander(
+                f"⏰ 납기 알림: 지남 {overdue_total}건 / {DUE_SOON_DAYS}일 내 {due_soon_total}건",
+                expanded=False,
+            ):
+                due_columns = ["관리번호", "업체명", "품명", "품번", "요청수량", "납기일"]
+                for label, frame, total in (
+                    ("납기 지남 (출하 전, 오래된 순)", overdue_df, overdue_total),
+                    (f"{DUE_SOON_DAYS}일 내 납기", due_soon_df, due_soon_total),
+                ):
+                    st.caption(label if total <= len(frame) else f"{label} - {len(frame)}/{total}건 표시")
+                    if frame.empty:
+                        st.write("없음")
+                    else:
+                        st.dataframe(
+                            frame[[c for c in due_columns if c in frame.columns]],
+                            use_container_width=True,
+                            hide_index=True,
+                            column_config={"납기일": st.column_config.DateColumn("납기일", format="YYYY-MM-DD")},
+                        )
             
             st.markdown("<br>", unsafe_allow_html=True)
             
@@ -421,30 +487,76 @@ def dashboard_page(user):
             
             with c1:
                 st.caption("진행상태별 현황")
-                if '진행상태' not in df.columns:
-                    df['진행상태'] = df.apply(get_progress_status, axis=1)
-                status_counts = df['진행상태'].value_counts()
-                st.bar_chart(status_counts, color="#3b82f6")
+                st.bar_chart(summary["status_counts"], color="#3b82f6")
                 
             with c2:
                 st.caption("업체별 요청 건수")
-                company_counts = df['업체명'].value_counts().head(5) # Top 5
+                company_counts = summary["company_counts"].head(5) # Top 5
                 st.bar_chart(company_counts, color="#ef4444")
                 
             with c3:
                 st.caption("차종별 분포")
-                if '차종' in df.columns:
-                    project_counts = df['차종'].value_counts().head(5) # Top 5
+                if not summary["project_counts"].empty:
+                    project_counts = summary["project_counts"].head(5) # Top 5
                     st.bar_chart(project_counts, color="#10b981")
                 
             st.divider()
 
         # Editable Dataframe for easy management
         st.subheader("통합 관리 대장")
-        if not df.empty:
-            # 스타일링된 미리보기 추가
+        if summary["total"]:
+            profiling.section("render.ledger_query")
+            # 필터/정렬 조건 (조회는 저장소에서 처리하고 현재 페이지만 화면에 표시)
+            f1, f2, f3 = st.columns(3)
+            with f1:
+                sel_companies = st.multiselect("업체명", data_manager.get_distinct_values("업체명"), key="ledger_companies")
+            with f2:
+                sel_projects = st.multiselect("차종", data_manager.get_distinct_values("차종"), key="ledger_projects")
+            with f3:
+                sel_statuses = st.multiselect("진행상태", status.STATUS_ORDER, key="ledger_statuses")
+            f4, f5, f6, f7 = st.columns([2, 3, 2, 1])
+            with f4:
+                due_range = st.date_input("납기일 범위", value=(), key="ledger_due")
+            with f5:
+                search_text = st.text_input("검색 (관리번호, 품명, 품번, 비고 등)", key="ledger_search")
+            with f6:
+                sort_by = st.selectbox("정렬", ["등록순", "진행상태"] + data_manager.EXPECTED_COLUMNS, key="ledger_sort")
+                descending = st.checkbox("내림차순", key="ledger_desc")
+            with f7:
+                page_size = st.selectbox("행 수", PAGE_SIZES, key="ledger_page_size")
+
+            query_args = {
+                "filters": {
+                    "companies": sel_companies,
+                    "projects": sel_projects,
+                    "statuses": sel_statuses,
+                    "due_from": due_range[0].strftime("%Y-%m-%d") if len(due_range) > 0 else None,
+                    "due_to": due_range[1].strftime("%Y-%m-%d") if len(due_range) > 1 else None,
+                    "text": search_text.strip(),
+                },
+                "sort_by": None if sort_by == "등록순" else sort_by,
+                "ascending": not descending,
+            }
+
+            # 조건이 바뀌면 첫 페이지부터
+            signature = repr((query_args, page_size))
+            if st.session_state.get("ledger_signature") != signature:
+                st.session_state["ledger_signature"] = signature
+                st.session_state["ledger_page"] = 1
+            page = st.session_state.get("ledger_page", 1)
+            page_df, total = data_manager.query_requests(**query_args, offset=(page - 1) * page_size, limit=page_size)
+            page_count = max(1, -(-total // page_size))
+            if page > page_count:
+                # 다른 사용자의 삭제 등으로 페이지 수가 줄어든 경우 마지막 페이지로
+                page = st.session_state["ledger_page"] = page_count
+                page_df, total = data_manager.query_requests(**query_args, offset=(page - 1) * page_size, limit=page_size)
+            if query_args["filters"]["text"] and total >= max(data_manager.SEARCH_LIMIT, page * page_size):
+                st.caption(f"검색 결과가 많아 일치도 상위 {total:,}건만 표시합니다. 검색어를 더 구체적으로 입력하세요.")
+
+            # 스타일링된 미리보기 추가 (현재 페이지만)
+            profiling.section("render.styled_view")
             with st.expander("📊 스타일링된 뷰 (읽기 전용)", expanded=False):
-                styled_df = style_dataframe(df)
+                styled_df = style_dataframe(page_df.copy())
                 html = styled_df.to_html(escape=False)
                 st.markdown(
                     f'<div style="overflow-x: auto; max-height: 600px; overflow-y: auto;">{html}</div>',
@@ -452,38 +564,40 @@ def dashboard_page(user):
                 )
             
             st.markdown("<br>", unsafe_allow_html=True)
+            profiling.section("render.editor")
             # Add a selection column for deletion
             # We create a copy to avoid SettingWithCopy warning on the original cached df if any
-            display_df = df.copy()
+            display_df = page_df.copy()
             if "선택" not in display_df.columns:
                 display_df.insert(0, "선택", False)
 
             # ---- 컬럼 타입 정리 (에디터용 뷰에만 적용) ----
-            # 1) 날짜 컬럼: datetime 타입으로 변환 (캘린더 선택 가능하도록)
-            date_columns = ["접수일", "납기일", "도면접수일", "완료예정일", "자재입고일", "샘플완료일", "출하일"]
-            for col in date_columns:
-                if col in display_df.columns:
-                    try:
-                        # 빈 값 처리
-                        display_df[col] = display_df[col].replace(['', 'nan', 'None', None], pd.NaT)
-                        # datetime 타입으로 변환 (날짜만, 시간 없음)
-                        display_df[col] = pd.to_datetime(display_df[col], errors='coerce')
-                    except Exception:
-                        pass
+            # 1) 날짜 컬럼은 저장소에서 이미 datetime 타입으로 읽어오므로 그대로 캘린더로 표시
+            date_columns = DATE_COLUMNS
 
             # 2) 텍스트 컬럼: 문자 입력 가능하도록 전부 문자열 타입으로 캐스팅
-            text_columns = ["납품장소", "요청사항", "자재요청", "비고"]
+            #    (category 컬럼은 그대로 두면 기존 값만 고르는 선택 상자가 됨)
+            text_columns = CATEGORY_COLUMNS + ["요청사항", "자재요청", "비고"]
             for col in text_columns:
                 if col in display_df.columns:
                     display_df[col] = display_df[col].astype("string").fillna("")
 
+            # 3) 첨부파일: 파일 이름만 표시 (목록 변경은 아래 첨부파일 업로드에서)
+            if "첨부파일" in display_df.columns:
+                display_df["첨부파일"] = display_df["첨부파일"].map(attachments.display_names)
+
             # column_config 설정 (캘린더 선택 가능하도록)
             column_config = {
                 "선택": st.column_config.CheckboxColumn(
                     "삭제 선택",
                     help="삭제할 항목을 선택하세요",
                     default=False,
-                )
+                ),
+                "첨부파일": st.column_config.TextColumn(
+                    "첨부파일",
+                    help="첨부파일은 아래 '첨부파일 업로드'에서 추가합니다",
+                    disabled=True,
+                ),
             }
             
             # 날짜 컬럼에 DateColumn 설정 (캘린더로 선택 가능)
@@ -497,15 +611,26 @@ def dashboard_page(user):
                             format="YYYY-MM-DD",
                         )
 
+            # 저장/삭제 후, 페이지/조건이 바뀌면 키를 바꿔 에디터 변경 내역을 초기화
+            editor_key = f"admin_editor_{st.session_state.get('admin_editor_version', 0)}_{page}_{hash(signature)}"
             edited_df = st.data_editor(
                 display_df,
                 use_container_width=True,
                 height=600,
                 num_rows="dynamic",
-                key="admin_editor",
+                key=editor_key,
                 column_config=column_config
             )
+
+            st.number_input(
+                f"페이지 (전체 {page_count}쪽 / 검색 결과 {total}건)",
+                min_value=1,
+                max_value=page_count,
+                step=1,
+                key="ledger_page"
+            )
             
+            profiling.section("render.actions")
             col_act1, col_act2 = st.columns([1, 4])
             
             with col_act1:
@@ -516,8 +641,8 @@ def dashboard_page(user):
                     if st.button(f"🗑️ 선택된 {len(selected_rows)}건 삭제", type="primary"):
                         ids_to_delete = selected_rows["관리번호"].tolist()
                         if data_manager.delete_requests_by_ids(ids_to_delete):
-                             st.success(f"{len(selected_rows)}건이 삭제되었습니다.")
-                             time.sleep(1)
+                             st.session_state["notice"] = f"{len(selected_rows)}건이 삭제되었습니다."
+                             st.session_state['admin_editor_version'] = st.session_state.get('admin_editor_version', 0) + 1
                              st.rerun()
                         else:
                              st.error("삭제 중 오류가 발생했습니다.")
@@ -525,14 +650,17 @@ def dashboard_page(user):
             with col_act2:
                 # Save changes button (for other edits)
                 if st.button("변경된 내용 저장"):
-                    # Remove the '선택' column before saving
-                    save_df = edited_df.drop(columns=["선택"], errors='ignore')
-                    if data_manager.save_data(save_df):
-                        st.success("데이터가 성공적으로 업데이트되었습니다.")
+                    # 변경된 행/셀만 관리번호 기준으로 저장 (다른 사용자가 추가한 행은 그대로 유지)
+                    changes = editor_changes(display_df, st.session_state.get(editor_key, {}))
+                    if data_manager.save_changes(**changes):
+                        st.session_state['admin_editor_version'] = st.session_state.get('admin_editor_version', 0) + 1
+                        st.session_state["notice"] = "데이터가 성공적으로 업데이트되었습니다."
+                        st.rerun()
                     else:
                         st.error("저장 실패.")
             
             # 관리자 모드: 첨부파일 업로드 기능
+            profiling.section("render.attachments")
             st.markdown("---")
             st.subheader("📎 첨부파일 업로드")
             st.info("특정 요청건에 첨부파일을 추가할 수 있습니다.")
@@ -540,10 +668,10 @@ def dashboard_page(user):
             # 관리번호 선택 및 파일 업로드
             col_file1, col_file2 = st.columns([2, 3])
             with col_file1:
-                if not df.empty:
-                    request_ids = df['관리번호'].tolist()
+                if not page_df.empty:
+                    request_ids = page_df['관리번호'].tolist()
                     selected_id = st.selectbox(
-                        "관리번호 선택",
+                        "관리번호 선택 (현재 페이지)",
                         options=request_ids,
                         help="첨부파일을 추가할 요청건을 선택하세요"
                     )
@@ -561,72 +689,72 @@ def dashboard_page(user):
             
             if selected_id and admin_uploaded_file is not None:
                 if st.button("파일 업로드 및 저장", type="primary"):
-                    try:
-                        # 파일 저장 디렉토리 생성
-                        import os
-                        save_dir = "attachments"
-                        if not os.path.exists(save_dir):
-                            os.makedirs(save_dir)
-                        
-                        # 타임스탬프와 원본 파일명을 조합하여 저장
-                        timestamp = time.strftime("%Y%m%d_%H%M%S")
-                        safe_filename = "".join(c for c in admin_uploaded_file.name if c.isalnum() or c in "._- ")
-                        file_name = f"{timestamp}_{safe_filename}"
-                        file_path = os.path.join(save_dir, file_name)
-                        
-                        # 파일 저장
-                        with open(file_path, "wb") as f:
-                            f.write(admin_uploaded_file.getbuffer())
-                        
-                        # 데이터베이스 업데이트
-                        df_to_update = data_manager.load_data()
-                        if selected_id in df_to_update['관리번호'].values:
-                            idx = df_to_update.index[df_to_update['관리번호'] == selected_id].tolist()[0]
-                            # 기존 첨부파일이 있으면 추가 (쉼표로 구분)
-                            existing_file = str(df_to_update.at[idx, '첨부파일']) if '첨부파일' in df_to_update.columns else ""
-                            if existing_file and existing_file.strip() != "" and existing_file != "nan":
-                                df_to_update.at[idx, '첨부파일'] = f"{existing_file}, {file_name}"
-                            else:
-                                df_to_update.at[idx, '첨부파일'] = file_name
-                            
-                            if data_manager.save_data(df_to_update):
-                                st.success(f"파일이 성공적으로 업로드되었습니다: {admin_uploaded_file.name}")
-                                time.sleep(1)
-                                st.rerun()
-                            else:
-                                st.error("데이터베이스 업데이트 실패.")
-                        else:
-                            st.error("선택한 관리번호를 찾을 수 없습니다.")
-                    except Exception as e:
-                        st.error(f"파일 업로드 중 오류 발생: {e}")
+                    # 데이터베이스 업데이트 (해당 관리번호의 첨부파일 목록에 추가)
+                    if data_manager.add_attachment(selected_id, admin_uploaded_file):
+                        st.success(f"파일이 성공적으로 업로드되었습니다: {admin_uploaded_file.name}")
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error("파일 업로드 또는 데이터베이스 업데이트 실패.")
 
         else:
             st.info("데이터가 없습니다.")
             
         # File Upload for Bulk Update
+        profiling.section("render.bulk_upload")
         st.markdown("---")
         st.subheader("📂 엑셀 일괄 업로드")
         uploaded_file = st.file_uploader("기존 엑셀파일을 업로드하여 데이터를 병합합니다.", type=['xlsx'])
         if uploaded_file:
             if st.button("업로드 및 병합"):
-                try:
-                    new_df = pd.read_excel(uploaded_file)
-                    if data_manager.merge_data(new_df):
-                        st.success("데이터가 성공적으로 병합되었습니다.")
-                        time.sleep(1)
-                        st.rerun()
+                # 행 묶음 단위로 읽고 검증/저장하며 진행률 표시
+                progress_bar = st.progress(0.0, text="엑셀 파일을 읽는 중...")
+
+                def show_progress(done, total):
+                    if total:
+                        progress_bar.progress(min(done / total, 1.0), text=f"{done:,} / {total:,}행 처리 중...")
                     else:
-                        st.error("데이터 병합 중 오류가 발생했습니다.")
-                except Exception as e:
-                    st.error(f"파일 처리 오류: {e}")
+                        progress_bar.progress(0.0, text=f"{done:,}행 처리 중...")
+
+                report = data_manager.bulk_import(uploaded_file, progress=show_progress)
+                progress_bar.empty()
+                # 새로고침 후에도 결과를 보여주도록 세션에 보관
+                st.session_state["import_report"] = report
+                st.rerun()
+
+        report = st.session_state.pop("import_report", None)
+        if report:
+            if report["ok"]:
+                st.success(f"데이터가 성공적으로 병합되었습니다. ({report['imported']:,}건 반영)")
+            else:
+                st.error(f"데이터 병합 중 오류가 발생했습니다. ({report['imported']:,}건까지 반영됨)")
+            if report["errors"]:
+                st.warning(f"형식이 맞지 않는 {len({e['행'] for e in report['errors']}):,}개 행은 제외되었습니다.")
+                st.dataframe(pd.DataFrame(report["errors"]), use_container_width=True, hide_index=True)
+            if report["ignored_columns"]:
+                st.caption(f"인식하지 못한 컬럼은 무시되었습니다: {', '.join(report['ignored_columns'])}")
 
 # Main Routing
-if "user_info" not in st.session_state:
-    st.session_state["user_info"] = None
+# 실행(rerun)마다 구간별 시간/메모리를 기록 (관리자 화면 하단 패널, logs/trace.jsonl)
+profiling.start_run("app")
+user = None
+try:
+    if "user_info" not in st.session_state:
+        st.session_state["user_info"] = None
+
+    user = auth.check_auth()
 
-user = auth.check_auth()
+    if user:
+        dashboard_page(user)
+    else:
+        login_page()
+finally:
+    trace = profiling.end_run(user=(st.session_state.get("user_info") or {}).get("name"))
+    last = st.session_state.get("last_profile")
+    if trace is not None:
+        st.session_state["last_profile"] = {"total_ms": trace["total_ms"]}
 
-if user:
-    dashboard_page(user)
-else:
-    login_page()
+# 프로파일 패널은 실행을 닫은 뒤에 그려야 아직 열려 있던 화면 구간까지 표시됨
+if user and user["role"] != "client":
+    st.markdown("---")
+    profiling_panel(trace, last)
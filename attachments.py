@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from storage import FileLock, atomic_write_text
+
+# 첨부파일 저장 위치: 내용(SHA-256) 기준으로 한 번만 저장
+ATTACHMENT_DIR = "attachments"
+OBJECT_DIR = os.path.join(ATTACHMENT_DIR, "objects")
+REFS_FILE = os.path.join(ATTACHMENT_DIR, "refs.json")
+
+# 업로드 파일을 나눠 읽는 크기 (파일 전체를 메모리에 올리지 않음)
+CHUNK_SIZE = 1024 * 1024
+
+_lock = FileLock(f"{REFS_FILE}.lock")
+
+
+def blob_path(sha256):
+    """Path of the stored content for a hash (objects/ab/abcdef...)."""
+    return os.path.join(OBJECT_DIR, sha256[:2], sha256)
+
+
+def entry_path(entry):
+    """Path on disk for an attachment entry (legacy entries point at attachments/<name>)."""
+    if entry.get("sha256"):
+        return blob_path(entry["sha256"])
+    return os.path.join(ATTACHMENT_DIR, entry["name"])
+
+
+def _receive(fileobj):
+    """Stream an upload into a temp file in the store; returns (temp path, sha256, size)."""
+    os.makedirs(OBJECT_DIR, exist_ok=True)
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=OBJECT_DIR, prefix="upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        os.remove(tmp)
+        raise
+    return tmp, digest.hexdigest(), size
+
+
+def _keep(tmp, sha256):
+    # _lock을 잡은 채 호출: 같은 내용이 이미 있으면 새로 받은 파일은 버림
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        os.remove(tmp)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp, path)
+
+
+def store_file(fileobj, name):
+    """Stream an uploaded file into the store; identical content is kept once.
+
+    Returns the attachment entry {"name", "sha256", "size"}. The file is
+    unreferenced until add_ref, so release() may remove it; use
+    store_and_ref to attach it to a request.
+    """
+    tmp, sha256, size = _receive(fileobj)
+    try:
+        with _lock:
+            _keep(tmp, sha256)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {"name": os.path.basename(name), "sha256": sha256, "size": size}
+
+
+def store_and_ref(fileobj, name, request_id):
+    """store_file plus add_ref in one step under the refs lock.
+
+    release() can't delete the blob between it being stored and referenced.
+    """
+    tmp, sha256, size = _receive(fileobj)
+    try:
+        with _lock:
+            _keep(tmp, sha256)
+            _add_ref(sha256, request_id)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {"name": os.path.basename(name), "sha256": sha256, "size": size}
+
+
+def _read_refs():
+    try:
+        with open(REFS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _add_ref(sha256, request_id):
+    # _lock을 잡은 채 호출
+    refs = _read_refs()
+    counts = refs.setdefault(sha256, {})
+    counts[str(request_id)] = counts.get(str(request_id), 0) + 1
+    atomic_write_text(REFS_FILE, json.dumps(refs))
+
+
+def add_ref(sha256, request_id):
+    """Record that a request uses a stored file (which must still exist)."""
+    os.makedirs(ATTACHMENT_DIR, exist_ok=True)
+    with _lock:
+        if not os.path.exists(blob_path(sha256)):
+            raise FileNotFoundError(f"attachment {sha256} is no longer stored")
+        _add_ref(sha256, request_id)
+
+
+def ref_count(sha256):
+    """Number of references to a stored file across all requests."""
+    return sum(_read_refs().get(sha256, {}).values())
+
+
+def release(request_ids):
+    """Drop every reference held by the given requests and delete unused files."""
+    request_ids = {str(x) for x in request_ids}
+    if not os.path.exists(REFS_FILE):
+        return 0
+    with _lock:
+        refs = _read_refs()
+        unused = []
+        for sha256, counts in refs.items():
+            for request_id in request_ids & counts.keys():
+                del counts[request_id]
+            if not counts:
+                unused.append(sha256)
+        for sha256 in unused:
+            del refs[sha256]
+            if os.path.exists(blob_path(sha256)):
+                os.remove(blob_path(sha256))
+        atomic_write_text(REFS_FILE, json.dumps(refs))
+    return len(unused)
+
+
+def parse(value):
+    """첨부파일 cell → list of entries.
+
+    Accepts the JSON list written by format_list and the old comma-joined
+    file names (stored as attachments/<name>).
+    """
+    if value is None:
+        return []
+    text = str(value).strip()
+    if text in ("", "nan", "None"):
+        return []
+    if text.startswith("["):
+        try:
+            return [e for e in json.loads(text) if isinstance(e, dict) and e.get("name")]
+        except json.JSONDecodeError:
+            pass
+    return [{"name": name.strip()} for name in text.split(",") if name.strip()]
+
+
+def format_list(entries):
+    """List of entries → 첨부파일 cell value (JSON, 한글 그대로)."""
+    return json.dumps(entries, ensure_ascii=False) if entries else ""
+
+
+def display_names(value):
+    """첨부파일 cell → comma-joined file names for tables."""
+    return ", ".join(e["name"] for e in parse(value))
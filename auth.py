@@ -2,6 +2,7 @@ import streamlit as st
 import time
 import json
 import os
+import profiling
 
 USERS_FILE = "users.json"
 
@@ -22,6 +23,7 @@ DEFAULT_USERS = {
     }
 }
 
+@profiling.timed
 def load_users():
     """Load users from JSON file."""
     if os.path.exists(USERS_FILE):
@@ -47,6 +49,7 @@ def load_users():
         save_users(all_users)
         return all_users
 
+@profiling.timed
 def save_users(users):
     """Save users to JSON file."""
     try:
@@ -59,6 +62,7 @@ def save_users(users):
         print(f"Error saving users: {e}")
         return False
 
+@profiling.timed
 def register_user(username, password, company, name):
     """Register a new user (client role only)."""
     users = load_users()
@@ -81,6 +85,7 @@ def register_user(username, password, company, name):
     else:
         return False, "회원가입 중 오류가 발생했습니다."
 
+@profiling.timed
 def change_password(username, old_password, new_password):
     """Change user password."""
     users = load_users()
@@ -101,6 +106,7 @@ def change_password(username, old_password, new_password):
     else:
         return False, "비밀번호 변경 중 오류가 발생했습니다."
 
+@profiling.timed
 def login(username, password):
     """Simple login check."""
     users = load_users()
@@ -108,12 +114,14 @@ def login(username, password):
         return users[username]
     return None
 
+@profiling.timed
 def logout():
     """Logout handler."""
     st.session_state["logged_in"] = False
     st.session_state["user_info"] = None
     st.rerun()
 
+@profiling.timed
 def check_auth():
     """Check if user is logged in, return user info or None."""
     if "logged_in" not in st.session_state:
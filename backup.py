@@ -0,0 +1,255 @@
+# 백그라운드 백업: 저장할 때마다 복사하지 않고, 별도 스레드가 주기적으로
+# 압축 스냅샷(전체) 또는 마지막 전체 스냅샷 대비 변경분(delta)을 backups/에 기록
+#
+#   python backup.py --list             # 백업 목록
+#   python backup.py --now              # 지금 전체 백업
+#   python backup.py --restore latest   # 가장 최근 백업(또는 이름 지정)으로 복원
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from storage import COLUMNS, ID_COLUMN, FileLock, arrow_table, atomic_write_text, coerce_frame, read_parquet
+
+BACKUP_DIR = "backups"
+
+# 보관할 전체 스냅샷 개수 (오래된 것부터 삭제, 딸린 delta도 함께 삭제)
+BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", 7))
+# 마지막 백업 후 이 시간이 지나거나 이만큼 쓰기가 쌓이면 새 백업
+BACKUP_INTERVAL = int(os.environ.get("BACKUP_INTERVAL", 10 * 60))  # seconds
+BACKUP_WRITES = int(os.environ.get("BACKUP_WRITES", 100))
+# 전체 스냅샷 주기: 이 시간이 지났거나 delta가 이만큼 쌓이면 delta 대신 전체 백업
+FULL_INTERVAL = int(os.environ.get("BACKUP_FULL_INTERVAL", 24 * 60 * 60))  # seconds
+MAX_DELTAS = int(os.environ.get("BACKUP_MAX_DELTAS", 24))
+# 0이면 delta 없이 항상 전체 스냅샷
+USE_DELTAS = os.environ.get("BACKUP_DELTAS", "1") != "0"
+# 백그라운드 스레드가 데이터 버전을 확인하는 간격
+POLL_SECONDS = 30
+
+# delta 파일에서 행 종류를 나타내는 컬럼 ("upsert" / "delete")
+OP_COLUMN = "_op"
+
+
+def _read_frame(store):
+    """Whole ledger for a backup, read without holding the store's connection lock."""
+    if hasattr(store, "iter_chunks"):
+        # SQLite: 별도 연결 + 하나의 읽기 스냅샷 (앱의 읽기/쓰기를 막지 않음)
+        chunks = list(store.iter_chunks(5000))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=COLUMNS)
+    return store.load()
+
+
+def _as_stored(df, columns):
+    # 저장 형식으로 맞춰 비교: 빈 값은 같은 표시로
+    stored = arrow_table(df, columns).to_pandas().astype(object)
+    return stored.where(stored.notna(), "\0")
+
+
+class BackupManager:
+    """Take rotated, compressed backups of a store on a background thread.
+
+    Full snapshots and deltas are zstd-compressed Parquet files listed in
+    backups/manifest.json. A delta holds the rows changed or deleted since
+    the latest full snapshot, so a restore needs at most two files.
+    """
+
+    def __init__(self, store, directory=BACKUP_DIR):
+        self.store = store
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        # 여러 프로세스가 같은 백업 폴더를 쓰는 경우를 위한 잠금
+        self.lock = FileLock(os.path.join(directory, ".lock"))
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = None
+
+    def entries(self):
+        """Backups oldest first: {"name", "kind", "base", "created", "data_version", "rows"}."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _write_entries(self, entries):
+        atomic_write_text(self.manifest_path, json.dumps(entries, ensure_ascii=False, indent=1))
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def due(self):
+        """Whether the data changed enough (time or write count) since the last backup."""
+        entries = self.entries()
+        if not self.store.exists():
+            return False
+        if not entries:
+            return True
+        last = entries[-1]
+        current = self.store.data_version()
+        if current == last["data_version"]:
+            return False
+        # 파일 백엔드는 압축 시 버전이 줄어들 수 있으므로 쓰기 수는 음수가 되면 시간 기준만 적용
+        writes = current - last["data_version"]
+        return writes >= BACKUP_WRITES or time.time() - last["created"] >= BACKUP_INTERVAL
+
+    def backup(self, full=None):
+        """Write one backup now; full=None picks full vs delta by policy. Returns the entry."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            entries = self.entries()
+            fulls = [e for e in entries if e["kind"] == "full"]
+            if full is None:
+                full = not USE_DELTAS or not fulls
+                if not full:
+                    base = fulls[-1]
+                    deltas = [e for e in entries if e["base"] == base["name"]]
+                    full = time.time() - base["created"] >= FULL_INTERVAL or len(deltas) >= MAX_DELTAS
+
+            data_version = self.store.data_version()
+            df = _read_frame(self.store)
+            columns = COLUMNS + [c for c in df.columns if c not in COLUMNS]
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            if full:
+                name = f"full-{stamp}-v{data_version}.parquet"
+                table = arrow_table(df, columns)
+                entry = {"name": name, "kind": "full", "base": None}
+            else:
+                base = fulls[-1]
+                name = f"delta-{stamp}-v{data_version}.parquet"
+                table = arrow_table(self._diff(base, df, columns), columns + [OP_COLUMN])
+                entry = {"name": name, "kind": "delta", "base": base["name"]}
+
+            import pyarrow.parquet as pq
+
+            tmp = self._path(f"{name}.tmp")
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, self._path(name))
+            entry.update(created=time.time(), data_version=data_version, rows=table.num_rows)
+            entries.append(entry)
+            self._write_entries(self._rotate(entries))
+        return entry
+
+    def _diff(self, base, df, columns):
+        """Rows added/changed since the base snapshot (upsert) plus deleted IDs (delete)."""
+        old = _as_stored(read_parquet(self._path(base["name"])), columns)
+        new = _as_stored(df, columns)
+        old = old.drop_duplicates(ID_COLUMN, keep="last").set_index(ID_COLUMN)
+        new_keyed = new.drop_duplicates(ID_COLUMN, keep="last").set_index(ID_COLUMN)
+
+        common = new_keyed.index.intersection(old.index)
+        cells = [c for c in columns if c != ID_COLUMN]
+        changed = (new_keyed.loc[common, cells] != old.loc[common, cells]).any(axis=1)
+        upsert_ids = set(common[changed.to_numpy()]) | set(new_keyed.index.difference(old.index))
+        upserts = df[df[ID_COLUMN].astype(str).isin(upsert_ids)].assign(**{OP_COLUMN: "upsert"})
+        deleted = old.index.difference(new_keyed.index)
+        deletes = pd.DataFrame({ID_COLUMN: list(deleted), OP_COLUMN: "delete"})
+        return pd.concat([upserts, deletes], ignore_index=True)
+
+    def _rotate(self, entries):
+        """Keep the newest BACKUP_KEEP full snapshots and the deltas based on them."""
+        fulls = [e["name"] for e in entries if e["kind"] == "full"]
+        keep = set(fulls[-BACKUP_KEEP:]) if BACKUP_KEEP > 0 else set()
+        kept = []
+        for e in entries:
+            if (e["kind"] == "full" and e["name"] in keep) or (e["kind"] == "delta" and e["base"] in keep):
+                kept.append(e)
+            elif os.path.exists(self._path(e["name"])):
+                os.remove(self._path(e["name"]))
+        return kept
+
+    def read(self, name="latest"):
+        """Rebuild the ledger as of a backup (full snapshot + delta if needed)."""
+        entries = self.entries()
+        if not entries:
+            raise FileNotFoundError("no backups")
+        entry = entries[-1] if name == "latest" else next((e for e in entries if e["name"] == name), None)
+        if entry is None:
+            raise FileNotFoundError(f"backup not found: {name}")
+        if entry["kind"] == "full":
+            return coerce_frame(read_parquet(self._path(entry["name"]), raw=True))
+
+        df = read_parquet(self._path(entry["base"]), raw=True)
+        delta = read_parquet(self._path(entry["name"]), raw=True)
+        rows = delta[delta[OP_COLUMN] == "upsert"].drop(columns=[OP_COLUMN])
+        removed = set(delta.loc[delta[OP_COLUMN] == "delete", ID_COLUMN])
+        df = df[~df[ID_COLUMN].isin(removed)].reset_index(drop=True)
+        # 변경된 행은 제자리에서 통째로 교체 (빈 값도 그대로), 새 행은 뒤에 추가
+        keyed = rows.set_index(ID_COLUMN)
+        hit = df[ID_COLUMN].isin(keyed.index)
+        cols = [c for c in keyed.columns if c in df.columns]
+        if hit.any():
+            df.loc[hit, cols] = keyed.loc[df.loc[hit, ID_COLUMN], cols].to_numpy()
+        added = rows[~rows[ID_COLUMN].isin(df[ID_COLUMN])]
+        return coerce_frame(pd.concat([df, added], ignore_index=True))
+
+    def restore(self, name="latest"):
+        """Replace the store contents with a backup (current data is backed up first).
+
+        Run it on the writer queue (data_manager.restore_backup) so it is
+        ordered with the app's queued writes.
+        """
+        df = self.read(name)
+        if self.store.exists():
+            self.backup(full=True)
+        self.store.save(df)
+        return len(df)
+
+    def _run(self):
+        while not self._stop.wait(POLL_SECONDS):
+            try:
+                if self.due():
+                    self.backup()
+            except Exception as e:
+                print(f"Error during backup: {e}")
+
+    def start(self):
+        """Start the background backup thread (once per process)."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-backup", daemon=True)
+        self._pid = os.getpid()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    import argparse
+
+    import data_manager
+
+    parser = argparse.ArgumentParser(description="샘플 관리 대장 백업/복원")
+    parser.add_argument("--list", action="store_true", help="백업 목록 표시")
+    parser.add_argument("--now", action="store_true", help="지금 전체 백업")
+    parser.add_argument("--restore", metavar="NAME", help="백업 이름 또는 latest로 복원")
+    parser.add_argument("--backend", choices=["sqlite", "file"], help="저장소 백엔드 (기본: STORAGE_BACKEND)")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        data_manager.STORAGE_BACKEND = args.backend
+    manager = BackupManager(data_manager.get_storage())
+    try:
+        if args.now:
+            entry = manager.backup(full=True)
+            print(f"백업 완료: {entry['name']} ({entry['rows']}행)")
+        if args.restore:
+            rows = data_manager.restore_backup(args.restore)
+            print(f"복원 완료: {args.restore} ({rows}행)")
+        if args.list or not (args.now or args.restore):
+            for e in manager.entries():
+                created = datetime.fromtimestamp(e["created"]).strftime("%Y-%m-%d %H:%M:%S")
+                base = f" (기준: {e['base']})" if e["base"] else ""
+                print(f"{e['name']}  {created}  {e['rows']}행  v{e['data_version']}{base}")
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,316 @@
+# 성능 측정: 합성 대장(한글 텍스트, 드문드문 채워진 날짜, 업체 쏠림)을 만들어
+# data_manager / 화면 주요 작업의 시간과 최대 메모리를 재고 JSON으로 기록
+#
+#   python benchmark.py --sizes 1000 10000 100000 --out bench-new.json
+#   python benchmark.py --compare bench-old.json bench-new.json
+#
+# 각 측정은 임시 폴더에서 실행되므로 실제 데이터(sample_db.*)는 건드리지 않음
+# 목표 시간(TARGETS)을 넘는 작업이 있으면 종료 코드 1
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import analytics  # noqa: E402
+import data_manager  # noqa: E402
+import storage  # noqa: E402
+from styling import style_dataframe  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BACKENDS = ["sqlite", "file"]
+# 비교 시 이보다 작은 차이는 측정 오차로 보고 회귀로 표시하지 않음
+MIN_DELTA_S = 0.002
+# 작업별 목표 시간 (행당 초): 같은 크기의 업로드 병합은 5만 행 대장에 5만 행을 1초 안에
+TARGETS = {"merge_data.same-size": 1.0 / 50000}
+# 고정 비용이 큰 작은 대장은 목표 검사에서 제외
+TARGET_MIN_ROWS = 10000
+
+# 합성 데이터 재료
+COMPANY_HEADS = ["대한", "한국", "신성", "동양", "삼화", "세진", "우리", "태성", "현대", "영진", "대성", "서진"]
+COMPANY_TAILS = ["정밀", "전자", "산업", "모터스", "테크", "오토텍", "기공", "화학", "하이텍", "엔지니어링"]
+PROJECTS = ["EV6", "아이오닉5", "GV70", "쏘렌토", "K8", "팰리세이드", "NQ5", "MX5", "스타리아", "캐스퍼", "SP2", "JW1"]
+PARTS = ["커넥터", "하네스", "브라켓", "가스켓", "센서 하우징", "배터리 케이스", "리어 램프", "도어 트림", "그릴", "스위치"]
+VARIANTS = ["LH", "RH", "상부", "하부", "전방", "후방", "1차", "2차"]
+SURNAMES = list("김이박최정강조윤장임한오서신권황")
+GIVEN = ["민준", "서연", "도윤", "하은", "지호", "수아", "현우", "지민", "예준", "채원"]
+DEPARTMENTS = ["개발팀", "품질팀", "구매팀", "생산기술팀", "연구소"]
+PLACES = ["", "", "본사 자재창고", "2공장", "평택 물류센터"]
+REMARKS = ["", "", "", "긴급 요청", "도면 변경 예정", "색상 사양 확인 필요", "금형 수정 후 재요청", "시험용 샘플"]
+# 각 단계 날짜가 채워질 확률 (앞 단계가 있을 때만 다음 단계가 채워짐)
+STAGE_FILL = [("도면접수일", 0.85), ("완료예정일", 0.7), ("자재입고일", 0.65), ("샘플완료일", 0.6), ("출하일", 0.7)]
+
+
+def make_ledger(rows, seed=42):
+    """Synthetic ledger with the storage schema (dates as YYYY-MM-DD text)."""
+    rng = np.random.default_rng(seed)
+    companies = np.array([h + t for h in COMPANY_HEADS for t in COMPANY_TAILS])
+    # 업체별 건수는 Zipf 분포 (상위 몇 개 업체에 요청이 몰림)
+    weights = 1.0 / np.arange(1, len(companies) + 1) ** 1.1
+    company = rng.choice(companies, rows, p=weights / weights.sum())
+
+    today = np.datetime64(datetime.now().date())
+    received = today - rng.integers(0, 730, rows).astype("timedelta64[D]")
+    due = received + rng.integers(7, 60, rows).astype("timedelta64[D]")
+
+    df = pd.DataFrame({
+        "접수일": pd.Series(received).dt.strftime("%Y-%m-%d"),
+        "담당자": rng.choice(SURNAMES, rows) + rng.choice(GIVEN, rows),
+        "부서": rng.choice(DEPARTMENTS, rows),
+        "업체명": company,
+        "차종": rng.choice(PROJECTS, rows),
+        "품명": pd.Series(rng.choice(PARTS, rows)) + " " + rng.choice(VARIANTS, rows),
+        "품번": [f"{a}{b:05d}-{c:02d}" for a, b, c in zip(
+            rng.choice(list("ABCDKMP"), rows), rng.integers(0, 100000, rows), rng.integers(0, 100, rows))],
+        "납품장소": rng.choice(PLACES, rows),
+        "요청수량": rng.integers(1, 500, rows),
+        "납기일": pd.Series(due).dt.strftime("%Y-%m-%d"),
+        "요청사항": rng.choice(REMARKS, rows),
+        "자재요청": np.where(rng.random(rows) < 0.3, "요청 완료", ""),
+        "비고": np.where(rng.random(rows) < 0.1, rng.choice(REMARKS, rows), ""),
+        "첨부파일": "",
+    })
+
+    filled = np.ones(rows, dtype=bool)
+    offset = np.zeros(rows, dtype=int)
+    for col, p in STAGE_FILL:
+        filled &= rng.random(rows) < p
+        offset = offset + rng.integers(1, 15, rows)
+        dates = pd.Series(received + offset.astype("timedelta64[D]")).dt.strftime("%Y-%m-%d")
+        df[col] = dates.where(filled & (received + offset.astype("timedelta64[D]") <= today), "")
+
+    # 관리번호: 접수일별 일련번호
+    day = df["접수일"].str.replace("-", "")
+    seq = df.groupby("접수일").cumcount() + 1
+    df["관리번호"] = "REQ-" + day + "-" + seq.map("{:04d}".format)
+    return df[storage.COLUMNS]
+
+
+def _reset(backend):
+    """Point data_manager at a fresh store of the given backend in the cwd."""
+    # 이전 저장소에 대기 중인 쓰기를 먼저 반영
+    data_manager._writer.flush()
+    data_manager.STORAGE_BACKEND = backend
+    data_manager._storage = None
+    data_manager._started = False
+    data_manager.invalidate_cache()
+
+
+def _startup():
+    data_manager.startup()
+    # 측정 중 백그라운드 백업/납기 알림이 끼어들지 않도록 중지
+    if data_manager._backups is not None:
+        data_manager._backups.stop()
+    if data_manager._digests is not None:
+        data_manager._digests.stop()
+
+
+def measure(fn, repeat, setup=None):
+    """(min seconds, median seconds, peak MB) of fn over repeat runs.
+
+    Times are taken without tracing; the peak comes from one extra traced run.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - start)
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        fn(arg) if setup else fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), float(np.median(times)), peak / 1024 / 1024
+
+
+def operations(ledger):
+    """(name, fn, setup) in run order; write operations come last."""
+    top_company = ledger["업체명"].value_counts().index[0]
+    today = pd.Timestamp.now().normalize()
+    sample = ledger.sample(min(len(ledger), 1000), random_state=1)
+    merge_rows = sample.assign(비고="병합 갱신")
+    merge_rows = pd.concat([merge_rows, sample.drop(columns=["관리번호"]).head(100)], ignore_index=True)
+
+    def cold(fn):
+        def run():
+            data_manager.invalidate_cache()
+            return fn()
+        return run
+
+    def style_company():
+        # 고객사 화면의 표: st.dataframe이 하는 것처럼 셀 스타일 계산까지 실행
+        styled = style_dataframe(data_manager.get_filtered_data("client", top_company).copy())
+        if hasattr(styled, "_compute"):
+            styled._compute()
+
+    def cold_rollups():
+        analytics._rollups = analytics.LeadTimeRollups()
+        return analytics.get_rollups()
+
+    # 대장과 같은 크기의 업로드: 앞쪽 절반은 기존 요청 갱신, 나머지는 신규 요청
+    upload = make_ledger(len(ledger), seed=7)
+    half = len(ledger) // 2
+    upload["관리번호"] = ledger["관리번호"].iloc[:half].tolist() + ("UP-" + upload["관리번호"].iloc[half:]).tolist()
+
+    def fresh_ledger():
+        # 매 측정을 같은 대장에서 시작 (이전 병합으로 늘어난 행 제거)
+        data_manager.save_data(ledger, base_version=None)
+        return upload
+
+    shipments = iter(sample["관리번호"].tolist())
+
+    def ship_one():
+        # 분석 집계 증분 갱신: 요청 하나를 출하 처리한 직후의 갱신 비용
+        data_manager.update_request(next(shipments), {"출하일": today})
+
+    def new_ids():
+        for _ in range(10):
+            data_manager.add_request({"업체명": top_company, "품명": "삭제 대상", "요청수량": 1})
+        return data_manager.query_requests({"text": "삭제 대상"}, limit=10)[0]["관리번호"].tolist()
+
+    ops = [
+        ("save_data", lambda: data_manager.save_data(ledger, base_version=None), None),
+        ("load_data.cold", cold(data_manager.load_data), None),
+        ("load_data.warm", data_manager.load_data, None),
+        ("get_filtered_data.admin", lambda: data_manager.get_filtered_data("admin", None), None),
+        ("get_filtered_data.client", lambda: data_manager.get_filtered_data("client", top_company), None),
+        ("query_requests.page", lambda: data_manager.query_requests(
+            {"companies": [top_company], "text": "커넥터"}, sort_by="납기일", limit=100), None),
+        ("search_requests.client", lambda: data_manager.search_requests("커넥터", company=top_company), None),
+        ("get_due_requests.overdue", cold(lambda: data_manager.get_due_requests("open", end=today, limit=100)), None),
+        ("get_dashboard_summary.cold", cold(data_manager.get_dashboard_summary), None),
+        ("get_dashboard_summary.warm", data_manager.get_dashboard_summary, None),
+        ("style_dataframe.client", style_company, None),
+        ("analytics.rollups.cold", cold_rollups, None),
+        ("analytics.rollups.incremental", lambda _: analytics.get_rollups(), ship_one),
+        ("add_request", lambda: data_manager.add_request({"업체명": top_company, "품명": "벤치마크", "요청수량": 1}), None),
+        ("merge_data", lambda: data_manager.merge_data(merge_rows), None),
+        ("merge_data.same-size", data_manager.merge_data, fresh_ledger),
+        ("delete_requests_by_ids", data_manager.delete_requests_by_ids, new_ids),
+    ]
+    return ops
+
+
+def run(sizes, backends, repeat, seed):
+    results = []
+    cwd = os.getcwd()
+    for backend in backends:
+        for rows in sizes:
+            ledger = make_ledger(rows, seed)
+            with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+                os.chdir(tmp)
+                try:
+                    _reset(backend)
+                    _startup()
+                    for name, fn, setup in operations(ledger):
+                        best, median, peak = measure(fn, repeat, setup)
+                        result = {
+                            "backend": backend, "rows": rows, "op": name,
+                            "min_s": round(best, 6), "median_s": round(median, 6), "peak_mb": round(peak, 2),
+                        }
+                        note = ""
+                        if name in TARGETS and rows >= TARGET_MIN_ROWS:
+                            result["target_s"] = round(TARGETS[name] * rows, 6)
+                            if median > result["target_s"]:
+                                note = f"  ← 목표 {result['target_s']:.1f} s 초과"
+                        results.append(result)
+                        print(f"{backend:6} {rows:>8} {name:28} {median * 1000:10.1f} ms {peak:8.1f} MB{note}",
+                              file=sys.stderr)
+                finally:
+                    # 임시 폴더를 지우기 전에 대기 중인 쓰기를 반영
+                    data_manager._writer.flush()
+                    data_manager.invalidate_cache()
+                    data_manager._storage = None
+                    os.chdir(cwd)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(old_path, new_path, threshold):
+    """Print median time ratios new/old; returns the number of regressions."""
+    def keyed(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return {(r["backend"], r["rows"], r["op"]): r for r in json.load(f)["results"]}
+
+    old, new = keyed(old_path), keyed(new_path)
+    regressions = 0
+    print(f"{'backend':6} {'rows':>8} {'op':28} {'old ms':>10} {'new ms':>10} {'ratio':>7} {'mem MB':>15}")
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key], new[key]
+        ratio = n["median_s"] / o["median_s"] if o["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold and n["median_s"] - o["median_s"] > MIN_DELTA_S:
+            flag = "  ← 느려짐"
+            regressions += 1
+        mem = f"{o['peak_mb']:.1f}→{n['peak_mb']:.1f}"
+        print(f"{key[0]:6} {key[1]:>8} {key[2]:28} {o['median_s'] * 1000:10.1f} {n['median_s'] * 1000:10.1f} "
+              f"{ratio:7.2f} {mem:>15}{flag}")
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"{key[0]:6} {key[1]:>8} {key[2]:28} (한쪽 결과에만 있음)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="샘플 관리 대장 성능 측정")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="대장 행 수 (예: 1000 1000000)")
+    parser.add_argument("--backend", nargs="+", choices=DEFAULT_BACKENDS, default=DEFAULT_BACKENDS)
+    parser.add_argument("--repeat", type=int, default=3, help="작업별 반복 횟수 (중앙값 기록)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 JSON 파일 (없으면 표준 출력)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="두 결과 JSON 비교")
+    parser.add_argument("--threshold", type=float, default=0.2, help="이 비율 이상 느려지면 회귀로 표시 (기본 0.2)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    results = run(args.sizes, args.backend, args.repeat, args.seed)
+    missed = [r for r in results if "target_s" in r and r["median_s"] > r["target_s"]]
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    for r in missed:
+        print(f"목표 초과: {r['backend']} {r['rows']}행 {r['op']} {r['median_s']:.2f} s (목표 {r['target_s']:.2f} s)",
+              file=sys.stderr)
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,241 +1,756 @@
 import pandas as pd
 import os
-import shutil
+import threading
 from datetime import datetime
 
+import attachments
+import backup
+import digest
+import export
+import importer
+import migrations
+import profiling
+import status
+import storage
+
 DATA_FILE = "sample_db.xlsx"
+DB_FILE = "sample_db.sqlite3"
+
+# 내보내기 파일 캐시 위치 (데이터 버전별로 한 번만 생성)
+EXPORT_DIR = "exports"
+
+# 검색 결과 최대 건수 (점수 순)
+SEARCH_LIMIT = 500
+
+# 저장소 백엔드 선택: "sqlite" (기본, xlsx는 가져오기/내보내기 전용) 또는 "file" (xlsx 직접 저장)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite")
+
+EXPECTED_COLUMNS = storage.COLUMNS
+DATE_COLUMNS = storage.DATE_COLUMNS
+INT_COLUMNS = storage.INT_COLUMNS
+CATEGORY_COLUMNS = storage.CATEGORY_COLUMNS
+
+# 구 컬럼명 → 현재 컬럼명 (엑셀 업로드 헤더 매핑에도 사용)
+COLUMN_MAPPING = migrations.COLUMN_MAPPING
+
+_storage = None
+# 이 프로세스에서 시작 작업(스키마 마이그레이션, 백업/납기 알림 스레드)을 이미 했는지
+_started = False
+_startup_lock = threading.Lock()
+_backups = None
+_digests = None
+
+# 프로세스 전역 캐시: 모든 Streamlit 세션이 공유하며, 저장소 버전이 같으면 다시 읽지 않음
+_cache = {
+    "version": None, "df": None,
+    "company_version": None, "company_rows": None,
+    "summary_version": None, "summary": None,
+    "due_version": None, "due_index": None,
+}
+_cache_lock = threading.Lock()
+
+# 프로세스당 하나의 쓰기 큐: 모든 세션의 쓰기를 한 스레드에서 순서대로 실행
+# (프로세스 간 직렬화는 저장소의 파일 잠금 / SQLite 트랜잭션이 담당)
+# 요청 등록/수정/삭제는 대기 저널에 기록되는 즉시 반환하고 쓰기 스레드가 모아서 반영
+_writer = storage.WriteQueue()
+
+def get_storage():
+    """Return the storage backend selected by STORAGE_BACKEND."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            _storage = storage.SQLiteStorage(DB_FILE)
+        elif STORAGE_BACKEND == "file":
+            _storage = storage.FileStorage(
+                DATA_FILE, migrate=migrations.upgrade_frame, schema_version=migrations.SCHEMA_VERSION
+            )
+        else:
+            raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return _storage
+
+def _store():
+    """Return the storage backend, creating and migrating it on first use."""
+    store = get_storage()
+    if not _started:
+        startup()
+    return store
+
+@profiling.timed
+def startup():
+    """Create the store if needed, apply pending schema migrations and start backups
+    and the daily due-date digest.
+
+    Runs once per process; returns the migration steps that were applied.
+    """
+    global _started, _backups, _digests
+    with _startup_lock:
+        if _started:
+            return []
+        store = get_storage()
+        if not store.exists():
+            init_db()
+        steps = _write(migrations.migrate_store, store)
+        for version, description, _ in steps:
+            print(f"Schema migration {version} applied: {description}")
+        # 쓰기 큐 대기 저널 연결 (이전 실행에서 반영되지 못한 쓰기는 여기서 반영)
+        _writer.attach(store.path, _apply_queued)
+        # 백업은 별도 스레드에서 주기적으로 (저장 경로에서는 복사하지 않음)
+        _backups = backup.BackupManager(store)
+        _backups.start()
+        # 납기 알림 요약은 하루 한 번 outbox/에 (여러 프로세스가 있어도 한 번만 생성)
+        if digest.DIGEST_ENABLED:
+            _digests = digest.DigestScheduler(get_due_requests)
+            _digests.start()
+        _started = True
+    if steps:
+        invalidate_cache()
+    return steps
+
+@profiling.timed
+def restore_backup(name="latest"):
+    """Replace the ledger with a backup (see backup.BackupManager.restore); returns its row count.
+
+    Runs on the writer queue, after the writes queued before it, so no
+    queued write lands on top of the restored data.
+    """
+    store = _store()
+    manager = _backups if _backups is not None else backup.BackupManager(store)
+    try:
+        return _write(manager.restore, name)
+    finally:
+        invalidate_cache()
+
+def _write(fn, *args, **kwargs):
+    """Run a storage write on the process-wide writer queue and return its result."""
+    return _writer.submit(fn, *args, **kwargs)
 
+def _post(*records):
+    """Queue write records behind (durable once this returns) and acknowledge."""
+    _store()
+    _writer.post(list(records))
+    return True
+
+def _apply_queued(records):
+    """Apply a batch of queued write records (runs on the writer thread).
+
+    Attachments of deleted requests are released only after the deletes
+    are stored; if the batch fails, the journal replays both later.
+    """
+    try:
+        result = get_storage().apply_batch(records)
+        deleted = [request_id for r in records if r.get("op") == "delete" for request_id in r["ids"]]
+        if deleted:
+            # 삭제된 요청이 참조하던 첨부파일 정리 (다른 요청이 쓰지 않는 파일만 삭제)
+            attachments.release(deleted)
+        return result
+    finally:
+        invalidate_cache()
+
+def _synced_store():
+    """Return the storage backend once queued writes are applied (read-your-writes)."""
+    _writer.flush()
+    return _store()
+
+@profiling.timed
 def init_db():
-    """Initialize the Excel database if it doesn't exist."""
-    if not os.path.exists(DATA_FILE):
-        df = pd.DataFrame(columns=[
-            "관리번호", "접수일", "담당자", "부서", "업체명", "차종", "품명", "품번", 
-            "납품장소", "요청수량", "납기일", "요청사항", "도면접수일", "자재요청", 
-            "완료예정일", "자재입고일", "샘플완료일", "출하일", "비고", "첨부파일"
-        ])
-        # Add some sample data for visualization
-        sample_data = [
-            {
-                "관리번호": "REQ-20241215-001",
-                "접수일": "2024-12-15",
-                "담당자": "Client User 1",
-                "부서": "개발팀",
-                "업체명": "Client A",
-                "차종": "EV-X1",
-                "품명": "Battery Connector",
-                "품번": "50A Gold Plated",
-                "납품장소": "",
-                "요청수량": 100,
-                "납기일": "2024-12-25",
-                "요청사항": "Urgent",
-                "도면접수일": "",
-                "자재요청": "",
-                "완료예정일": "",
-                "자재입고일": "",
-                "샘플완료일": "",
-                "출하일": "",
-                "비고": ""
-            }
-        ]
-        df = pd.concat([df, pd.DataFrame(sample_data)], ignore_index=True)
-        df.to_excel(DATA_FILE, index=False)
+    """Initialize the database if it doesn't exist."""
+    store = get_storage()
+    if store.exists():
+        return
 
-def load_data():
-    """Load data from Excel."""
-    if not os.path.exists(DATA_FILE):
-        init_db()
-    
-    # Reload in case it was just created
-    try:
-        df = pd.read_excel(DATA_FILE)
-        
-        # Auto-migration: Check for missing columns and add them
-        expected_cols = [
-            "관리번호", "접수일", "담당자", "부서", "업체명", "차종", "품명", "품번", 
-            "납품장소", "요청수량", "납기일", "요청사항", "도면접수일", "자재요청", 
-            "완료예정일", "자재입고일", "샘플완료일", "출하일", "비고", "첨부파일"
-        ]
-        
-        # 기존 컬럼명을 새 컬럼명으로 매핑
-        column_mapping = {
-            "요청일": "접수일",
-            "요청자": "담당자",
-            "요청부서": "부서",
-            "차종/프로젝트": "차종",
-            "규격": "품번",
-            "수량": "요청수량",
-            "납기요청일": "납기일"
+    # SQLite 백엔드 최초 실행: 기존 엑셀 대장이 있으면 그대로 가져오기
+    if store.name != "file" and os.path.exists(DATA_FILE):
+        import_excel(DATA_FILE)
+        return
+
+    df = pd.DataFrame(columns=EXPECTED_COLUMNS)
+    # Add some sample data for visualization
+    sample_data = [
+        {
+            "관리번호": "REQ-20241215-001",
+            "접수일": "2024-12-15",
+            "담당자": "Client User 1",
+            "부서": "개발팀",
+            "업체명": "Client A",
+            "차종": "EV-X1",
+            "품명": "Battery Connector",
+            "품번": "50A Gold Plated",
+            "납품장소": "",
+            "요청수량": 100,
+            "납기일": "2024-12-25",
+            "요청사항": "Urgent",
+            "도면접수일": "",
+            "자재요청": "",
+            "완료예정일": "",
+            "자재입고일": "",
+            "샘플완료일": "",
+            "출하일": "",
+            "비고": ""
         }
-        
-        # 비고 컬럼 처리: 기존 비고는 요청사항으로 이동 (비고는 새로 추가)
-        if "비고" in df.columns and "요청사항" not in df.columns:
-            df["요청사항"] = df["비고"]
-            df.drop(columns=["비고"], inplace=True)
-        
-        # 컬럼명 변경
-        df.rename(columns=column_mapping, inplace=True)
-        
-        # 불필요한 컬럼 제거 (이메일, 연락처, 진행상태)
-        columns_to_remove = ["이메일", "연락처", "진행상태"]
-        for col in columns_to_remove:
-            if col in df.columns:
-                df.drop(columns=[col], inplace=True)
-        
-        updated = False
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = "" # Add missing column with empty string
-                updated = True
-        
-        # 컬럼 순서 재정렬 (존재하는 컬럼만)
-        existing_cols = [col for col in expected_cols if col in df.columns]
-        df = df[existing_cols]
-        
-        # 기존 데이터 보존: 업데이트 시에도 기존 행 데이터는 모두 유지
-        if updated:
-            # 백업 후 저장 (기존 데이터 보존)
-            save_data(df)
-            
-        # Ensure ID column is treated as string
-        if '관리번호' in df.columns:
-            df['관리번호'] = df['관리번호'].astype(str)
+    ]
+    df = pd.concat([df, pd.DataFrame(sample_data)], ignore_index=True)
+    _write(store.save, df)
+    # 현재 스키마로 만들었으므로 마이그레이션 대상 아님
+    _write(store.set_schema_version, migrations.SCHEMA_VERSION)
+
+@profiling.timed
+def import_excel(path):
+    """Replace the store contents with the rows of an xlsx ledger."""
+    df = migrations.upgrade_frame(pd.read_excel(path))
+
+    # 관리번호가 중복된 행은 PRIMARY KEY 충돌을 피하도록 뒤에 일련번호를 붙여 보존
+    ids = df["관리번호"].astype(str)
+    dup_rank = ids.groupby(ids).cumcount()
+    if (dup_rank > 0).any():
+        print(f"Duplicate IDs renamed on import: {sorted(set(ids[dup_rank > 0]))}")
+        df["관리번호"] = ids.where(dup_rank == 0, ids + "-" + dup_rank.astype(str))
+
+    store = get_storage()
+    result = _write(store.save, df)
+    _write(store.set_schema_version, migrations.SCHEMA_VERSION)
+    invalidate_cache()
+    return result
+
+def _export_chunks(store):
+    """Yield the ledger in row chunks without materialising it twice."""
+    if isinstance(store, storage.SQLiteStorage):
+        yield from store.iter_chunks(export.CHUNK_ROWS)
+        return
+    df = _ledger()
+    for start in range(0, max(len(df), 1), export.CHUNK_ROWS):
+        yield df.iloc[start:start + export.CHUNK_ROWS]
+
+@profiling.timed
+def export_excel(path_or_buffer):
+    """Write the current ledger to an xlsx file (or file-like object)."""
+    export.write_xlsx(path_or_buffer, EXPECTED_COLUMNS, _export_chunks(_synced_store()))
+    return True
+
+_export_lock = threading.Lock()
+
+@profiling.timed
+def export_ledger(fmt="xlsx"):
+    """Return the path of the ledger export in fmt (xlsx, csv or parquet).
+
+    The file is built on first request for each data version (streamed in
+    chunks) and reused until the data changes.
+    """
+    store = _synced_store()
+    if fmt == "xlsx" and isinstance(store, storage.FileStorage):
+        # 파일 백엔드: 데이터 엑셀 파일 자체를 최신 상태로 다시 만들어 내려받기
+        return _write(store.write_xlsx, export.write_xlsx)
+    name = f"ledger-{store.name}-{store.data_version()}.{fmt}"
+    path = os.path.join(EXPORT_DIR, name)
+    with _export_lock:
+        if not os.path.exists(path):
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            tmp_path = os.path.join(EXPORT_DIR, f"tmp-{name}")
+            export.WRITERS[fmt](tmp_path, EXPECTED_COLUMNS, _export_chunks(store))
+            os.replace(tmp_path, path)
+            # 이전 버전 파일 정리
+            for old in os.listdir(EXPORT_DIR):
+                if old.startswith("ledger-") and old.endswith(f".{fmt}") and old != name:
+                    os.remove(os.path.join(EXPORT_DIR, old))
+    return path
 
-        # 비고 컬럼은 항상 문자열로 (한글/영문 등 자유 입력 가능)
-        if '비고' in df.columns:
-            df['비고'] = df['비고'].astype(str).fillna("")
+@profiling.timed
+def read_export(fmt="xlsx"):
+    """Export bytes for a download button (built lazily, see export_ledger)."""
+    try:
+        with open(export_ledger(fmt), "rb") as f:
+            return f.read()
+    except Exception as e:
+        print(f"Error exporting DB: {e}")
+        return b""
+
+def _read_store(store):
+    """Read the ledger from storage and normalise column types."""
+    # 구버전 컬럼 자동 변환은 저장소에서 처리 (file: 읽을 때, sqlite: 가져올 때)
+    return _normalise(store.load())
+
+def _normalise(df):
+    """Normalise column types of frames read from storage."""
+    # Ensure ID column is treated as string
+    if '관리번호' in df.columns:
+        df['관리번호'] = df['관리번호'].astype(str)
+
+    # 비고 컬럼은 항상 문자열로 (한글/영문 등 자유 입력 가능)
+    if '비고' in df.columns:
+        df['비고'] = df['비고'].astype(str).fillna("")
+
+    return df
+
+def invalidate_cache():
+    """Drop the shared ledger cache so the next load reads from storage."""
+    with _cache_lock:
+        _cache["version"] = None
+        _cache["df"] = None
+        _cache["company_version"] = None
+        _cache["company_rows"] = None
+        _cache["summary_version"] = None
+        _cache["summary"] = None
+        _cache["due_version"] = None
+        _cache["due_index"] = None
+
+@profiling.timed
+def compact_storage():
+    """Fold pending journal/WAL entries into the main data file."""
+    try:
+        return _write(_store().compact)
+    except Exception as e:
+        print(f"Error compacting DB: {e}")
+        return False
+    finally:
+        invalidate_cache()
+
+@profiling.timed
+def _ledger():
+    """The shared cached ledger frame, re-read only when the store changed.
+
+    Shared by every session: only read it (select, take, filter into new
+    frames), never modify it in place. Use load_data() for a frame to edit.
+    """
+    store = _synced_store()
+    version = store.version()
+    with _cache_lock:
+        if _cache["df"] is None or _cache["version"] != version:
+            data_version = store.data_version()
+            df = _read_store(store)
+            # 이 데이터를 기준으로 한 전체 저장(save_data)의 충돌 검사용
+            df.attrs["data_version"] = data_version
+            _cache["df"] = df
+            _cache["version"] = version
+        return _cache["df"]
 
-        return df
+def load_data():
+    """Load the full ledger, served from the shared cache when unchanged.
+
+    Returns a copy of the cached frame (cell objects such as strings are
+    shared), so callers may modify it without affecting other sessions.
+    """
+    try:
+        return _ledger().copy()
     except Exception as e:
         print(f"Error loading DB: {e}")
         return pd.DataFrame()
 
-def save_data(df):
-    """Save dataframe to Excel."""
+@profiling.timed
+def load_changes(since, columns=None):
+    """Rows changed after data version since, for incremental consumers (analytics).
+
+    Returns (changed rows with their current values, deleted 관리번호, data
+    version) or None when the store can't tell (reload with load_data).
+    """
     try:
-        # 기존 데이터 백업 (업데이트 시 데이터 보존을 위해)
-        if os.path.exists(DATA_FILE):
-            backup_file = f"{DATA_FILE}.backup"
-            shutil.copy2(DATA_FILE, backup_file)
-        
-        df.to_excel(DATA_FILE, index=False)
-        return True
+        return _synced_store().changes_since(since, columns)
+    except Exception as e:
+        print(f"Error reading changes: {e}")
+        return None
+
+@profiling.timed
+def query_requests(filters=None, sort_by=None, ascending=True, offset=0, limit=None):
+    """Return one page of the ledger and the number of matching rows.
+
+    Filtering, sorting and paging run in the storage layer (SQL for the
+    sqlite backend, the shared cached frame for the file backend), so only
+    the requested page is materialised. See storage.query_frame for filters;
+    filters["text"] is looked up in the search index (best match first
+    when sort_by is None); only the best SEARCH_LIMIT matches (or enough
+    to fill the requested page) are kept, so total is capped at that.
+    """
+    try:
+        store = _synced_store()
+        filters = dict(filters or {})
+        text = filters.pop("text", None)
+        if text:
+            # 일치도 상위 행만 필터로 씀 (업체가 하나면 색인에서 바로 좁힘)
+            companies = filters.get("companies") or []
+            company = companies[0] if len(companies) == 1 else None
+            cap = SEARCH_LIMIT if limit is None else max(SEARCH_LIMIT, offset + limit)
+            filters["ids"] = [request_id for request_id, _ in store.search(text, company, cap)]
+        if isinstance(store, storage.SQLiteStorage):
+            page, total = store.query(filters, sort_by, ascending, offset, limit)
+            return _normalise(page), total
+        return storage.query_frame(_ledger(), filters, sort_by, ascending, offset, limit)
+    except Exception as e:
+        print(f"Error querying DB: {e}")
+        return pd.DataFrame(), 0
+
+@profiling.timed
+def search_requests(text, company=None, limit=SEARCH_LIMIT):
+    """Rows matching a search text, best match first.
+
+    Every word must appear in 관리번호, 품명, 품번, 차종, 업체명, 요청사항,
+    비고 or 납품장소 (Hangul matched by character 3-grams, see search.py).
+    company restricts the results to that 업체명 (client view).
+    """
+    try:
+        store = _synced_store()
+        ids = [request_id for request_id, _ in store.search(text, company, limit)]
+        if isinstance(store, storage.SQLiteStorage):
+            page, _ = store.query({"ids": ids})
+            return _normalise(page)
+        return storage.query_frame(_ledger(), {"ids": ids})[0]
+    except Exception as e:
+        print(f"Error searching requests: {e}")
+        return pd.DataFrame()
+
+@profiling.timed
+def get_distinct_values(col):
+    """Sorted distinct values of a column (for filter options)."""
+    try:
+        store = _synced_store()
+        if isinstance(store, storage.SQLiteStorage):
+            return store.distinct(col)
+        df = _ledger()
+        if col not in df.columns:
+            return []
+        values = df[col][status.has_value(df, col)].astype(str)
+        return sorted(values.unique())
+    except Exception as e:
+        print(f"Error reading distinct values: {e}")
+        return []
+
+@profiling.timed
+def get_data_version():
+    """Return the current data version of the store."""
+    return _synced_store().data_version()
+
+@profiling.timed
+def save_data(df, base_version=None):
+    """Save the full dataframe, replacing the stored ledger.
+
+    base_version (default: the version the frame was loaded at) must still
+    be current, otherwise the save is rejected so concurrent edits made by
+    other sessions are not silently overwritten.
+    """
+    if base_version is None:
+        base_version = df.attrs.get("data_version")
+    try:
+        return _write(get_storage().save, df, base_version)
+    except storage.StaleDataError as e:
+        print(f"Save rejected, data changed since it was loaded: {e}")
+        return False
     except Exception as e:
         print(f"Error saving DB: {e}")
         return False
+    finally:
+        invalidate_cache()
+
+@profiling.timed
+def allocate_request_ids(n=1):
+    """Reserve n new 관리번호 for today without loading the ledger.
 
-def add_request(data_dict):
-    """Add a new request to the database."""
-    df = load_data()
-    
-    # Generate ID
+    IDs come from a persistent per-day sequence, so they never collide
+    with existing ones (even after deletions) across sessions and processes.
+    """
     date_str = datetime.now().strftime("%Y%m%d")
-    count = len(df) + 1
-    new_id = f"REQ-{date_str}-{count:03d}"
-    
-    data_dict["관리번호"] = new_id
-    data_dict["접수일"] = datetime.now().strftime("%Y-%m-%d")
-    
-    # 관리자 전용 필드는 빈 값으로 초기화 (비고, 자재요청)
-    if "비고" not in data_dict:
-        data_dict["비고"] = ""
-    if "자재요청" not in data_dict:
-        data_dict["자재요청"] = ""
-    
-    # 모든 필수 컬럼이 있는지 확인하고 없으면 빈 값으로 추가
-    expected_cols = [
-        "관리번호", "접수일", "담당자", "부서", "업체명", "차종", "품명", "품번", 
-        "납품장소", "요청수량", "납기일", "요청사항", "도면접수일", "자재요청", 
-        "완료예정일", "자재입고일", "샘플완료일", "출하일", "비고", "첨부파일"
-    ]
-    for col in expected_cols:
-        if col not in data_dict:
-            data_dict[col] = ""
-    
-    new_row = pd.DataFrame([data_dict])
-    df = pd.concat([df, new_row], ignore_index=True)
-    
-    return save_data(df)
+    return _store().allocate_ids(f"REQ-{date_str}-", n)
+
+@profiling.timed
+def add_request(data_dict, files=None):
+    """Add a new request to the database.
+
+    files: uploaded file objects (with .name) to attach to the new request.
+    Returns as soon as the request is queued (see _post).
+    """
+    try:
+        data_dict["접수일"] = datetime.now().strftime("%Y-%m-%d")
+
+        # 관리자 전용 필드는 빈 값으로 초기화 (비고, 자재요청)
+        if "비고" not in data_dict:
+            data_dict["비고"] = ""
+        if "자재요청" not in data_dict:
+            data_dict["자재요청"] = ""
+
+        # 모든 필수 컬럼이 있는지 확인하고 없으면 빈 값으로 추가
+        for col in EXPECTED_COLUMNS:
+            if col not in data_dict:
+                data_dict[col] = ""
+
+        # Generate ID
+        data_dict["관리번호"] = allocate_request_ids(1)[0]
+
+        if files:
+            data_dict["첨부파일"] = attachments.format_list(_attach(data_dict["관리번호"], files))
+
+        return _post({"op": "insert", "row": storage.coerce_values(data_dict)})
+    except Exception as e:
+        print(f"Error adding request: {e}")
+        if files and data_dict.get("관리번호"):
+            attachments.release([data_dict["관리번호"]])
+        return False
+    finally:
+        invalidate_cache()
+
+@profiling.timed
+def update_request(request_id, values):
+    """Update the given columns of a single request (queued, see _post)."""
+    try:
+        return _post({"op": "update", "changes": {str(request_id): storage.coerce_values(values)}})
+    except Exception as e:
+        print(f"Error updating request {request_id}: {e}")
+        return False
+    finally:
+        invalidate_cache()
 
+def _attach(request_id, files):
+    """Store uploaded files (deduplicated by content) and reference them from a request."""
+    entries = []
+    for fileobj in files:
+        entries.append(attachments.store_and_ref(fileobj, fileobj.name, request_id))
+    return entries
 
+@profiling.timed
+def add_attachment(request_id, fileobj):
+    """Append an uploaded file to a request's 첨부파일 list."""
+    try:
+        store = _store()
+        entries = _attach(request_id, [fileobj])
+
+        def append():
+            # 쓰기 큐 안에서 최신 목록을 읽어 덧붙이기 (동시 업로드 시 누락 방지)
+            df = _ledger()
+            row = df[df["관리번호"] == str(request_id)]
+            if row.empty:
+                return False
+            current = attachments.parse(row.iloc[0].get("첨부파일"))
+            return store.update(request_id, {"첨부파일": attachments.format_list(current + entries)})
+
+        if not _write(append):
+            # 요청이 없어 추가하지 못한 경우 방금 만든 참조 되돌리기
+            attachments.release([request_id])
+            return False
+        return True
+    except Exception as e:
+        print(f"Error adding attachment to {request_id}: {e}")
+        return False
+    finally:
+        invalidate_cache()
+
+def _non_empty_mask(df):
+    """Cells holding a value that may overwrite existing data (not NaN / blank)."""
+    return pd.DataFrame({col: ~storage.blank_cells(df[col]) for col in df.columns}, index=df.index)
+
+@profiling.timed
 def merge_data(new_df):
-    """Merge new data from uploaded Excel into the existing DB."""
-    current_df = load_data()
-    
-    # 기존 데이터 백업 (병합 시 데이터 보존을 위해)
-    if os.path.exists(DATA_FILE):
-        backup_file = f"{DATA_FILE}.backup"
-        shutil.copy2(DATA_FILE, backup_file)
-    
-    # Ensure ID column exists in new data, if not generate them or handle appropriately
-    # For this simple version, we will just Append new rows that don't look like duplicates
-    # A simple check: if 'ID' exists in new_df, update those rows. If not, append.
-    
-    if '관리번호' not in new_df.columns:
-        # Assume these are NEW requests without IDs
-        # We need to assign IDs to them
-        start_count = len(current_df) + 1
-        date_str = datetime.now().strftime("%Y%m%d")
-        
-        new_ids = []
-        for i in range(len(new_df)):
-            new_ids.append(f"REQ-{date_str}-{(start_count + i):03d}")
-        new_df['관리번호'] = new_ids
-    
-    # Concatenate and save
-    # Note: This is a simple append. For a real system, we might want to check for duplicates based on ID.
-    # If ID exists, we update. 기존 데이터는 보존하고 새 데이터만 추가/업데이트
-    
-    updated_df = current_df.copy()
-    
-    # Separate into rows to update vs rows to append
-    # This logic assumes new_df has 'ID' column populated now
-    
-    for index, row in new_df.iterrows():
-        rid = row['관리번호']
-        if rid in updated_df['관리번호'].values:
-            # Update existing row (기존 데이터 보존하면서 업데이트)
-            # Find index of this ID
-            idx = updated_df.index[updated_df['관리번호'] == rid].tolist()[0]
-            # Update columns (빈 값이 아닌 경우에만 업데이트하여 기존 데이터 보존)
-            for col in new_df.columns:
-                if col in updated_df.columns:
-                    new_value = row[col]
-                    # 빈 값이 아니거나, 기존 값이 비어있는 경우에만 업데이트
-                    if pd.notna(new_value) and str(new_value).strip() != "":
-                        updated_df.at[idx, col] = new_value
-        else:
-            # Append new row (기존 데이터는 그대로 유지)
-            updated_df = pd.concat([updated_df, pd.DataFrame([row])], ignore_index=True)
-            
-    return save_data(updated_df)
+    """Merge new data from uploaded Excel into the existing DB.
+
+    Rows whose 관리번호 already exists are updated with their non-empty
+    values only (existing data is kept); all other rows are appended.
+    """
+    try:
+        store = _synced_store()
+
+        if '관리번호' not in new_df.columns:
+            # Assume these are NEW requests without IDs
+            # We need to assign IDs to them (한 번에 블록 단위로 발급)
+            new_df = new_df.assign(관리번호=allocate_request_ids(len(new_df)) if len(new_df) else [])
+
+        # 빈 셀은 저장소의 upsert가 기존 값 유지로 처리 (쓰는 시점의 최신 데이터 기준으로 결합)
+        rows = new_df.copy(deep=False)
+        rows['관리번호'] = new_df['관리번호'].astype(str)
+        if not rows['관리번호'].is_unique:
+            # 같은 관리번호가 여러 번 나오면 뒤쪽의 비어있지 않은 값을 우선 적용
+            rows = rows.where(_non_empty_mask(rows)).groupby('관리번호', sort=False).last().reset_index()
+        if rows.empty:
+            return True
+        return _write(store.upsert, rows)
+    except Exception as e:
+        print(f"Error merging data: {e}")
+        return False
+    finally:
+        invalidate_cache()
+
+@profiling.timed
+def bulk_import(fileobj, progress=None, batch_rows=importer.BATCH_ROWS):
+    """Stream an uploaded xlsx into the store in validated batches.
+
+    Headers are mapped with COLUMN_MAPPING, dates/quantities are coerced
+    per column, invalid rows are skipped and reported, and each batch is
+    merged (merge_data rules) as soon as it is read.
+    progress(done_rows, total_rows or None) is called after every batch.
 
+    Returns {"rows", "imported", "errors", "ignored_columns", "ok"}.
+    """
+    report = {"rows": 0, "imported": 0, "errors": [], "ignored_columns": [], "ok": True}
+    try:
+        for first_row, total, batch in importer.read_batches(fileobj, batch_rows):
+            batch, ignored = importer.map_columns(batch, EXPECTED_COLUMNS, COLUMN_MAPPING)
+            report["ignored_columns"] = report["ignored_columns"] or ignored
+            report["rows"] += len(batch)
+            valid, errors = importer.validate_batch(batch, first_row)
+            report["errors"] += errors
+
+            if not valid.empty:
+                # 관리번호가 없는 행은 새 요청으로 보고 번호 발급
+                if "관리번호" not in valid.columns:
+                    valid["관리번호"] = None
+                ids = valid["관리번호"].astype("string").str.strip()
+                missing = ids.isna() | ids.isin(["", "nan", "None"])
+                if missing.any():
+                    new_ids = allocate_request_ids(int(missing.sum()))
+                    ids = ids.mask(missing, pd.Series(new_ids, index=ids.index[missing], dtype="string"))
+                valid["관리번호"] = ids.astype(object)
+                if not merge_data(valid):
+                    report["ok"] = False
+                    break
+                report["imported"] += len(valid)
+
+            if progress is not None:
+                progress(report["rows"], total)
+    except Exception as e:
+        print(f"Error importing Excel: {e}")
+        report["ok"] = False
+    return report
+
+@profiling.timed
+def save_changes(updated=None, added=None, deleted=None):
+    """Apply an edit patch to the current store instead of rewriting the ledger.
+
+    updated: {관리번호: {컬럼: 값}} for changed cells only
+    added: list of new row dicts (관리번호 is generated when missing)
+    deleted: list of 관리번호 to remove
+
+    The patch is keyed by 관리번호, so it is rebased onto whatever the store
+    holds when it runs: rows other sessions added or edited are kept.
+    The patch is queued as one batch and acknowledged at once (see _post).
+    """
+    try:
+        records = []
+        if deleted:
+            records.append({"op": "delete", "ids": [str(x) for x in deleted]})
+        if updated:
+            changes = {str(k): storage.coerce_values(v) for k, v in updated.items()}
+            records.append({"op": "update", "changes": changes})
+        if added:
+            rows = [{col: row.get(col, "") for col in EXPECTED_COLUMNS} for row in added]
+            missing = [row for row in rows if not str(row["관리번호"] or "").strip()]
+            for row, new_id in zip(missing, allocate_request_ids(len(missing)) if missing else []):
+                row["관리번호"] = new_id
+            records += [{"op": "insert", "row": storage.coerce_values(row)} for row in rows]
+        if not records:
+            return True
+        return _post(*records)
+    except Exception as e:
+        print(f"Error saving changes: {e}")
+        return False
+    finally:
+        invalidate_cache()
+
+@profiling.timed
 def delete_requests_by_ids(ids_to_delete):
     """Delete requests that match the given list of IDs."""
     if not ids_to_delete:
         return False
-        
-    df = load_data()
-    
-    # Filter out the rows to be deleted
-    # We keep rows where '관리번호' is NOT in ids_to_delete
-    if '관리번호' in df.columns:
-        # Ensure string comparison
-        df = df[~df['관리번호'].astype(str).isin([str(x) for x in ids_to_delete])]
-        return save_data(df)
-    
-    return False
 
+    try:
+        # 관리번호 단위로 삭제 (전체 대장을 다시 쓰지 않음, 쓰기 큐에서 반영하면서 첨부파일도 정리)
+        return _post({"op": "delete", "ids": [str(x) for x in ids_to_delete]})
+    except Exception as e:
+        print(f"Error deleting requests: {e}")
+        return False
+    finally:
+        invalidate_cache()
+
+def _company_rows(df):
+    """업체명 → 행 위치 인덱스 (데이터 버전마다 한 번만 생성)."""
+    version = df.attrs.get("data_version")
+    with _cache_lock:
+        if _cache["company_rows"] is None or _cache["company_version"] != version:
+            _cache["company_rows"] = df.groupby("업체명", sort=False, observed=True).indices
+            _cache["company_version"] = version
+        return _cache["company_rows"]
+
+@profiling.timed
+def get_company_data(company):
+    """Load only one company's rows.
+
+    sqlite reads them through the 업체명 index; the file backend slices the
+    shared cache with a per-version company index. Both stay consistent with
+    every write because they follow the data version.
+    """
+    try:
+        store = _synced_store()
+        if isinstance(store, storage.SQLiteStorage):
+            df, _ = store.query({"companies": [company]})
+            return _normalise(df)
+        df = _ledger()
+        if df.empty or "업체명" not in df.columns:
+            return pd.DataFrame() # Return empty if column missing
+        rows = _company_rows(df).get(company, [])
+        return df.take(rows)
+    except Exception as e:
+        print(f"Error loading company data: {e}")
+        return pd.DataFrame()
+
+def _due_index(df):
+    """납기 조회용 날짜순 인덱스 (데이터 버전마다 한 번만 생성)."""
+    version = df.attrs.get("data_version")
+    with _cache_lock:
+        if _cache["due_index"] is None or _cache["due_version"] != version:
+            _cache["due_index"] = storage.DueIndex(df)
+            _cache["due_version"] = version
+        return _cache["due_index"]
+
+@profiling.timed
+def get_due_requests(kind, start=None, end=None, company=None, limit=None):
+    """(first limit requests in a 납기 date range, in date order; total matches).
+
+    kind "open": not shipped yet, start <= 납기일 < end (overdue: end=today;
+    due within N days: start=today, end=today + N + 1 day).
+    kind "late": shipped after 납기일, start <= 출하일 < end.
+    None leaves that side of the range open. sqlite reads the partial
+    indexes on 납기일/출하일; the file backend searches a sorted index built
+    once per data version, so neither scans the ledger.
+    """
+    try:
+        store = _synced_store()
+        if isinstance(store, storage.SQLiteStorage):
+            rows, total = store.due(kind, start, end, company, limit)
+            return _normalise(rows), total
+        df = _ledger()
+        if df.empty:
+            return df.copy(), 0
+        rows = df.take(_due_index(df).positions(kind, start, end))
+        if company is not None:
+            rows = rows[rows["업체명"] == company]
+        return (rows if limit is None else rows.head(limit)), len(rows)
+    except Exception as e:
+        print(f"Error reading due requests: {e}")
+        return pd.DataFrame(), 0
+
+@profiling.timed
+def get_dashboard_summary():
+    """Dashboard aggregates, recomputed only when the data version changes.
+
+    Returns total/pending/completed/company_count plus status_counts,
+    company_counts and project_counts (Series, most frequent first).
+    """
+    try:
+        store = _synced_store()
+        version = store.version()
+        with _cache_lock:
+            if _cache["summary"] is not None and _cache["summary_version"] == version:
+                return _cache["summary"]
+        if isinstance(store, storage.SQLiteStorage):
+            summary = store.summary()
+        else:
+            # 집계에 필요한 컬럼만 스냅샷에서 읽기
+            summary = storage.summarize_frame(store.load(columns=storage.SUMMARY_COLUMNS))
+        with _cache_lock:
+            _cache["summary"] = summary
+            _cache["summary_version"] = version
+        return summary
+    except Exception as e:
+        print(f"Error computing summary: {e}")
+        return storage.summary_from_counts({}, {}, {})
+
+@profiling.timed
 def get_filtered_data(user_role, user_company):
     """Get data filtered by role and company."""
-    df = load_data()
-    
-    if df.empty:
-        return df
-
     if user_role == "admin":
-        return df
+        return load_data()
     else:
-        # Filter where Company matches user's company
-        if "업체명" in df.columns:
-            return df[df["업체명"] == user_company]
-        return pd.DataFrame() # Return empty if column missing
+        # 고객사는 자기 업체 행만 읽음 (다른 업체 데이터는 세션에 올리지 않음)
+        return get_company_data(user_company)
@@ -0,0 +1,279 @@
+# 납기 알림 요약: 별도 스레드가 하루 한 번(DIGEST_HOUR 이후) 업체별/관리자용 요약
+# (납기 지남, N일 내 납기, 지연 출하)을 만들어 outbox/<날짜>/에 메일 파일(.eml)로 남김.
+# 발송은 이 폴더를 가져가는 메일 프로그램(로컬 SMTP 대용)이 담당
+#
+#   python digest.py                   # 오늘 요약을 지금 생성 (이미 있으면 다시 생성)
+#   python digest.py --date 2024-12-01 # 지정한 날짜 기준으로 생성
+#   python digest.py --list            # 보관함 목록
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formatdate
+
+import pandas as pd
+
+from storage import FileLock, atomic_write_text
+
+OUTBOX_DIR = os.environ.get("DIGEST_OUTBOX", "outbox")
+
+# DIGEST=0이면 앱에서 알림 스레드를 시작하지 않음 (CLI는 그대로 사용 가능)
+DIGEST_ENABLED = os.environ.get("DIGEST", "1") != "0"
+# 이 시각(시) 이후 그날 요약이 없으면 생성
+DIGEST_HOUR = int(os.environ.get("DIGEST_HOUR", 8))
+# 납기 임박: 오늘부터 이 일수 안에 납기인 출하 전 요청
+DUE_SOON_DAYS = int(os.environ.get("DIGEST_DUE_SOON_DAYS", 3))
+# 메일 한 통의 항목별 최대 줄 수 (넘으면 "외 N건"으로 줄임)
+DIGEST_MAX_ROWS = int(os.environ.get("DIGEST_MAX_ROWS", 200))
+# 보관할 날짜 폴더 수 (오래된 것부터 삭제)
+DIGEST_KEEP_DAYS = int(os.environ.get("DIGEST_KEEP_DAYS", 30))
+# 계정에는 이메일이 없으므로 "계정명@DIGEST_DOMAIN"으로 주소를 만듦
+DIGEST_DOMAIN = os.environ.get("DIGEST_DOMAIN", "localhost")
+DIGEST_SENDER = os.environ.get("DIGEST_SENDER", f"sample-ledger@{DIGEST_DOMAIN}")
+# 백그라운드 스레드가 생성 시각을 확인하는 간격
+POLL_SECONDS = 60
+
+ADMIN_NAME = "admin"
+
+
+def _date(value):
+    return "" if pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _records(df):
+    return df.to_dict("records") if len(df) else []
+
+
+def _text(value):
+    return "" if pd.isna(value) else str(value)
+
+
+def _file_name(name):
+    # 업체명을 파일 이름으로 쓸 수 있게 (경로/예약 문자는 _로)
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("._") or "_"
+
+
+def _recipients():
+    """{업체명: [계정], ADMIN_NAME: [관리자 계정]} from the user accounts."""
+    import auth
+
+    recipients = {}
+    for username, user in auth.load_users().items():
+        key = ADMIN_NAME if user.get("role") == "admin" else user.get("company")
+        if key:
+            recipients.setdefault(key, []).append(username)
+    return recipients
+
+
+def _lines(title, rows, describe):
+    lines = [f"■ {title} ({len(rows)}건)"]
+    for row in rows[:DIGEST_MAX_ROWS]:
+        part = f" ({_text(row.get('품번'))})" if _text(row.get("품번")) else ""
+        lines.append(
+            f"  - {_text(row.get('관리번호'))} | {_text(row.get('업체명'))} | "
+            f"{_text(row.get('품명'))}{part} | {describe(row)}"
+        )
+    if len(rows) > DIGEST_MAX_ROWS:
+        lines.append(f"  - 외 {len(rows) - DIGEST_MAX_ROWS}건")
+    if not rows:
+        lines.append("  - 없음")
+    return lines
+
+
+class DigestScheduler:
+    """Write the daily due-date digests to the outbox on a background thread.
+
+    fetch(kind, start, end) returns (due rows, total) as data_manager.get_due_requests does,
+    so the digest reads the 납기 indexes instead of the whole ledger. One
+    message goes to each company with something to report and one to the
+    admins. outbox/manifest.json records the runs.
+    """
+
+    def __init__(self, fetch, directory=OUTBOX_DIR, recipients=_recipients):
+        self.fetch = fetch
+        self.directory = directory
+        self.recipients = recipients
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        # 여러 프로세스가 같은 보관함을 쓰는 경우를 위한 잠금
+        self.lock = FileLock(os.path.join(directory, ".lock"))
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = None
+
+    def entries(self):
+        """Digest runs oldest first: {"date", "created", "files", "overdue", "due_soon", "late"}."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def due(self, now=None):
+        """Whether today's digest is still to be written (after DIGEST_HOUR)."""
+        now = now or datetime.now()
+        if now.hour < DIGEST_HOUR:
+            return False
+        today = now.strftime("%Y-%m-%d")
+        return not any(e["date"] == today for e in self.entries())
+
+    def build(self, today):
+        """({name: EmailMessage}, counts) for the digests of the given day."""
+        today = pd.Timestamp(today).normalize()
+        previous = [e["date"] for e in self.entries() if e["date"] < today.strftime("%Y-%m-%d")]
+        # 지연 출하: 지난 요약 이후(없으면 어제)부터 어제까지 출하된 것
+        since = pd.Timestamp(previous[-1]) if previous else today - pd.Timedelta(days=1)
+
+        open_rows, _ = self.fetch("open", None, today + pd.Timedelta(days=DUE_SOON_DAYS + 1))
+        late_rows, _ = self.fetch("late", since, today)
+        overdue = _records(open_rows[open_rows["납기일"] < today]) if len(open_rows) else []
+        due_soon = _records(open_rows[open_rows["납기일"] >= today]) if len(open_rows) else []
+        late = _records(late_rows)
+
+        def days_over(row):
+            return f"납기 {_date(row['납기일'])} ({(today - row['납기일']).days}일 지남)"
+
+        def days_left(row):
+            left = (row["납기일"] - today).days
+            return f"납기 {_date(row['납기일'])} ({'오늘' if left == 0 else f'D-{left}'})"
+
+        def shipped_late(row):
+            return f"납기 {_date(row['납기일'])}, 출하 {_date(row['출하일'])} ({(row['출하일'] - row['납기일']).days}일 지연)"
+
+        def body(name, rows_overdue, rows_soon, rows_late):
+            lines = [f"{name} 납기 알림 ({today:%Y-%m-%d})", ""]
+            lines += _lines("납기 지남 (출하 전)", rows_overdue, days_over) + [""]
+            lines += _lines(f"{DUE_SOON_DAYS}일 내 납기", rows_soon, days_left) + [""]
+            lines += _lines(f"지연 출하 ({since:%Y-%m-%d} 이후)", rows_late, shipped_late)
+            return "\n".join(lines) + "\n"
+
+        def subject(name, n_overdue, n_soon, n_late):
+            return (
+                f"[샘플 관리] {today:%Y-%m-%d} 납기 알림 - {name} "
+                f"(지남 {n_overdue}건, {DUE_SOON_DAYS}일 내 {n_soon}건, 지연 출하 {n_late}건)"
+            )
+
+        recipients = self.recipients()
+        messages = {}
+        companies = dict.fromkeys(_text(r.get("업체명")) for r in overdue + due_soon + late)
+        for company in companies:
+            if not company:
+                continue
+            part = [[r for r in rows if _text(r.get("업체명")) == company] for rows in (overdue, due_soon, late)]
+            messages[company] = self._message(
+                recipients.get(company, []), subject(company, *map(len, part)), body(company, *part)
+            )
+
+        # 관리자용: 전체 목록 + 업체별 건수
+        lines = body("전체", overdue, due_soon, late).splitlines()
+        counts = pd.Series([_text(r.get("업체명")) for r in overdue], dtype=object).value_counts()
+        if len(counts):
+            lines += ["", "■ 업체별 납기 지남"] + [f"  - {name or '(업체 없음)'}: {n}건" for name, n in counts.items()]
+        messages[ADMIN_NAME] = self._message(
+            recipients.get(ADMIN_NAME, []),
+            subject("관리자", len(overdue), len(due_soon), len(late)),
+            "\n".join(lines) + "\n",
+        )
+        stats = {"overdue": len(overdue), "due_soon": len(due_soon), "late": len(late)}
+        return messages, stats
+
+    def _message(self, usernames, subject, body):
+        message = EmailMessage()
+        message["From"] = DIGEST_SENDER
+        message["To"] = ", ".join(f"{name}@{DIGEST_DOMAIN}" for name in usernames) or DIGEST_SENDER
+        message["Subject"] = subject
+        message["Date"] = formatdate(localtime=True)
+        # 보관함 파일을 그대로 읽을 수 있게 본문은 8bit(UTF-8)로
+        message.set_content(body, cte="8bit")
+        return message
+
+    def run(self, today=None):
+        """Write the digests of a day (default today) to the outbox; returns the manifest entry."""
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        day = today.strftime("%Y-%m-%d")
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            messages, stats = self.build(today)
+            folder = os.path.join(self.directory, day)
+            # 같은 날 다시 만들면 이전 파일은 교체
+            shutil.rmtree(folder, ignore_errors=True)
+            os.makedirs(folder)
+            files = []
+            for name, message in messages.items():
+                file_name = f"{_file_name(name)}.eml"
+                atomic_write_text(os.path.join(folder, file_name), message.as_bytes().decode("utf-8"))
+                files.append(file_name)
+            entry = {"date": day, "created": time.time(), "files": files, **stats}
+            entries = [e for e in self.entries() if e["date"] != day] + [entry]
+            entries.sort(key=lambda e: e["date"])
+            atomic_write_text(self.manifest_path, json.dumps(self._rotate(entries), ensure_ascii=False, indent=1))
+        return entry
+
+    def _rotate(self, entries):
+        """Keep the newest DIGEST_KEEP_DAYS day folders."""
+        keep = entries[-DIGEST_KEEP_DAYS:] if DIGEST_KEEP_DAYS > 0 else []
+        for e in entries[:len(entries) - len(keep)]:
+            shutil.rmtree(os.path.join(self.directory, e["date"]), ignore_errors=True)
+        return keep
+
+    def _run(self):
+        while not self._stop.wait(POLL_SECONDS):
+            try:
+                # 다른 프로세스가 먼저 만들었을 수 있으므로 잠금 안에서 다시 확인
+                if self.due():
+                    os.makedirs(self.directory, exist_ok=True)
+                    with self.lock:
+                        if self.due():
+                            self.run()
+            except Exception as e:
+                print(f"Error writing due digest: {e}")
+
+    def start(self):
+        """Start the background digest thread (once per process)."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="due-digest", daemon=True)
+        self._pid = os.getpid()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    import argparse
+
+    import data_manager
+
+    parser = argparse.ArgumentParser(description="샘플 관리 대장 납기 알림 요약")
+    parser.add_argument("--list", action="store_true", help="보관함 목록 표시")
+    parser.add_argument("--date", help="기준 날짜 (YYYY-MM-DD, 기본: 오늘)")
+    parser.add_argument("--backend", choices=["sqlite", "file"], help="저장소 백엔드 (기본: STORAGE_BACKEND)")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        data_manager.STORAGE_BACKEND = args.backend
+    scheduler = DigestScheduler(data_manager.get_due_requests)
+    try:
+        if not args.list:
+            entry = scheduler.run(args.date)
+            print(
+                f"요약 생성: {entry['date']} (지남 {entry['overdue']}건, {DUE_SOON_DAYS}일 내 {entry['due_soon']}건, "
+                f"지연 출하 {entry['late']}건) → {os.path.join(scheduler.directory, entry['date'])}"
+            )
+        else:
+            for e in scheduler.entries():
+                created = datetime.fromtimestamp(e["created"]).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{e['date']}  {created}  지남 {e['overdue']}  임박 {e['due_soon']}  지연 출하 {e['late']}  {len(e['files'])}통")
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
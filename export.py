@@ -0,0 +1,66 @@
+import csv
+import io
+
+import xlsxwriter
+
+from storage import arrow_schema, arrow_table, clean_column
+
+# 내보내기 형식: 확장자 → MIME 타입
+FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# 한 번에 변환/기록하는 행 수 (메모리 사용량 상한)
+CHUNK_ROWS = 5000
+
+
+def _chunk_columns(chunk, columns):
+    """Python 값으로 변환한 컬럼 목록 (NaN/None → None, 날짜 → 문자열)."""
+    return [clean_column(chunk[c]) if c in chunk.columns else [None] * len(chunk) for c in columns]
+
+
+def _chunk_rows(chunk, columns):
+    return zip(*_chunk_columns(chunk, columns))
+
+
+def write_xlsx(target, columns, chunks):
+    """Stream chunks into an xlsx with xlsxwriter's constant_memory mode."""
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True, "in_memory": isinstance(target, io.BytesIO)})
+    try:
+        worksheet = workbook.add_worksheet("Sheet1")
+        header = workbook.add_format({"bold": True})
+        worksheet.write_row(0, 0, columns, header)
+        row_num = 1
+        for chunk in chunks:
+            for row in _chunk_rows(chunk, columns):
+                worksheet.write_row(row_num, 0, row)
+                row_num += 1
+    finally:
+        workbook.close()
+
+
+def write_csv(target, columns, chunks):
+    """Stream chunks into a UTF-8 CSV (BOM included so Excel reads 한글 correctly)."""
+    with open(target, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(_chunk_rows(chunk, columns))
+
+
+def write_parquet(target, columns, chunks):
+    """Stream chunks into a Parquet file (one row group per chunk, snapshot schema)."""
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(target, arrow_schema(columns)) as writer:
+        for chunk in chunks:
+            writer.write_table(arrow_table(chunk, columns))
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
@@ -0,0 +1,103 @@
+import openpyxl
+import pandas as pd
+
+import status
+from storage import DATE_COLUMNS
+
+# 한 번에 읽고 검증/저장하는 행 수
+BATCH_ROWS = 2000
+
+# 구버전 대장에만 있고 현재 스키마에서 쓰지 않는 컬럼 (조용히 제외)
+LEGACY_COLUMNS = ["이메일", "연락처", "진행상태"]
+
+
+def read_batches(fileobj, batch_rows=BATCH_ROWS):
+    """Yield (first sheet row number, total data rows or None, DataFrame) per batch.
+
+    Uses openpyxl read-only mode, so only one batch of cells is in memory.
+    The first row of the first sheet is the header.
+    """
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row - 1 if sheet.max_row else None
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h).strip() if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        width = len(header)
+
+        batch, first_row = [], 2
+        for row in rows:
+            # 행마다 셀 개수가 다를 수 있으므로 헤더 길이에 맞춤
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= batch_rows:
+                yield first_row, total, pd.DataFrame(batch, columns=header)
+                first_row += len(batch)
+                batch = []
+        if batch:
+            yield first_row, total, pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def map_columns(df, columns, mapping):
+    """Rename legacy headers and drop unknown columns; returns (df, ignored column names)."""
+    # 구버전 대장: 비고는 요청사항으로 이동 (비고는 관리자 전용 컬럼)
+    if "비고" in df.columns and "요청사항" not in df.columns:
+        df = df.rename(columns={"비고": "요청사항"})
+    df = df.rename(columns=mapping)
+    ignored = [c for c in df.columns if c not in columns and c not in LEGACY_COLUMNS]
+    df = df[[c for c in columns if c in df.columns]]
+    # 같은 이름의 컬럼이 여러 개면 첫 번째만 사용
+    return df.loc[:, ~df.columns.duplicated()], ignored
+
+
+def validate_batch(df, first_row):
+    """Coerce dates/quantities column-wise and split off invalid rows.
+
+    Returns (valid rows, errors) where errors is a list of
+    {"행", "관리번호", "컬럼", "값", "오류"} dicts (행 = sheet row number).
+    """
+    df = df.copy()
+    df.index = pd.RangeIndex(first_row, first_row + len(df))
+
+    # 완전히 빈 행은 건너뛰기
+    filled = pd.DataFrame({c: status.has_value(df, c) for c in df.columns})
+    df = df[filled.any(axis=1)] if len(df.columns) else df.iloc[0:0]
+    raw = df.copy()
+
+    problems = []
+    for col in DATE_COLUMNS:
+        if col not in df.columns:
+            continue
+        present = status.has_value(df, col) & df[col].astype(str).str.strip().ne("")
+        parsed = status.parse_dates(df[col].where(present))
+        bad = present & parsed.isna()
+        problems.append((col, bad, "날짜 형식 오류"))
+        df[col] = parsed.dt.normalize().where(~bad & present)
+
+    if "요청수량" in df.columns:
+        present = status.has_value(df, "요청수량") & df["요청수량"].astype(str).str.strip().ne("")
+        numbers = pd.to_numeric(df["요청수량"].where(present), errors="coerce")
+        bad = present & (numbers.isna() | (numbers < 0) | (numbers % 1 != 0))
+        problems.append(("요청수량", bad, "수량은 0 이상의 정수여야 합니다"))
+        df["요청수량"] = numbers.where(~bad).astype("Int64")
+
+    errors = []
+    invalid = pd.Series(False, index=df.index)
+    for col, bad, message in problems:
+        if not bad.any():
+            continue
+        invalid |= bad
+        for row_num in bad[bad].index:
+            request_id = raw.at[row_num, "관리번호"] if "관리번호" in raw.columns else None
+            errors.append({
+                "행": int(row_num),
+                "관리번호": None if pd.isna(request_id) else str(request_id),
+                "컬럼": col,
+                "값": str(raw.at[row_num, col]),
+                "오류": message,
+            })
+    return df[~invalid], errors
@@ -0,0 +1,171 @@
+# 버전별 스키마 마이그레이션: 저장된 데이터의 스키마 버전은 데이터와 함께 기록되며
+# (SQLite user_version / 파일 백엔드 meta), 앱 시작 시 한 번 또는 아래 CLI로 실행
+#
+#   python migrations.py            # 대기 중인 마이그레이션 실행
+#   python migrations.py --status   # 현재/목표 스키마 버전만 표시
+from storage import COLUMNS, StaleDataError, coerce_frame
+
+# 최초 영문 대장의 컬럼명 → 구 한글 컬럼명 (구 migrate_db.py / fix_db_final.py)
+ENGLISH_MAPPING = {
+    "ID": "관리번호",
+    "Request Date": "요청일",
+    "Requester": "요청자",
+    "Company": "업체명",
+    "Project/Model": "차종/프로젝트",
+    "Part Name": "품명",
+    "Spec": "규격",
+    "Quantity": "수량",
+    "Target Date": "납기요청일",
+    "Status": "진행상태",
+    "Remarks": "비고",
+    "Attachment": "첨부",
+}
+
+# 구 한글 컬럼명 → 현재 컬럼명
+COLUMN_MAPPING = {
+    "요청일": "접수일",
+    "요청자": "담당자",
+    "요청부서": "부서",
+    "차종/프로젝트": "차종",
+    "규격": "품번",
+    "수량": "요청수량",
+    "납기요청일": "납기일",
+    "첨부": "첨부파일",
+}
+
+# 현재 스키마에서 더 이상 쓰지 않는 구 컬럼
+DROPPED_COLUMNS = ["이메일", "연락처", "진행상태"]
+
+
+def _korean_headers(df):
+    # 한글/영문 컬럼이 함께 있으면 한글 값을 우선하고 빈 칸만 영문 값으로 채움
+    for en, kr in ENGLISH_MAPPING.items():
+        if en not in df.columns:
+            continue
+        df[kr] = df[kr].combine_first(df[en]) if kr in df.columns else df[en]
+        df = df.drop(columns=[en])
+    return df
+
+
+def _current_names(df):
+    # 구 비고는 요청사항으로 이동 (비고는 관리자 전용 컬럼으로 새로 추가됨)
+    if "비고" in df.columns and "요청사항" not in df.columns:
+        df = df.rename(columns={"비고": "요청사항"})
+    df = df.rename(columns=COLUMN_MAPPING)
+    return df.drop(columns=[c for c in DROPPED_COLUMNS if c in df.columns])
+
+
+def _standard_columns(df):
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    return df[COLUMNS]
+
+
+# (버전, 설명, 함수): 함수는 이전 버전의 DataFrame을 받아 해당 버전으로 변환
+MIGRATIONS = [
+    (1, "영문 컬럼명을 한글로 변경", _korean_headers),
+    (2, "구 컬럼명 변경 및 이메일/연락처/진행상태 제거", _current_names),
+    (3, "누락 컬럼 추가 및 표준 순서로 정렬", _standard_columns),
+    (4, "날짜 컬럼은 날짜 타입, 요청수량은 정수로 변환", coerce_frame),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def detect_version(columns):
+    """Guess the schema version of data that has no version recorded yet."""
+    columns = list(columns)
+    if any(c in columns for c in ENGLISH_MAPPING):
+        return 0
+    if any(c in columns for c in list(COLUMN_MAPPING) + DROPPED_COLUMNS):
+        return 1
+    if columns != COLUMNS:
+        return 2
+    # 값의 타입은 컬럼 구성으로 알 수 없으므로 타입 변환(4)부터 다시 실행 (여러 번 실행해도 결과 같음)
+    return 3
+
+
+def pending(version):
+    """Migration steps still to run for data at the given schema version."""
+    return [step for step in MIGRATIONS if step[0] > version]
+
+
+def upgrade_frame(df, version=None):
+    """Run the pending steps on a frame (version detected from its columns if None)."""
+    if version is None:
+        version = detect_version(df.columns)
+    for _, _, fn in pending(version):
+        df = fn(df)
+    return df
+
+
+def migrate_store(store, retries=3):
+    """Bring a store up to SCHEMA_VERSION; returns the steps that were applied.
+
+    Data is rewritten once, and only if a step is pending. Stores created
+    by this version (init_db, import_excel, the file backend's first xlsx
+    import) are stamped with SCHEMA_VERSION when created, so this returns
+    without reading them.
+    """
+    if not store.exists() or store.schema_version() >= SCHEMA_VERSION:
+        return []
+    for attempt in range(retries):
+        base_version = store.data_version()
+        df = store.load_raw()
+        version = store.schema_version() or detect_version(df.columns)
+        steps = pending(version)
+        if steps:
+            try:
+                store.save(upgrade_frame(df, version), base_version=base_version)
+            except StaleDataError:
+                # 읽는 동안 다른 쓰기가 있었으면 다시 읽어서 변환
+                if attempt == retries - 1:
+                    raise
+                continue
+        store.set_schema_version(SCHEMA_VERSION)
+        return steps
+    return []
+
+
+def main(argv=None):
+    import argparse
+
+    import data_manager
+
+    parser = argparse.ArgumentParser(description="샘플 관리 대장 스키마 마이그레이션")
+    parser.add_argument("--status", action="store_true", help="현재/목표 스키마 버전만 표시")
+    parser.add_argument("--backend", choices=["sqlite", "file"], help="저장소 백엔드 (기본: STORAGE_BACKEND)")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        data_manager.STORAGE_BACKEND = args.backend
+    store = data_manager.get_storage()
+    if not store.exists():
+        print("저장소가 아직 없습니다. 앱을 처음 실행할 때 현재 스키마로 생성됩니다.")
+        return 0
+
+    current = store.schema_version()
+    print(f"저장소: {store.name}, 스키마 버전: {current} (목표 {SCHEMA_VERSION})")
+    if args.status:
+        if current == 0:
+            current = detect_version(store.load_raw().columns)
+            print(f"버전 기록 없음 - 컬럼 구성으로 판단한 버전: {current}")
+        for version, description, _ in pending(current):
+            print(f"  대기: {version}. {description}")
+        return 0
+
+    try:
+        steps = migrate_store(store)
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        return 1
+    for version, description, _ in steps:
+        print(f"  적용: {version}. {description}")
+    print(f"완료. 스키마 버전: {store.schema_version()}")
+    data_manager.invalidate_cache()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+# 화면 실행(rerun)별 구간 측정: data_manager/auth 함수는 @timed, 화면 블록은 section()으로
+# 시간과 메모리(RSS) 변화를 기록하고, 실행이 끝나면 logs/trace.jsonl에 한 줄씩 남김
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+TRACE_DIR = "logs"
+TRACE_FILE = os.path.join(TRACE_DIR, "trace.jsonl")
+# 로그 파일 회전: 5MB씩 최대 5개 보관
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 5
+
+# PROFILING=0이면 측정하지 않음 (함수는 그대로 호출)
+ENABLED = os.environ.get("PROFILING", "1") != "0"
+
+# Streamlit은 세션마다 별도 스레드에서 스크립트를 실행하므로 실행 기록은 스레드별로 보관
+_local = threading.local()
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def _rss_mb():
+    """Resident memory of this process in MB (None where it can't be read cheaply)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # 리눅스 외 유닉스: 최대 RSS (macOS는 바이트, 그 외 KB)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def start_run(label):
+    """Start recording a new rerun on this thread (an unfinished one is discarded)."""
+    if not ENABLED:
+        return
+    _local.run = {
+        "label": label,
+        "started": time.perf_counter(),
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "spans": [],
+        "stack": [],
+        "section": None,
+    }
+
+
+def _open(run, name):
+    record = {"name": name, "depth": len(run["stack"]), "start_ms": (time.perf_counter() - run["started"]) * 1000}
+    record["_t0"] = time.perf_counter()
+    record["_m0"] = _rss_mb()
+    run["spans"].append(record)
+    run["stack"].append(record)
+    return record
+
+
+def _close(run, record, error=None):
+    record["ms"] = round((time.perf_counter() - record.pop("_t0")) * 1000, 2)
+    m0, m1 = record.pop("_m0"), _rss_mb()
+    record["mem_mb"] = round(m1 - m0, 2) if m0 is not None and m1 is not None else None
+    record["start_ms"] = round(record["start_ms"], 2)
+    if error is not None:
+        record["error"] = type(error).__name__
+    # 안쪽에서 닫히지 않은 구간이 있으면 함께 정리
+    while run["stack"]:
+        if run["stack"].pop() is record:
+            break
+
+
+@contextmanager
+def span(name):
+    """Time a block as part of the current rerun; does nothing outside a run."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+    record = _open(run, name)
+    try:
+        yield
+    except BaseException as e:
+        _close(run, record, e)
+        raise
+    _close(run, record)
+
+
+def timed(fn):
+    """Decorator: record each call of fn as a span named module.function."""
+    name = f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, "run", None) is None:
+            return fn(*args, **kwargs)
+        with span(name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def section(name):
+    """Close the previous render section and open a new one (top-level page blocks)."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    if run["section"] is not None and "_t0" in run["section"]:
+        _close(run, run["section"])
+    run["section"] = _open(run, name)
+
+
+def end_run(**extra):
+    """Finish the rerun, append it to the trace log and return it (None if not recording)."""
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    while run["stack"]:
+        _close(run, run["stack"][-1])
+    trace = {
+        "ts": run["ts"],
+        "label": run["label"],
+        "total_ms": round((time.perf_counter() - run["started"]) * 1000, 2),
+        **extra,
+        "spans": run["spans"],
+    }
+    try:
+        _trace_logger().info(json.dumps(trace, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f"Error writing trace: {e}")
+    return trace
+
+
+def _trace_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("sample_ledger.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger
@@ -0,0 +1,249 @@
+# 한글 전문 검색 색인: 형태소 분석 없이 SQLite FTS5 trigram 토크나이저로 부분 문자열을 찾음
+# (품명, 품번, 차종, 업체명, 요청사항, 비고, 납품장소). 관리번호는 본문 대신 접두어로 찾음.
+# 색인 테이블은 SQLite 연결에 두며 저장소가 쓰기마다 바뀐 행만 다시 색인함
+# (sqlite: 같은 DB/트랜잭션, file: 별도 SQLite 파일)
+import math
+import re
+import unicodedata
+
+import pandas as pd
+
+ID_COLUMN = "관리번호"
+
+# 검색 대상 컬럼과 bm25 가중치 (품명/품번에서 찾은 결과가 요청사항/비고보다 위로)
+SEARCH_FIELDS = {
+    "품명": 3.0, "품번": 3.0, "차종": 2.0, "업체명": 2.0,
+    "요청사항": 1.0, "비고": 1.0, "납품장소": 1.0,
+}
+
+# 토큰화 방식이나 테이블 구조가 바뀌면 올려서 저장된 색인을 다시 생성
+INDEX_VERSION = 3
+
+# 요청(문서)별 번호, 관리번호, 업체명 / 문서 번호를 rowid로 하는 FTS5 본문
+DOCS_TABLE = "search_docs"
+TEXT_TABLE = "search_text"
+# 이전 버전(2-gram 목록) 색인 테이블: 다시 만들 때 삭제
+_OLD_TABLES = ("search_grams", "search_added", "search_removed")
+
+# 관리번호 접두어 검색의 최소 길이 ("re", "20"처럼 짧으면 거의 모든 관리번호와 일치)
+ID_PREFIX_MIN = 6
+# 관리번호 일치는 본문 점수와 관계없이 맨 앞에 (완전 일치 > 접두어 일치)
+ID_SCORE = 1000.0
+# trigram 색인으로 찾을 수 있는 최소 단어 길이 (더 짧은 단어는 본문에서 직접 확인)
+TRIGRAM = 3
+
+# 검색 단위: 한글/영문/숫자가 이어진 부분 (공백, 하이픈 등은 구분자)
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(value):
+    """Text form used for indexing and matching: NFKC (전각/반각 통일) and lower case."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return unicodedata.normalize("NFKC", str(value)).lower()
+
+
+def tokens(text):
+    return _TOKEN.findall(text)
+
+
+def _company(value):
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else str(value)
+
+
+def _entries(frame):
+    """{관리번호: (업체명, normalised SEARCH_FIELDS values)} of the rows of frame.
+
+    Each distinct value of a column is normalised once.
+    """
+    columns = []
+    for field in SEARCH_FIELDS:
+        if field in frame.columns:
+            codes, uniques = pd.factorize(frame[field])
+            # 코드 -1(빈 값)은 맨 끝의 ""를 가리킴
+            columns.append(pd.Series([normalize(v) for v in uniques] + [""], dtype=object).to_numpy()[codes])
+        else:
+            columns.append([""] * len(frame))
+    ids = frame[ID_COLUMN].astype(str).tolist()
+    companies = [_company(v) for v in frame["업체명"]] if "업체명" in frame.columns else [None] * len(frame)
+    return {request_id: (company, texts) for request_id, company, texts in zip(ids, companies, zip(*columns))}
+
+
+def create(conn):
+    """Create the index tables on conn (no-op if they exist).
+
+    search_docs numbers each request (doc) and keeps its 관리번호, its
+    normalised form (key, for prefix lookups) and 업체명; search_text is an
+    FTS5 table (trigram tokenizer) of the normalised search fields with
+    the doc number as rowid.
+    """
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {DOCS_TABLE} ("
+        "doc INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, key TEXT NOT NULL, company TEXT)"
+    )
+    # 관리번호 접두어 검색: 전체 / 업체 안에서
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{DOCS_TABLE}_key ON {DOCS_TABLE} (key)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{DOCS_TABLE}_company_key ON {DOCS_TABLE} (company, key)")
+    columns = ", ".join(f'"{field}"' for field in SEARCH_FIELDS)
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {TEXT_TABLE} USING fts5({columns}, tokenize='trigram')")
+
+
+def _chunked(conn, sql, values):
+    """Rows of sql run with values bound to its IN (...) in chunks (SQLite 변수 개수 제한)."""
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), 500):
+        part = values[start:start + 500]
+        rows += conn.execute(sql.format(", ".join("?" * len(part))), part).fetchall()
+    return rows
+
+
+# 저장된 문서: 문서 번호, 관리번호, 업체명, 색인한 본문
+_STORED = f"SELECT d.doc, d.id, d.company, t.* FROM {DOCS_TABLE} d JOIN {TEXT_TABLE} t ON t.rowid = d.doc"
+
+
+def _stored(rows):
+    return {row[1]: (row[0], row[2], tuple(row[3:])) for row in rows}
+
+
+def reindex(conn, ids, frame=None):
+    """Replace the entries of ids with their rows in frame (current contents).
+
+    ids without a row in frame (or all of them when frame is None) are
+    dropped; rows whose indexed text and 업체명 are unchanged are skipped.
+    """
+    ids = {str(x) for x in ids}
+    if not ids:
+        return
+    if frame is None:
+        frame = pd.DataFrame({ID_COLUMN: []})
+    frame = frame[frame[ID_COLUMN].astype(str).isin(ids)].drop_duplicates(ID_COLUMN, keep="last")
+    _replace(conn, _stored(_chunked(conn, _STORED + " WHERE d.id IN ({})", ids)), frame)
+
+
+def sync(conn, frame):
+    """Bring the index in line with frame (the whole ledger).
+
+    Only rows whose indexed text or 업체명 changed are re-indexed, and
+    requests no longer in frame are dropped.
+    """
+    _replace(conn, _stored(conn.execute(_STORED)), frame.drop_duplicates(ID_COLUMN, keep="last"))
+
+
+def _replace(conn, old, frame):
+    """Make the stored entries old ({관리번호: (doc, company, texts)}) match the rows of frame.
+
+    Entries in old without a row in frame are dropped; a changed request
+    keeps its doc number.
+    """
+    entries = _entries(frame)
+    changed = {request_id: entry for request_id, entry in entries.items() if old.get(request_id, (None,))[1:] != entry}
+    stale = [old[request_id][0] for request_id in old.keys() - entries.keys()]
+    stale += [old[request_id][0] for request_id in changed if request_id in old]
+    if not changed and not stale:
+        return
+
+    # 기존 요청은 문서 번호 유지, 새 요청은 마지막 번호 다음부터
+    total = conn.execute(f"SELECT MAX(doc) FROM {DOCS_TABLE}").fetchone()[0] or 0
+    new_ids = [request_id for request_id in changed if request_id not in old]
+    docs = {request_id: old[request_id][0] for request_id in changed if request_id in old}
+    docs.update(zip(new_ids, range(total + 1, total + 1 + len(new_ids))))
+
+    conn.executemany(f"DELETE FROM {TEXT_TABLE} WHERE rowid = ?", [(doc,) for doc in stale])
+    conn.executemany(
+        f"DELETE FROM {DOCS_TABLE} WHERE doc = ?",
+        [(old[request_id][0],) for request_id in old.keys() - entries.keys()],
+    )
+    conn.executemany(
+        f"UPDATE {DOCS_TABLE} SET company = ? WHERE doc = ?",
+        [(changed[request_id][0], docs[request_id]) for request_id in changed if request_id in old],
+    )
+    conn.executemany(
+        f"INSERT INTO {DOCS_TABLE} (doc, id, key, company) VALUES (?, ?, ?, ?)",
+        [(docs[request_id], request_id, normalize(request_id), changed[request_id][0]) for request_id in new_ids],
+    )
+    _insert_texts(conn, [(docs[request_id], *texts) for request_id, (_, texts) in changed.items()])
+
+
+def _insert_texts(conn, rows):
+    columns = ", ".join(f'"{field}"' for field in SEARCH_FIELDS)
+    conn.executemany(
+        f"INSERT INTO {TEXT_TABLE} (rowid, {columns}) VALUES (?, {', '.join('?' * len(SEARCH_FIELDS))})", rows
+    )
+
+
+def rebuild(conn, frame):
+    """Drop and rebuild the whole index from frame (관리번호 + SEARCH_FIELDS columns)."""
+    for table in (DOCS_TABLE, TEXT_TABLE, *_OLD_TABLES):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    create(conn)
+    entries = _entries(frame.drop_duplicates(ID_COLUMN, keep="last"))
+    conn.executemany(
+        f"INSERT INTO {DOCS_TABLE} (doc, id, key, company) VALUES (?, ?, ?, ?)",
+        [(doc, request_id, normalize(request_id), company)
+         for doc, (request_id, (company, _)) in enumerate(entries.items(), 1)],
+    )
+    _insert_texts(conn, [(doc, *texts) for doc, (_, texts) in enumerate(entries.values(), 1)])
+
+
+def _id_matches(conn, query, company, limit):
+    """[(관리번호, score)] whose 관리번호 equals query or (long enough) starts with it."""
+    scope, params = ("", []) if company is None else (" AND company = ?", [str(company)])
+    # 완전 일치 먼저, 그다음 접두어가 같은 관리번호를 최근 순으로 (key 인덱스를 역순으로 읽음)
+    results = [(request_id, ID_SCORE) for (request_id,) in conn.execute(
+        f"SELECT id FROM {DOCS_TABLE} WHERE key = ?{scope}", [query] + params
+    )]
+    if len(query) < ID_PREFIX_MIN or (limit is not None and len(results) >= limit):
+        return results
+    limit_sql = "" if limit is None else f"LIMIT {int(limit) - len(results)}"
+    results += [(request_id, ID_SCORE / 2) for (request_id,) in conn.execute(
+        f"SELECT id FROM {DOCS_TABLE} WHERE key > ? AND key < ?{scope} ORDER BY key DESC {limit_sql}",
+        [query, query[:-1] + chr(ord(query[-1]) + 1)] + params,
+    )]
+    return results
+
+
+def search(conn, text, company=None, limit=None):
+    """Ranked [(관리번호, score)] of rows matching text.
+
+    A 관리번호 equal to the text (or starting with it) comes first. Other
+    rows must contain every word of text as a substring of an indexed
+    field. Words of 3 or more characters are looked up in the FTS5 index
+    and ranked by bm25 with the SEARCH_FIELDS weights; shorter words are
+    checked in the stored text (newest first when no word is long enough).
+    company limits results to one 업체명.
+    """
+    query = normalize(text).strip()
+    if not query:
+        return []
+    results = _id_matches(conn, query, company, limit)
+    words = tokens(query)
+    if not words or (limit is not None and len(results) >= limit):
+        return results
+    # 관리번호로 이미 찾은 요청은 본문 검색 결과에서 제외
+    found = {request_id for request_id, _ in results}
+    remaining = None if limit is None else limit - len(results)
+
+    where, params = [], []
+    indexed = [w for w in words if len(w) >= TRIGRAM]
+    if indexed:
+        where.append(f"{TEXT_TABLE} MATCH ?")
+        params.append(" AND ".join(f'"{w}"' for w in indexed))
+    for word in words:
+        if len(word) < TRIGRAM:
+            where.append("(" + " OR ".join(f'instr({TEXT_TABLE}."{field}", ?) > 0' for field in SEARCH_FIELDS) + ")")
+            params += [word] * len(SEARCH_FIELDS)
+    if company is not None:
+        where.append("d.company = ?")
+        params.append(str(company))
+    # bm25는 낮을수록 잘 맞음: 부호를 바꿔 높은 점수가 위로, 같으면 나중에 등록된 요청 먼저
+    weights = ", ".join(str(w) for w in SEARCH_FIELDS.values())
+    score = f"-bm25({TEXT_TABLE}, {weights})" if indexed else "1.0"
+    limit_sql = "" if remaining is None else f"LIMIT {int(remaining) + len(found)}"
+    hits = conn.execute(
+        f"SELECT d.id, {score} AS score FROM {TEXT_TABLE} JOIN {DOCS_TABLE} d ON d.doc = {TEXT_TABLE}.rowid "
+        f"WHERE {' AND '.join(where)} ORDER BY score DESC, d.doc DESC {limit_sql}",
+        params,
+    ).fetchall()
+    hits = [hit for hit in hits if hit[0] not in found]
+    return results + (hits if remaining is None else hits[:remaining])
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# 진행상태 단계 (접수 → 자재준비 → 생산중 → 출하준비 → 출하완료)
+STATUS_ORDER = ["접수", "자재준비", "생산중", "출하준비", "출하완료"]
+PENDING_STATUSES = ["접수", "자재준비", "생산중", "출하준비"]
+COMPLETED_STATUS = "출하완료"
+
+# 진행상태 판정 규칙: 위에서부터 처음으로 값이 있는 컬럼의 상태 (없으면 접수)
+STATUS_RULES = [
+    ("출하완료", ["출하일"]),
+    ("출하준비", ["샘플완료일"]),
+    ("생산중", ["자재입고일"]),
+    ("자재준비", ["자재요청", "도면접수일"]),
+]
+DEFAULT_STATUS = "접수"
+
+# 값이 비어 있는 것으로 보는 문자열 (엑셀/CSV 왕복 과정에서 생기는 표현 포함)
+EMPTY_STRINGS = ["", "nan", "NaT"]
+
+
+def has_value(df, col):
+    """Column-wise mask of cells that hold a real (non-empty) value."""
+    if col not in df.columns:
+        return pd.Series(False, index=df.index)
+    s = df[col]
+    mask = s.notna()
+    if s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+        mask &= ~s.isin(EMPTY_STRINGS)
+    return mask
+
+
+def parse_dates(s):
+    """Parse a column of mixed date strings/Timestamps in one vectorized pass."""
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    parsed = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    # ISO 형식이 아닌 값만 다시 파싱 (예: 2024/12/25, 12/25/2024) - 빈 값 검사는 실패한 칸에만
+    retry = parsed.isna().to_numpy()
+    if retry.any():
+        retry[retry] = (s[retry].notna() & ~s[retry].isin(EMPTY_STRINGS)).to_numpy()
+        if retry.any():
+            parsed[retry] = pd.to_datetime(s[retry].astype(str), errors="coerce", format="mixed")
+    return parsed
+
+
+def progress_status(df):
+    """
+    날짜/진행 정보를 기반으로 진행상태 계산 (행 전체를 한 번에 처리)
+    - 출하일 있으면: 출하완료
+    - 샘플완료일 있으면: 출하준비
+    - 자재입고일 있으면: 생산중
+    - 자재요청 또는 도면접수일 있으면: 자재준비
+    - 그 외: 접수
+    """
+    conditions = [
+        np.logical_or.reduce([has_value(df, col) for col in cols]) for _, cols in STATUS_RULES
+    ]
+    choices = [label for label, _ in STATUS_RULES]
+    return pd.Series(np.select(conditions, choices, default=DEFAULT_STATUS), index=df.index, dtype=object)
+
+
+def overdue_mask(df, today=None):
+    """Rows whose 납기일 has passed and which have not shipped yet (출하일 empty)."""
+    if "납기일" not in df.columns:
+        return pd.Series(False, index=df.index)
+    if today is None:
+        today = pd.Timestamp.now().normalize()
+    due = parse_dates(df["납기일"])
+    return (due.dt.normalize() < today) & ~has_value(df, "출하일")
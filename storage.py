@@ -0,0 +1,1771 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import search
+import status
+
+# 샘플 관리 대장의 표준 컬럼 (순서 포함)
+COLUMNS = [
+    "관리번호", "접수일", "담당자", "부서", "업체명", "차종", "품명", "품번",
+    "납품장소", "요청수량", "납기일", "요청사항", "도면접수일", "자재요청",
+    "완료예정일", "자재입고일", "샘플완료일", "출하일", "비고", "첨부파일"
+]
+
+ID_COLUMN = "관리번호"
+
+# 컬럼 타입: 날짜 컬럼은 datetime64 (날짜만), 수량은 정수 (빈 값 허용), 나머지는 텍스트
+# 쓰는 시점에 한 번 변환하므로 읽는 쪽은 다시 파싱하지 않음
+DATE_COLUMNS = ["접수일", "납기일", "도면접수일", "완료예정일", "자재입고일", "샘플완료일", "출하일"]
+INT_COLUMNS = ["요청수량"]
+DATE_DTYPE = "datetime64[ns]"
+INT_DTYPE = "Int64"
+# 값 종류가 적은 텍스트 컬럼은 읽을 때 category 타입으로 (코드 배열만 복사되어 세션별 메모리가 적고
+# 필터/집계가 빠름). 저장 형식은 그대로 텍스트
+CATEGORY_COLUMNS = ["업체명", "부서", "담당자", "차종", "납품장소"]
+
+# 저널이 이 한도를 넘으면 스냅샷(xlsx)으로 합치기
+JOURNAL_MAX_ENTRIES = 500
+JOURNAL_MAX_BYTES = 1024 * 1024
+JOURNAL_MAX_AGE = 60 * 60  # seconds
+# 변경 기록(file 백엔드)이 이 한도를 넘으면 비우고 그 이전 버전부터의 변경은 전체 다시 읽기로
+CHANGES_MAX_ENTRIES = 1000
+# 한 번에 이 행 수 이상을 바꾸는 쓰기(대량 병합)는 검색 색인을 바로 갱신하지 않고 다음 검색 때 따라잡고,
+# SQLite에서는 행별 변경 기록 대신 변경 기록을 비움 (읽는 쪽은 전체 다시 읽기)
+# (5만 행 업로드의 색인 갱신이 병합 자체보다 몇 배 오래 걸림)
+BULK_WRITE_ROWS = 1000
+# SQLite에 NULL로 바인딩할 값 (SQLiteStorage._bound 참고)
+_NULL = float("nan")
+# SQLite 연결별 페이지 캐시 크기 (KiB, 기본 2MB는 5만 행 대장의 병합 중에 넘침)
+SQLITE_CACHE_KB = 64 * 1024
+# 여러 행을 한 INSERT 문으로 넣을 때의 바인딩 변수 한도 (3.32 이전 SQLite의 기본 한도)
+SQLITE_MAX_VARIABLES = 999
+
+# 쓰기 큐(write-behind): 첫 쓰기 후 이 시간 안에 들어온 쓰기를 모아 한 번에 반영
+WRITE_COALESCE_SECONDS = float(os.environ.get("WRITE_COALESCE_MS", 50)) / 1000
+WRITE_BATCH_MAX = 500
+# 종료할 때 남은 쓰기를 반영하며 기다리는 최대 시간
+WRITE_FLUSH_TIMEOUT = 30  # seconds
+
+
+def max_sequence(ids, prefix):
+    """Largest numeric suffix among IDs that start with prefix (0 if none)."""
+    ids = pd.Series(ids, dtype=object).astype(str)
+    suffix = ids[ids.str.startswith(prefix)].str.slice(len(prefix)).str.extract(r"^(\d+)")[0]
+    numbers = pd.to_numeric(suffix, errors="coerce").dropna()
+    return int(numbers.max()) if not numbers.empty else 0
+
+
+class StaleDataError(Exception):
+    """A write was based on a data version that is no longer current."""
+
+
+class FileLock:
+    """Exclusive lock on a lock file, shared by threads and processes.
+
+    Uses fcntl.flock on POSIX and msvcrt.locking on Windows. Re-entrant
+    within a thread so nested storage calls can hold it safely.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fh = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            fh = open(self.path, "a+")
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    fh.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            # LK_LOCK은 10초 동안만 재시도하므로 계속 대기
+                            continue
+                else:
+                    import fcntl
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                fh.close()
+                self._thread_lock.release()
+                raise
+            self._fh = fh
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fh, self._fh = self._fh, None
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            finally:
+                fh.close()
+        self._thread_lock.release()
+        return False
+
+
+def try_lock(path):
+    """Take an exclusive lock on path without waiting; returns the open handle or None."""
+    fh = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        fh.close()
+        return None
+    return fh
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def pending_records(records):
+    """Write records of a pending journal that have no matching "done" marker."""
+    done = set()
+    for r in records:
+        if r.get("op") == "done":
+            done.update(range(r["first"], r["last"] + 1))
+    return [r for r in records if r.get("op") != "done" and r.get("seq") not in done]
+
+
+class WriteQueue:
+    """Run write operations one at a time, in submission order, on a single thread.
+
+    submit() blocks until the write has run. post() is write-behind: the
+    records are appended to a pending journal (fsync'd) and acknowledged
+    at once, and the writer thread applies consecutive posts as one batch.
+    Journals left behind by a process that died are replayed by attach().
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = os.getpid()
+        self._start_lock = threading.Lock()
+        # write-behind 상태 (attach() 이후 사용)
+        self._apply = None
+        self._prefix = None
+        self._journal = None
+        self._journal_lock = None
+        self._seq = 0
+        self._posted = 0
+        self._applied = 0
+        self._failed = 0
+        self._done = threading.Condition()
+        self._atexit = False
+
+    def _run(self):
+        item = None
+        while True:
+            if item is None:
+                item = self._queue.get()
+            if item[0] == "post":
+                batch = [item[1]]
+                item = self._collect(batch)
+                self._apply_batch(batch)
+                continue
+            _, fn, args, kwargs, future = item
+            item = None
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _collect(self, batch):
+        """Add posts that arrive within the coalescing window; returns the next other item."""
+        deadline = time.monotonic() + WRITE_COALESCE_SECONDS
+        while len(batch) < WRITE_BATCH_MAX:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return None
+            if item[0] != "post":
+                # 동기 쓰기는 모은 쓰기를 반영한 다음 순서대로 실행
+                return item
+            batch.append(item[1])
+        return None
+
+    def _apply_batch(self, batch):
+        try:
+            self._apply(batch)
+            ok = True
+        except Exception as e:
+            # 실패한 쓰기는 저널에 남겨 두었다가 다음 시작 때 다시 반영
+            print(f"Error applying {len(batch)} queued writes: {e}")
+            ok = False
+        with self._done:
+            self._applied += len(batch)
+            if not ok:
+                self._failed += len(batch)
+            elif self._applied == self._posted and not self._failed:
+                # 대기 중인 쓰기가 없으면 저널 비우기
+                self._journal.clear()
+            else:
+                self._journal.append({"op": "done", "first": batch[0]["seq"], "last": batch[-1]["seq"]})
+            self._done.notify_all()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid != os.getpid():
+                # fork된 자식 프로세스에는 부모의 쓰기 스레드가 없으므로 새로 시작
+                # (대기 저널도 자식용으로 새로 열고, 부모 저널은 부모가 처리)
+                self._queue = queue.Queue()
+                self._thread = None
+                self._pid = os.getpid()
+                self._posted = self._applied = self._failed = 0
+                if self._apply is not None:
+                    self._open_journal()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and block until the writer thread has run it."""
+        if threading.current_thread() is self._thread:
+            # 쓰기 작업 안에서 다시 쓰기를 요청한 경우 바로 실행
+            return fn(*args, **kwargs)
+        self._start()
+        future = Future()
+        self._queue.put(("call", fn, args, kwargs, future))
+        return future.result()
+
+    def _open_journal(self):
+        path = os.path.abspath(f"{self._prefix}.{os.getpid()}.pending")
+        if self._journal_lock is not None:
+            self._journal_lock.close()
+        # 프로세스가 살아 있는 동안 잠가 두어 다른 프로세스가 재반영하지 않도록 함
+        self._journal_lock = try_lock(f"{path}.lock")
+        self._journal = Journal(path)
+
+    def attach(self, prefix, apply):
+        """Enable post(): records are journaled to <prefix>.<pid>.pending and applied
+        in batches by apply(records) on the writer thread.
+
+        Pending journals of processes that are no longer running (and this
+        process's own, if the pid was reused) are replayed first.
+        """
+        if self._apply is not None:
+            self.flush()
+        self._apply = apply
+        self._prefix = os.path.abspath(prefix)
+        self._seq = 0
+        with self._start_lock:
+            self._open_journal()
+        pattern = f"{glob.escape(self._prefix)}.*.pending"
+        # 저널이 없는 잠금 파일만 남은 경우도 정리
+        paths = set(glob.glob(pattern)) | {p[:-len(".lock")] for p in glob.glob(f"{pattern}.lock")}
+        for path in sorted(paths):
+            self.submit(self._replay, path)
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+
+    def _replay(self, path):
+        own = path == self._journal.path
+        fh = None if own else try_lock(f"{path}.lock")
+        if not own and fh is None:
+            # 다른 프로세스가 아직 쓰고 있는 저널
+            return
+        try:
+            journal = self._journal if own else Journal(path)
+            records = pending_records(journal.read())
+            if records:
+                print(f"Replaying {len(records)} queued writes from {os.path.basename(path)}")
+                self._apply(records)
+            journal.clear()
+        except Exception as e:
+            print(f"Error replaying queued writes from {path}: {e}")
+        finally:
+            if fh is not None:
+                fh.close()
+                if not os.path.exists(path):
+                    _remove_quietly(f"{path}.lock")
+
+    def post(self, records):
+        """Journal write records and queue them; returns once they are durable.
+
+        The records are applied later, in order, by the writer thread (see
+        attach). Returns the sequence number of the last record.
+        """
+        if self._apply is None:
+            raise RuntimeError("write-behind journal is not attached")
+        self._start()
+        with self._done:
+            stamped = []
+            for record in records:
+                self._seq += 1
+                stamped.append({**record, "seq": self._seq, "ts": time.time()})
+            self._journal.extend(stamped)
+            self._posted += len(stamped)
+            for record in stamped:
+                self._queue.put(("post", record))
+        return self._seq
+
+    def pending(self):
+        """Number of posted writes not applied yet."""
+        with self._done:
+            return self._posted - self._applied
+
+    def flush(self, timeout=None):
+        """Wait until every write posted so far is applied; False on timeout."""
+        if threading.current_thread() is self._thread:
+            return True
+        with self._done:
+            target = self._posted
+            return self._done.wait_for(lambda: self._applied >= target, timeout)
+
+    def close(self, timeout=WRITE_FLUSH_TIMEOUT):
+        """Apply queued writes before the process exits (anything left stays journaled)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        if not self.flush(timeout):
+            print(f"{self.pending()} queued writes not applied yet; they will be replayed on next start")
+        elif self._journal is not None and not os.path.exists(self._journal.path):
+            self._journal_lock.close()
+            _remove_quietly(f"{self._journal.path}.lock")
+
+
+def atomic_write_text(path, text):
+    """Write a small text file via temp file + rename so readers never see half of it."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def clean_value(value):
+    """Convert a pandas/numpy cell value into a plain Python value for storage."""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        # 리스트 등 스칼라가 아닌 값은 그대로 둔다
+        return value
+    if isinstance(value, (pd.Timestamp, datetime)):
+        if value.hour == 0 and value.minute == 0 and value.second == 0:
+            return value.strftime("%Y-%m-%d")
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # numpy 스칼라 (int64, float64, bool_) -> 파이썬 기본형
+        return value.item()
+    return value
+
+
+def clean_column(series):
+    """clean_value over a whole column, with a fast path for plain strings/numbers and dates."""
+    if series.dtype.kind == "M":
+        # 날짜 열은 한 번에 YYYY-MM-DD 텍스트로 (자정이 아닌 값만 clean_value로)
+        values = series.to_numpy()
+        days = values.astype("datetime64[D]")
+        text = np.datetime_as_string(days, unit="D").astype(object)
+        text[np.isnat(values)] = None
+        other = ~np.isnat(values) & (days != values)
+        if other.any():
+            text[other] = [clean_value(v) for v in series[other]]
+        return text.tolist()
+    plain = (str, int, float)
+    return [
+        v if type(v) in plain and v == v else clean_value(v)
+        for v in series.tolist()
+    ]
+
+
+def coerce_frame(df):
+    """Coerce date and quantity columns to the typed schema; returns a new frame.
+
+    Dates (strings in any common format, Timestamps, Excel dates) become
+    datetime64 normalised to the day; 요청수량 becomes a nullable integer.
+    Values that can't be converted become NaT / <NA>.
+    """
+    df = df.copy()
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = status.parse_dates(df[col]).dt.normalize().astype(DATE_DTYPE)
+    for col in INT_COLUMNS:
+        if col in df.columns and df[col].dtype != INT_DTYPE:
+            values = df[col]
+            if values.dtype == object:
+                values = values.where(~values.isin(status.EMPTY_STRINGS))
+            df[col] = pd.to_numeric(values, errors="coerce").round().astype(INT_DTYPE)
+    return df
+
+
+def coerce_values(values):
+    """coerce_frame for one {column: value} dict, returned as plain Python values."""
+    if not any(c in values for c in DATE_COLUMNS + INT_COLUMNS):
+        return {c: clean_value(v) for c, v in values.items()}
+    row = coerce_frame(pd.DataFrame([values])).iloc[0]
+    return {c: clean_value(row[c]) for c in values}
+
+
+def typed_frame(df):
+    """Turn canonical stored values (YYYY-MM-DD text, integers) into the typed schema.
+
+    Only for data written through coerce_frame, so dates are always ISO text.
+    CATEGORY_COLUMNS become categoricals with empty cells as NaN.
+    """
+    for col in DATE_COLUMNS:
+        if col in df.columns and df[col].dtype != DATE_DTYPE:
+            values = df[col]
+            # Parquet의 date32는 이미 datetime64[ms] (to_datetime이 값마다 다시 보지 않도록)
+            if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+                values = pd.to_datetime(values, format="ISO8601", errors="coerce")
+            df[col] = values.dt.normalize().astype(DATE_DTYPE)
+    for col in INT_COLUMNS:
+        if col in df.columns and df[col].dtype != INT_DTYPE:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(INT_DTYPE)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            values = df[col]
+            df[col] = values.where(values.notna() & ~values.isin(status.EMPTY_STRINGS)).astype("category")
+    return df
+
+
+def arrow_schema(columns):
+    """Explicit snapshot schema: date32 dates, int64 quantities, everything else text."""
+    import pyarrow as pa
+
+    def arrow_type(col):
+        if col in DATE_COLUMNS:
+            return pa.date32()
+        if col in INT_COLUMNS:
+            return pa.int64()
+        return pa.string()
+
+    return pa.schema([(c, arrow_type(c)) for c in columns])
+
+
+def arrow_table(df, columns):
+    """Convert a frame to an Arrow table with the snapshot schema (typed columns coerced)."""
+    import pyarrow as pa
+
+    schema = arrow_schema(columns)
+    df = coerce_frame(df[[c for c in columns if c in df.columns]])
+    arrays = []
+    for field in schema:
+        c = field.name
+        if c not in df.columns:
+            arrays.append(pa.nulls(len(df), type=field.type))
+        elif c in DATE_COLUMNS:
+            arrays.append(pa.array(df[c], from_pandas=True).cast(pa.date32()))
+        elif c in INT_COLUMNS:
+            arrays.append(pa.array(df[c], type=pa.int64(), from_pandas=True))
+        else:
+            values = df[c].to_numpy(dtype=object)
+            if pd.api.types.infer_dtype(values) in ("string", "empty"):
+                # 문자열만 있는 열은 값마다 변환하지 않음 (NaN/None은 null)
+                arrays.append(pa.array(values, type=pa.string(), from_pandas=True))
+            else:
+                values = clean_column(df[c])
+                arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def read_parquet(path, columns=None, raw=False):
+    """Read a snapshot/backup Parquet file into the typed schema (dates as datetime64).
+
+    raw=True returns the stored values as they are (for migrating old all-text files).
+    """
+    import pyarrow.parquet as pq
+
+    df = pq.read_table(path, columns=columns).to_pandas(date_as_object=False)
+    return df if raw else typed_frame(df)
+
+
+def pq_schema_names(path):
+    """Column names stored in a Parquet file (reads only the footer)."""
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).schema_arrow.names
+
+
+def _search_records(df):
+    """The columns of df the search index reads (관리번호 + search fields)."""
+    return df[[c for c in [ID_COLUMN, *search.SEARCH_FIELDS] if c in df.columns]]
+
+
+def blank_cells(series):
+    """Boolean array marking the NaN/None and blank-text cells of series."""
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)):
+        return series.isna().to_numpy()
+    codes, uniques = pd.factorize(series)
+    # 공백 검사는 서로 다른 값마다 한 번만 (NaN/None은 코드 -1 -> 마지막 True)
+    blank = np.array([str(v).strip() == "" for v in uniques] + [True])
+    return blank[codes]
+
+
+def distinct_values(series, blank_as_na=False):
+    """(codes, uniques) of a column, with each distinct value coerced to the typed schema once.
+
+    codes index uniques (-1 = NaN/None); with blank_as_na, blank text
+    values become NaN in uniques.
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = coerce_frame(pd.DataFrame({series.name: uniques}))[series.name]
+    if blank_as_na and uniques.dtype == object:
+        uniques = uniques.mask(np.array([str(v).strip() == "" for v in uniques], dtype=bool))
+    return codes, uniques
+
+
+def upsert_frame(df, rows):
+    """Update rows of df by 관리번호 with the given rows and append unknown IDs.
+
+    Only the columns present in rows are touched, and NaN/None or blank
+    cells keep the existing value (appended rows leave them empty). Values
+    are coerced to the typed schema so the columns of df keep their dtypes;
+    returns the new frame.
+    """
+    ids = rows[ID_COLUMN].astype(str)
+    # 같은 관리번호가 여러 번 나오면 마지막 행 기준
+    last = np.flatnonzero(~ids.duplicated(keep="last").to_numpy())
+    keyed = pd.Index(ids.to_numpy()[last])
+    current_ids = df[ID_COLUMN].astype(str)
+    # df의 행마다 rows에서의 행 번호 (-1 = 업로드에 없는 행), 추가할 rows의 행 번호
+    found = keyed.get_indexer(current_ids)
+    taken = np.where(found >= 0, last[found], -1)
+    added = last[~keyed.isin(current_ids)]
+
+    df = df.copy(deep=False)
+    new_rows = {ID_COLUMN: ids.to_numpy()[added]}
+    for c in rows.columns:
+        if c == ID_COLUMN:
+            continue
+        # 서로 다른 값마다 한 번만 변환한 뒤 행 위치로 펼침
+        codes, uniques = distinct_values(rows[c], blank_as_na=True)
+        if c in df.columns and (taken >= 0).any():
+            # 열 단위로 결합: 빈 셀(NaN)과 업로드에 없는 행은 기존 값 유지
+            incoming = uniques.array.take(np.where(taken >= 0, codes[taken], -1), allow_fill=True)
+            incoming = pd.Series(incoming, index=df.index)
+            current = df[c].astype(object) if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c]
+            df[c] = incoming.where(incoming.notna(), current)
+        new_rows[c] = uniques.array.take(codes[added], allow_fill=True)
+
+    if len(added):
+        # 모두 빈 컬럼은 빼고 합침 (concat이 빈 컬럼을 값마다 검사하지 않도록, 빠진 칸은 NaN)
+        df = pd.concat([df, pd.DataFrame(new_rows).dropna(axis=1, how="all")], ignore_index=True)
+    return df
+
+
+def _as_text(series):
+    # category 컬럼은 카테고리(텍스트)끼리 비교하므로 행마다 문자열로 바꾸지 않음
+    return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype(str)
+
+
+def query_frame(df, filters=None, sort_by=None, ascending=True, offset=0, limit=None):
+    """Filter, sort and slice a ledger frame; returns (page, total matches).
+
+    filters keys (all optional): companies, projects, statuses (진행상태
+    labels), due_from / due_to (YYYY-MM-DD, inclusive) and ids (관리번호
+    list, e.g. search hits; without sort_by rows keep the order of ids).
+    """
+    filters = filters or {}
+    mask = pd.Series(True, index=df.index)
+    if filters.get("companies"):
+        mask &= _as_text(df["업체명"]).isin(filters["companies"])
+    if filters.get("projects"):
+        mask &= _as_text(df["차종"]).isin(filters["projects"])
+    if filters.get("statuses"):
+        mask &= status.progress_status(df).isin(filters["statuses"])
+    if filters.get("due_from") or filters.get("due_to"):
+        due = status.parse_dates(df["납기일"]).dt.normalize()
+        if filters.get("due_from"):
+            mask &= due >= pd.Timestamp(filters["due_from"])
+        if filters.get("due_to"):
+            mask &= due <= pd.Timestamp(filters["due_to"])
+    ranks = None
+    if filters.get("ids") is not None:
+        order = {str(x): i for i, x in reversed(list(enumerate(filters["ids"])))}
+        ranks = df[ID_COLUMN].astype(str).map(order)
+        mask &= ranks.notna()
+    result = df[mask]
+
+    if sort_by is None and ranks is not None:
+        result = result.iloc[np.argsort(ranks[mask].to_numpy(), kind="stable")]
+    elif sort_by == "진행상태":
+        rank = status.progress_status(result).map({s: i for i, s in enumerate(status.STATUS_ORDER)})
+        result = result.iloc[np.argsort(rank.to_numpy() * (1 if ascending else -1), kind="stable")]
+    elif sort_by in result.columns:
+        # 숫자/문자가 섞인 컬럼도 정렬되도록 문자열 기준으로 비교 (빈 값은 맨 뒤)
+        key = (lambda s: s.where(s.isna(), s.astype(str))) if result[sort_by].dtype == object else None
+        result = result.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last", key=key)
+
+    total = len(result)
+    end = None if limit is None else offset + limit
+    return result.iloc[offset:end], total
+
+
+# 납기 조회 종류: open = 출하 전 요청(납기일 기준), late = 납기일보다 늦게 출하된 요청(출하일 기준)
+DUE_KINDS = ("open", "late")
+
+
+def _day(value):
+    return pd.Timestamp(value).normalize().to_datetime64()
+
+
+class DueIndex:
+    """Row positions of a ledger frame sorted by date, for 납기 range queries.
+
+    "open" holds requests not shipped yet (출하일 empty) keyed by 납기일,
+    "late" holds requests shipped after their 납기일 keyed by 출하일. Rows
+    without the key date are left out. Build once per data version.
+    """
+
+    def __init__(self, df):
+        empty = pd.Series(pd.NaT, index=df.index, dtype=DATE_DTYPE)
+        due = status.parse_dates(df["납기일"]).dt.normalize() if "납기일" in df.columns else empty
+        shipped = status.parse_dates(df["출하일"]).dt.normalize() if "출하일" in df.columns else empty
+        self._sorted = {
+            "open": self._sort(due, shipped.isna() & due.notna()),
+            "late": self._sort(shipped, shipped.notna() & due.notna() & (shipped > due)),
+        }
+
+    @staticmethod
+    def _sort(dates, mask):
+        positions = np.flatnonzero(mask.to_numpy())
+        keys = dates.to_numpy()[positions]
+        order = np.argsort(keys, kind="stable")
+        return keys[order], positions[order]
+
+    def positions(self, kind, start=None, end=None):
+        """Positions of rows with start <= date < end (None = unbounded), in date order."""
+        if kind not in DUE_KINDS:
+            raise ValueError(f"unknown due kind: {kind}")
+        keys, positions = self._sorted[kind]
+        lo = 0 if start is None else np.searchsorted(keys, _day(start), side="left")
+        hi = len(keys) if end is None else np.searchsorted(keys, _day(end), side="left")
+        return positions[lo:hi]
+
+
+def summary_from_counts(status_counts, company_counts, project_counts):
+    """Build the dashboard summary dict from ordered {value: count} pairs."""
+    status_counts = pd.Series(status_counts, dtype="int64", name="count")
+    company_counts = pd.Series(company_counts, dtype="int64", name="count")
+    project_counts = pd.Series(project_counts, dtype="int64", name="count")
+    return {
+        "total": int(status_counts.sum()),
+        "pending": int(status_counts[status_counts.index.isin(status.PENDING_STATUSES)].sum()),
+        "completed": int(status_counts.get(status.COMPLETED_STATUS, 0)),
+        "company_count": len(company_counts),
+        "status_counts": status_counts,
+        "company_counts": company_counts,
+        "project_counts": project_counts,
+    }
+
+
+# 대시보드 집계에 필요한 컬럼 (진행상태 판정 컬럼 + 업체명, 차종)
+SUMMARY_COLUMNS = [c for _, cols in status.STATUS_RULES for c in cols] + ["업체명", "차종"]
+
+
+def _value_counts(series):
+    """value_counts with ties in first-seen order, for categoricals too (unused categories left out)."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+    # 카테고리 순서가 아니라 코드로 세어서 object 컬럼과 같은 순서로
+    codes = pd.Series(series.cat.codes)
+    counts = codes[codes >= 0].value_counts()
+    counts.index = series.cat.categories[counts.index.to_numpy()]
+    return counts
+
+
+def summarize_frame(df):
+    """Dashboard aggregates (status/company/차종 counts) of a ledger frame."""
+    status_counts = status.progress_status(df).value_counts()
+    company_counts = _value_counts(df["업체명"]) if "업체명" in df.columns else {}
+    project_counts = _value_counts(df["차종"]) if "차종" in df.columns else {}
+    return summary_from_counts(status_counts, company_counts, project_counts)
+
+
+class Journal:
+    """Append-only JSON-lines log of write operations, fsync'd on every append."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        self.extend([record])
+
+    def extend(self, records):
+        """Append several records with a single fsync."""
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self):
+        """Return all complete records; a torn last line from a crash is skipped."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    def version(self):
+        if not os.path.exists(self.path):
+            return None
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def first_timestamp(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                return json.loads(f.readline()).get("ts")
+            except json.JSONDecodeError:
+                return None
+
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class FileStorage:
+    """Keep the ledger in a Parquet snapshot plus an append-only request journal.
+
+    New requests are appended to the journal in O(1); reads replay the
+    journal over the snapshot, and compact() folds it back into the snapshot.
+    The xlsx is only read once (first run, to build the snapshot) and is
+    regenerated on demand by write_xlsx() for people to open.
+    Every write holds an inter-process file lock, snapshots are replaced
+    atomically, and a data version is kept in a sidecar meta file.
+    """
+
+    name = "file"
+
+    def __init__(self, path, migrate=None, columns=COLUMNS, schema_version=None):
+        self.path = path
+        self.columns = list(columns)
+        # migrate(df) -> df: 구버전 컬럼 구성을 현재 스키마로 변환 (xlsx 가져올 때만)
+        self.migrate = migrate
+        # migrate 결과의 스키마 버전 (xlsx를 가져올 때 기록, 시작 시 다시 변환하지 않도록)
+        self.migrated_schema = schema_version
+        self.snapshot_path = f"{os.path.splitext(path)[0]}.parquet"
+        self.journal = Journal(f"{path}.journal")
+        # 쓰기별 (데이터 버전, 바뀐 관리번호) 기록 (changes_since용)
+        self.changes = Journal(f"{path}.changes")
+        # (스냅샷 파일 상태, 행 수): 건수 확인 때마다 스냅샷을 다시 읽지 않도록
+        self._snapshot_count = (None, 0)
+        self.meta_path = f"{path}.meta.json"
+        self.seq_path = f"{path}.seq.json"
+        # 여러 프로세스(레플리카)가 같은 파일에 쓰는 경우를 위한 잠금
+        self.lock = FileLock(f"{path}.lock")
+        # 검색 색인 (별도 SQLite 파일, 색인한 시점의 data_version을 함께 기록)
+        self.search_path = f"{path}.search.sqlite3"
+        self._search_conn = None
+        self._search_pid = None
+        self._search_lock = threading.RLock()
+        # 색인이 최신임을 마지막으로 확인한 version() (같으면 다시 확인하지 않음)
+        self._search_token = None
+
+    def exists(self):
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.path)
+
+    def version(self):
+        """Cheap change token: (mtime, size, inode) of the snapshot plus the journal state."""
+        self._sync_snapshot()
+        st = os.stat(self.snapshot_path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino, self.journal.version())
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": 0}
+
+    def _write_meta(self, **values):
+        meta = self._read_meta()
+        meta.update(values)
+        atomic_write_text(self.meta_path, json.dumps(meta))
+
+    def data_version(self):
+        """Monotonic data version: snapshot version plus journal entries not yet folded in."""
+        return self._read_meta().get("version", 0) + len(self.journal.read())
+
+    def schema_version(self):
+        """Schema version the stored data conforms to (0 = not recorded yet)."""
+        return self._read_meta().get("schema_version", 0)
+
+    def set_schema_version(self, version):
+        with self.lock:
+            self._write_meta(schema_version=int(version))
+
+    def _sync_snapshot(self):
+        """Build the Parquet snapshot from the xlsx the first time (one-off import)."""
+        if os.path.exists(self.snapshot_path):
+            return
+        with self.lock:
+            if os.path.exists(self.snapshot_path):
+                return
+            df = pd.read_excel(self.path)
+            if self.migrate is not None:
+                df = self.migrate(df)
+            self._write_snapshot(df)
+            # 새 스냅샷이 생겼으므로 버전 증가 (저널의 추가 건은 그대로 유지)
+            version = self._read_meta().get("version", 0) + 1
+            meta = {"version": version, "xlsx_version": version}
+            if self.migrate is not None and self.migrated_schema is not None:
+                meta["schema_version"] = self.migrated_schema
+            self._write_meta(**meta)
+
+    def _load_snapshot(self, columns=None, raw=False):
+        self._sync_snapshot()
+        if columns is not None:
+            available = set(pq_schema_names(self.snapshot_path))
+            columns = [c for c in columns if c in available]
+        return read_parquet(self.snapshot_path, columns=columns, raw=raw)
+
+    def load(self, columns=None, raw=False):
+        """Read the ledger, optionally only the given columns (column projection)."""
+        # 읽는 도중 다른 쓰기가 끝나 스냅샷/저널이 어긋나면 다시 읽기
+        for _ in range(3):
+            before = self.version()
+            df = self._load_snapshot(columns, raw)
+            records = self.journal.read()
+            if records:
+                # 스냅샷에 이미 합쳐진 행은 건너뛰기 (압축 도중 중단된 경우 대비)
+                ids = df[ID_COLUMN] if ID_COLUMN in df.columns else self._load_snapshot([ID_COLUMN])[ID_COLUMN]
+                existing = set(ids.astype(str))
+                rows = [r["row"] for r in records if r.get("op") == "insert" and str(r["row"].get(ID_COLUMN)) not in existing]
+                if rows:
+                    journal_df = pd.DataFrame(rows)
+                    if not raw:
+                        journal_df = typed_frame(journal_df)
+                    if columns is not None:
+                        journal_df = journal_df.reindex(columns=df.columns)
+                    # 모두 빈 컬럼은 빼고 합침 (빈 컬럼이 결과 타입을 정하지 않도록, 빠진 칸은 NaN)
+                    journal_df = journal_df.dropna(axis=1, how="all")
+                    df = pd.concat([df, journal_df], ignore_index=True)
+                    if not raw:
+                        # 카테고리가 서로 다르면 concat 결과가 object가 되므로 다시 변환
+                        df = typed_frame(df)
+            if self.version() == before:
+                break
+        return df
+
+    def load_raw(self):
+        """Every stored column, as stored (for migrations)."""
+        return self.load(raw=True)
+
+    def count(self):
+        self._sync_snapshot()
+        st = os.stat(self.snapshot_path)
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if self._snapshot_count[0] != key:
+            import pyarrow.parquet as pq
+            self._snapshot_count = (key, pq.ParquetFile(self.snapshot_path).metadata.num_rows)
+        pending = sum(1 for r in self.journal.read() if r.get("op") == "insert")
+        return self._snapshot_count[1] + pending
+
+    def _write_snapshot(self, df):
+        import pyarrow.parquet as pq
+
+        # 임시 파일에 쓴 뒤 원자적으로 교체 (읽는 쪽은 항상 완전한 파일만 봄)
+        columns = self.columns + [c for c in df.columns if c not in self.columns]
+        tmp = f"{self.snapshot_path}.tmp"
+        pq.write_table(arrow_table(df, columns), tmp)
+        os.replace(tmp, self.snapshot_path)
+
+    def save(self, df, base_version=None, changed=None):
+        """Replace the ledger; rejected with StaleDataError if base_version is outdated.
+
+        changed: 관리번호 of the rows that differ from the stored ledger, so
+        only those are re-indexed for search (None = re-index everything).
+        """
+        with self.lock:
+            current = self.data_version()
+            if base_version is not None and base_version != current:
+                raise StaleDataError(f"data version {base_version} is stale (current {current})")
+            self._write_snapshot(df)
+            # 저널 내용은 이제 스냅샷에 포함됨
+            self.journal.clear()
+            self._write_meta(version=current + 1)
+            self._record_changes(current + 1, changed)
+            self._update_search(current, changed, df)
+        return True
+
+    def _record_changes(self, version, changed):
+        """Log the 관리번호 a write changed (None = unknown, e.g. a full replace) under its data version."""
+        logged = "changes_from" in self._read_meta() and len(self.changes.read()) < CHANGES_MAX_ENTRIES
+        if changed is not None and logged:
+            if changed:
+                self.changes.append({"version": version, "ids": [str(x) for x in changed]})
+            return
+        # 이 버전 이전부터의 변경은 알 수 없음 (changes_since가 None을 돌려줌)
+        self.changes.clear()
+        self._write_meta(changes_from=version)
+
+    def changes_since(self, version, columns=None):
+        """(rows changed after data version `version`, deleted 관리번호, current data version).
+
+        Rows hold their current values (only the given columns). Returns
+        None if the changes since version are not known (not logged yet or
+        trimmed), in which case the caller should reload everything.
+        """
+        with self.lock:
+            current = self.data_version()
+            start = self._read_meta().get("changes_from")
+            if version is None or start is None or version < start:
+                return None
+            ids = {x for r in self.changes.read() if r["version"] > version for x in r["ids"]}
+            if not ids:
+                return pd.DataFrame(columns=self.columns if columns is None else columns), [], current
+            df = self.load(columns=columns)
+        rows = df[df[ID_COLUMN].astype(str).isin(ids)]
+        return rows, sorted(ids - set(rows[ID_COLUMN].astype(str))), current
+
+    def write_xlsx(self, writer=None):
+        """Regenerate the xlsx from the snapshot if it is out of date; returns its path.
+
+        writer(target, columns, chunks) streams the rows (default: to_excel).
+        """
+        with self.lock:
+            current = self.data_version()
+            if self._read_meta().get("xlsx_version") != current or not os.path.exists(self.path):
+                root, ext = os.path.splitext(self.path)
+                tmp = f"{root}.tmp{ext}"
+                df = self.load()
+                if writer is None:
+                    df.to_excel(tmp, index=False)
+                else:
+                    writer(tmp, list(df.columns), [df])
+                os.replace(tmp, self.path)
+                self._write_meta(xlsx_version=current)
+        return self.path
+
+    def needs_compaction(self):
+        if self.journal.size() >= JOURNAL_MAX_BYTES:
+            return True
+        first_ts = self.journal.first_timestamp()
+        if first_ts is not None and time.time() - first_ts >= JOURNAL_MAX_AGE:
+            return True
+        return len(self.journal.read()) >= JOURNAL_MAX_ENTRIES
+
+    def compact(self):
+        """Fold the journal into the Parquet snapshot."""
+        with self.lock:
+            if self.journal.size() == 0:
+                return True
+            return self.save(self.load(), changed=[])
+
+    def insert(self, row):
+        return self._append_rows([row])
+
+    def _append_rows(self, rows):
+        records = [{"op": "insert", "ts": time.time(), "row": coerce_values(row)} for row in rows]
+        with self.lock:
+            before = self.data_version()
+            self.journal.extend(records)
+            rows = pd.DataFrame([r["row"] for r in records])
+            self._record_changes(before + len(records), rows[ID_COLUMN].astype(str).tolist() if len(rows) else [])
+            self._update_search(before, rows[ID_COLUMN].astype(str).tolist() if len(rows) else [], rows)
+            if self.needs_compaction():
+                self.compact()
+        return True
+
+    def _set_values(self, df, request_id, values):
+        mask = df[ID_COLUMN].astype(str) == str(request_id)
+        if not mask.any():
+            return False
+        idx = df.index[mask][0]
+        for col, value in values.items():
+            if col not in df.columns:
+                df[col] = ""
+            if df[col].dtype != object:
+                df[col] = df[col].astype(object)
+            df.at[idx, col] = value
+        return True
+
+    def update(self, request_id, values):
+        with self.lock:
+            df = self.load()
+            if not self._set_values(df, request_id, values):
+                return False
+            return self.save(df, changed=[request_id])
+
+    def update_many(self, changes):
+        """Apply {관리번호: {col: value}} patches in a single snapshot write."""
+        with self.lock:
+            df = self.load()
+            for request_id, values in changes.items():
+                self._set_values(df, request_id, values)
+            return self.save(df, changed=list(changes))
+
+    def delete(self, ids):
+        with self.lock:
+            df = self.load()
+            df = df[~df[ID_COLUMN].astype(str).isin([str(x) for x in ids])]
+            return self.save(df, changed=ids)
+
+    def upsert(self, rows):
+        with self.lock:
+            return self.save(upsert_frame(self.load(), rows), changed=rows[ID_COLUMN].astype(str).tolist())
+
+    def apply_batch(self, records):
+        """Apply queued write records ({"op": "insert" | "update" | "delete", ...}) in order.
+
+        A batch of inserts only is appended to the journal; anything else is
+        applied to one loaded frame and saved once. Inserts of a 관리번호 that
+        already exists are skipped, so replaying a batch is harmless.
+        """
+        with self.lock:
+            if all(r["op"] == "insert" for r in records):
+                existing = self.existing_ids([r["row"].get(ID_COLUMN) for r in records])
+                return self._append_rows([r["row"] for r in records if str(r["row"].get(ID_COLUMN)) not in existing])
+            df = self.load()
+            changed = []
+            for record in records:
+                if record["op"] == "insert":
+                    row = record["row"]
+                    changed.append(str(row.get(ID_COLUMN)))
+                    if not (df[ID_COLUMN].astype(str) == str(row.get(ID_COLUMN))).any():
+                        added = typed_frame(pd.DataFrame([coerce_values(row)])).dropna(axis=1, how="all")
+                        df = pd.concat([df, added], ignore_index=True)
+                elif record["op"] == "update":
+                    changed += list(record["changes"])
+                    for request_id, values in record["changes"].items():
+                        self._set_values(df, request_id, values)
+                elif record["op"] == "delete":
+                    changed += [str(x) for x in record["ids"]]
+                    df = df[~df[ID_COLUMN].astype(str).isin([str(x) for x in record["ids"]])]
+            return self.save(df, changed=changed)
+
+    def _search_connect(self):
+        # 연결은 프로세스마다 따로 사용 (세션 스레드들은 _search_lock으로 직렬화)
+        if self._search_conn is None or self._search_pid != os.getpid():
+            conn = sqlite3.connect(self.search_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+            self._search_conn = conn
+            self._search_pid = os.getpid()
+        return self._search_conn
+
+    def _search_stamp(self, conn):
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("search_version") != search.INDEX_VERSION:
+            return None
+        return meta.get("data_version")
+
+    def _update_search(self, before, changed, df):
+        """Bring the search index in step with a write made under the file lock.
+
+        before: data_version before the write; changed: 관리번호 to re-index
+        from df (None = df holds the whole ledger; only rows whose text
+        differs from the index are re-indexed). If the index was already
+        behind (another writer, first import) or the write changed
+        BULK_WRITE_ROWS rows or more, it is left stale and brought up to
+        date by the next search.
+        """
+        try:
+            with self._search_lock:
+                conn = self._search_connect()
+                stamp = self._search_stamp(conn)
+                if changed is not None and (stamp != before or len(changed) >= BULK_WRITE_ROWS):
+                    return
+                rows = _search_records(df)
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if changed is not None:
+                        search.reindex(conn, changed, rows)
+                    elif stamp is None:
+                        # 색인이 없거나 INDEX_VERSION이 바뀜
+                        search.rebuild(conn, rows)
+                    else:
+                        search.sync(conn, rows)
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("data_version", self.data_version()), ("search_version", search.INDEX_VERSION)],
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            print(f"Error updating search index: {e}")
+
+    def search(self, text, company=None, limit=None):
+        """Ranked [(관리번호, score)] for a search text (see search.search)."""
+        token = self.version()
+        if token != self._search_token:
+            with self.lock:
+                with self._search_lock:
+                    stale = self._search_stamp(self._search_connect()) != self.data_version()
+                if stale:
+                    self._update_search(None, None, self.load())
+            self._search_token = token
+        with self._search_lock:
+            return search.search(self._search_connect(), text, company, limit)
+
+    def existing_ids(self, ids):
+        """Subset of ids that are already stored (reads only the ID column)."""
+        stored = set(self.load(columns=[ID_COLUMN])[ID_COLUMN].astype(str))
+        return {str(x) for x in ids} & stored
+
+    def allocate_ids(self, prefix, n=1):
+        """Reserve the next n IDs for prefix (e.g. "REQ-20241215-") under the file lock."""
+        with self.lock:
+            try:
+                with open(self.seq_path, "r", encoding="utf-8") as f:
+                    sequences = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                sequences = {}
+            if prefix not in sequences:
+                # 해당 날짜 첫 발급: 기존 데이터의 최대 번호부터 이어서 (날짜당 1회)
+                sequences = {prefix: max_sequence(self.load()[ID_COLUMN], prefix)}
+            start = sequences[prefix] + 1
+            sequences[prefix] = start + n - 1
+            atomic_write_text(self.seq_path, json.dumps(sequences))
+        return [f"{prefix}{seq:03d}" for seq in range(start, start + n)]
+
+
+class SQLiteStorage:
+    """Keep the ledger in a SQLite database (WAL mode) with one row per request."""
+
+    name = "sqlite"
+    table = "requests"
+
+    def __init__(self, path, columns=COLUMNS):
+        self.path = path
+        self.columns = list(columns)
+        self._conn = None
+        self._pid = None
+        # Streamlit 세션(스레드)들이 연결 하나를 공유하므로 잠금으로 직렬화
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        # 연결은 프로세스마다 따로 사용 (fork 후 부모 연결을 공유하면 안 됨)
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # 대량 병합이 페이지를 중간에 WAL로 내보내지 않도록 캐시를 넉넉히, 임시 테이블은 메모리에
+            conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KB}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            # 쓰기마다 1씩 증가하는 데이터 버전 (캐시 무효화용)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+            # 날짜(접두어)별 관리번호 발급 순번
+            conn.execute("CREATE TABLE IF NOT EXISTS id_sequence (prefix TEXT PRIMARY KEY, last INTEGER NOT NULL)")
+            # 관리번호별 마지막으로 바뀐 데이터 버전 (changes_since용, 삭제된 요청도 남음)
+            conn.execute("CREATE TABLE IF NOT EXISTS row_versions (id TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_row_versions_version ON row_versions (version)")
+            # 기록을 시작한 버전 (그 이전부터의 변경은 알 수 없음)
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) SELECT 'changes_from', value FROM meta WHERE key = 'version'"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+            # 구 스키마 테이블은 마이그레이션(create)에서 컬럼을 추가한 뒤 인덱스 생성
+            if self.exists() and not self._missing_columns(conn):
+                self._create_indexes(conn)
+        return self._conn
+
+    def _missing_columns(self, conn):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        return [c for c in self.columns if c not in existing]
+
+    def _create_indexes(self, conn):
+        # 고객사 화면은 자기 업체 행만 읽도록 업체명 인덱스 사용 (쓰기 시 SQLite가 자동 갱신)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_company ON {self.table} ("업체명")')
+        # 납기 조회(due): 출하 전 요청은 납기일, 출하된 요청은 출하일 순 부분 인덱스로 범위 조회
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{self.table}_due_open ON {self.table} ("납기일") WHERE "출하일" IS NULL'
+        )
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{self.table}_shipped ON {self.table} ("출하일") WHERE "출하일" IS NOT NULL'
+        )
+        self._ensure_search(conn)
+
+    def _ensure_search(self, conn):
+        """Build the search index once (existing database, or search.INDEX_VERSION changed)."""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'search_version'").fetchone()
+        if row is not None and row[0] == search.INDEX_VERSION:
+            return
+        own = not conn.in_transaction
+        if own:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            search.rebuild(conn, self._search_rows(conn))
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('search_version', ?)", (search.INDEX_VERSION,)
+            )
+            conn.execute("DELETE FROM meta WHERE key = 'search_behind'")
+            if own:
+                conn.execute("COMMIT")
+        except Exception:
+            if own:
+                conn.execute("ROLLBACK")
+            raise
+
+    def _search_rows(self, conn, ids=None):
+        """관리번호 + search field columns to index, as a frame; all rows when ids is None."""
+        available = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        cols = [c for c in [ID_COLUMN, *search.SEARCH_FIELDS] if c in available]
+        sql = f"SELECT {self._quoted(cols)} FROM {self.table}"
+        if ids is None:
+            return pd.DataFrame(conn.execute(sql).fetchall(), columns=cols)
+        ids = [str(x) for x in ids]
+        rows = []
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            rows += conn.execute(f'{sql} WHERE "{ID_COLUMN}" IN ({", ".join("?" * len(part))})', part).fetchall()
+        return pd.DataFrame(rows, columns=cols)
+
+    def _reindex(self, conn, ids):
+        # 같은 트랜잭션 안에서 바뀐 행만 다시 색인 (삭제된 행은 색인에서 제거)
+        search.reindex(conn, ids, self._search_rows(conn, ids))
+
+    def _catch_up_search(self, conn):
+        """Bring the index up to date after a bulk write left it behind (meta search_behind)."""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'search_behind'").fetchone() is None:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 다른 프로세스가 먼저 따라잡았을 수 있으므로 잠근 뒤 다시 확인
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'search_behind'").fetchone() is not None:
+                # 내용이 바뀐 행만 다시 색인 (save와 같음)
+                search.sync(conn, self._search_rows(conn))
+                conn.execute("DELETE FROM meta WHERE key = 'search_behind'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _stamp(self, conn, ids):
+        # 바뀐 행에 이번 쓰기의 데이터 버전 기록 (_transaction이 끝날 때 버전을 1 올림)
+        version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0] + 1
+        conn.executemany(
+            "INSERT OR REPLACE INTO row_versions (id, version) VALUES (?, ?)", [(str(x), version) for x in ids]
+        )
+
+    @contextmanager
+    def _transaction(self, base_version=None):
+        """Run the block in one write transaction and bump the data version.
+
+        With base_version, the transaction is rejected (StaleDataError) if
+        another writer committed since that version was read.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if base_version is not None:
+                    current = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                    if current != base_version:
+                        raise StaleDataError(f"data version {base_version} is stale (current {current})")
+                yield conn
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _quoted(self, cols):
+        return ", ".join(f'"{c}"' for c in cols)
+
+    def exists(self):
+        if not os.path.exists(self.path):
+            return False
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (self.table,)
+            ).fetchone()
+        return row is not None
+
+    def create(self):
+        # 관리번호는 PRIMARY KEY(인덱스), 나머지 컬럼은 타입 지정 없이 값 그대로 보관
+        col_defs = [f'"{ID_COLUMN}" TEXT PRIMARY KEY'] + [f'"{c}"' for c in self.columns if c != ID_COLUMN]
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({', '.join(col_defs)})")
+            # 이전 스키마로 만든 테이블에는 새 컬럼만 추가
+            for col in self._missing_columns(conn):
+                conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{col}"')
+            self._create_indexes(conn)
+
+    def version(self):
+        with self._lock:
+            return self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def schema_version(self):
+        """Schema version the stored data conforms to (PRAGMA user_version, 0 = not recorded yet)."""
+        with self._lock:
+            return self._connect().execute("PRAGMA user_version").fetchone()[0]
+
+    def set_schema_version(self, version):
+        with self._lock:
+            self._connect().execute(f"PRAGMA user_version = {int(version)}")
+
+    def data_version(self):
+        return self.version()
+
+    def load(self, columns=None):
+        """Read the table, optionally only the given columns (column projection)."""
+        columns = self.columns if columns is None else [c for c in columns if c in self.columns]
+        with self._lock:
+            conn = self._connect()
+            df = pd.read_sql_query(
+                f"SELECT {self._quoted(columns)} FROM {self.table} ORDER BY rowid", conn
+            )
+        return typed_frame(df)
+
+    def load_raw(self):
+        """Every stored column as stored, including ones outside the current schema (for migrations)."""
+        with self._lock:
+            return pd.read_sql_query(f"SELECT * FROM {self.table} ORDER BY rowid", self._connect())
+
+    def changes_since(self, version, columns=None):
+        """(rows changed after data version `version`, deleted 관리번호, current data version).
+
+        Reads only the rows stamped with a later version (see _stamp).
+        Returns None if version predates the stamps (the caller should
+        reload everything).
+        """
+        columns = self.columns if columns is None else [c for c in columns if c in self.columns]
+        columns = list(dict.fromkeys([ID_COLUMN, *columns]))
+        selected = ", ".join(f'r."{c}"' for c in columns)
+        with self._lock:
+            conn = self._connect()
+            # 버전과 행을 같은 시점에서 읽도록 읽기 트랜잭션 하나로
+            conn.execute("BEGIN")
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('version', 'changes_from')"))
+                if version is None or version < meta["changes_from"]:
+                    return None
+                # 삭제된 요청은 테이블에 행이 없음 (LEFT JOIN 결과의 관리번호가 NULL)
+                df = pd.read_sql_query(
+                    f"SELECT v.id AS _id, {selected} "
+                    f'FROM row_versions v LEFT JOIN {self.table} r ON r."{ID_COLUMN}" = v.id '
+                    "WHERE v.version > ? ORDER BY r.rowid",
+                    conn,
+                    params=(version,),
+                )
+            finally:
+                conn.execute("COMMIT")
+        deleted = df[ID_COLUMN].isna()
+        rows = typed_frame(df.loc[~deleted, columns].reset_index(drop=True))
+        return rows, df.loc[deleted, "_id"].tolist(), meta["version"]
+
+    def count(self):
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def iter_chunks(self, chunksize):
+        """Yield the table in row chunks, all from one read snapshot.
+
+        Uses its own connection so a slow consumer never blocks writers.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("BEGIN")
+            for chunk in pd.read_sql_query(
+                f"SELECT {self._quoted(self.columns)} FROM {self.table} ORDER BY rowid", conn, chunksize=chunksize
+            ):
+                yield typed_frame(chunk)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def compact(self):
+        """Checkpoint the WAL back into the main database file."""
+        with self._lock:
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    def _rows(self, df, blank_as_null=False):
+        """(columns, values of all rows flattened row by row) to bind with _insert_rows."""
+        cols = [c for c in self.columns if c in df.columns]
+        # 날짜는 YYYY-MM-DD 텍스트, 수량은 정수로 저장 (clean_value가 자정 Timestamp를 날짜로 변환)
+        grid = np.empty((len(df), len(cols)), dtype=object)
+        for i, c in enumerate(cols):
+            grid[:, i] = self._bound(df[c], blank_as_null)
+        return cols, grid.ravel().tolist()
+
+    def _insert_rows(self, conn, table, cols, values):
+        # 여러 행을 한 문장으로 넣어 행마다의 문장 실행 비용을 줄임 (나머지 행은 한 행씩)
+        one = f"({', '.join('?' * len(cols))})"
+        step = max(SQLITE_MAX_VARIABLES // len(cols), 1) * len(cols)
+        full = len(values) // step * step
+        sql = f"INSERT INTO {table} ({self._quoted(cols)}) VALUES "
+        conn.executemany(sql + ", ".join([one] * (step // len(cols))), (values[i:i + step] for i in range(0, full, step)))
+        conn.executemany(sql + one, (values[i:i + len(cols)] for i in range(full, len(values), len(cols))))
+
+    @staticmethod
+    def _bound(series, blank_as_null=False):
+        # 서로 다른 값마다 한 번만 변환 (distinct_values, clean_column) 한 뒤 행 순서대로 펼침
+        codes, uniques = distinct_values(series, blank_as_na=blank_as_null)
+        values = uniques.to_numpy(dtype=object)
+        if pd.api.types.infer_dtype(values) not in ("string", "empty"):
+            values = [_NULL if v is None else v for v in clean_column(uniques)]
+        # 빈 값(코드 -1, 공백)은 NaN으로 바인딩: SQLite는 NaN을 NULL로 저장하고, None은 sqlite3 어댑터
+        # 조회를 거쳐 값마다 몇 배 느림 (대량 저장/병합에서 차이가 큼)
+        table = np.empty(len(values) + 1, dtype=object)
+        table[:-1] = values
+        table[-1] = _NULL
+        return table[codes]
+
+    def save(self, df, base_version=None):
+        """Replace the whole table in one transaction (rejected if base_version is stale)."""
+        self.create()
+        cols, rows = self._rows(df)
+        with self._transaction(base_version) as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+            self._insert_rows(conn, self.table, cols, rows)
+            # 내용이 바뀐 행만 다시 색인 (대량 쓰기로 밀린 색인도 함께 따라잡음)
+            search.sync(conn, self._search_rows(conn))
+            conn.execute("DELETE FROM meta WHERE key = 'search_behind'")
+            # 전체를 바꿨으므로 이전 버전부터의 변경 기록은 버림
+            conn.execute("DELETE FROM row_versions")
+            conn.execute(
+                "UPDATE meta SET value = (SELECT value + 1 FROM meta WHERE key = 'version') WHERE key = 'changes_from'"
+            )
+        return True
+
+    def insert(self, row):
+        cols = [c for c in self.columns if c in row]
+        row = coerce_values(row)
+        values = tuple(row[c] for c in cols)
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT INTO {self.table} ({self._quoted(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                values,
+            )
+            self._reindex(conn, [row.get(ID_COLUMN)])
+            self._stamp(conn, [row.get(ID_COLUMN)])
+        return True
+
+    def _update_row(self, conn, request_id, values):
+        cols = [c for c in values if c in self.columns]
+        if not cols:
+            return 0
+        assignments = ", ".join(f'"{c}" = ?' for c in cols)
+        values = coerce_values({c: values[c] for c in cols})
+        params = tuple(values[c] for c in cols) + (str(request_id),)
+        cur = conn.execute(
+            f'UPDATE {self.table} SET {assignments} WHERE "{ID_COLUMN}" = ?', params
+        )
+        if cur.rowcount:
+            self._stamp(conn, [request_id])
+        if cur.rowcount and any(c in search.SEARCH_FIELDS for c in cols):
+            self._reindex(conn, [request_id])
+        return cur.rowcount
+
+    def update(self, request_id, values):
+        values = {c: v for c, v in values.items() if c != ID_COLUMN}
+        with self._transaction() as conn:
+            updated = self._update_row(conn, request_id, values)
+        return updated > 0
+
+    def update_many(self, changes):
+        """Apply {관리번호: {col: value}} patches in one transaction, one UPDATE per row."""
+        with self._transaction() as conn:
+            for request_id, values in changes.items():
+                self._update_row(conn, request_id, values)
+        return True
+
+    def delete(self, ids):
+        with self._transaction() as conn:
+            conn.executemany(
+                f'DELETE FROM {self.table} WHERE "{ID_COLUMN}" = ?', [(str(x),) for x in ids]
+            )
+            search.reindex(conn, ids)
+            self._stamp(conn, ids)
+        return True
+
+    def upsert(self, rows):
+        """Insert new 관리번호 rows and update existing ones; empty cells keep the stored value.
+
+        Empty means NULL/NaN or blank text (stored as NULL in new rows). The
+        rows go into a temporary table first and are merged with one
+        INSERT ... SELECT, so the upsert is one statement whatever the row
+        count. Writes of BULK_WRITE_ROWS rows or more reset the change log
+        like save() and leave the search index to the next search (meta
+        search_behind).
+        """
+        cols, values = self._rows(rows, blank_as_null=True)
+        quoted = self._quoted(cols)
+        assignments = ", ".join(f'"{c}" = COALESCE(excluded."{c}", "{c}")' for c in cols if c != ID_COLUMN)
+        # SELECT 뒤의 ON CONFLICT는 WHERE가 있어야 조인 구문과 구분됨
+        sql = f"INSERT INTO {self.table} ({quoted}) SELECT {quoted} FROM temp.upsert_rows WHERE true"
+        if assignments:
+            sql += f' ON CONFLICT("{ID_COLUMN}") DO UPDATE SET {assignments}'
+        else:
+            sql += f' ON CONFLICT("{ID_COLUMN}") DO NOTHING'
+        with self._transaction() as conn:
+            conn.execute(f"CREATE TEMP TABLE upsert_rows ({quoted})")
+            try:
+                self._insert_rows(conn, "temp.upsert_rows", cols, values)
+                conn.execute(sql)
+                if len(rows) < BULK_WRITE_ROWS:
+                    self._reindex(conn, rows[ID_COLUMN].astype(str).tolist())
+                    # 바뀐 행에 이번 쓰기의 데이터 버전 기록 (_stamp와 같은 값)
+                    conn.execute(
+                        f'INSERT OR REPLACE INTO row_versions (id, version) SELECT "{ID_COLUMN}", '
+                        "(SELECT value + 1 FROM meta WHERE key = 'version') FROM temp.upsert_rows"
+                    )
+                else:
+                    # 대량 쓰기: save처럼 변경 기록을 비우고, 검색 색인은 다음 검색 때 따라잡음
+                    conn.execute("DELETE FROM row_versions")
+                    conn.execute(
+                        "UPDATE meta SET value = (SELECT value + 1 FROM meta WHERE key = 'version') "
+                        "WHERE key = 'changes_from'"
+                    )
+                    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('search_behind', 1)")
+            finally:
+                conn.execute("DROP TABLE temp.upsert_rows")
+        return True
+
+    def apply_batch(self, records):
+        """Apply queued write records ({"op": "insert" | "update" | "delete", ...}) in one transaction.
+
+        Inserts of a 관리번호 that already exists are skipped, so replaying a
+        batch is harmless.
+        """
+        with self._transaction() as conn:
+            for record in records:
+                if record["op"] == "insert":
+                    row = coerce_values(record["row"])
+                    cols = [c for c in self.columns if c in row]
+                    conn.execute(
+                        f"INSERT INTO {self.table} ({self._quoted(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                        f'ON CONFLICT("{ID_COLUMN}") DO NOTHING',
+                        tuple(row[c] for c in cols),
+                    )
+                    self._reindex(conn, [row.get(ID_COLUMN)])
+                    self._stamp(conn, [row.get(ID_COLUMN)])
+                elif record["op"] == "update":
+                    for request_id, values in record["changes"].items():
+                        self._update_row(conn, request_id, {c: v for c, v in values.items() if c != ID_COLUMN})
+                elif record["op"] == "delete":
+                    conn.executemany(
+                        f'DELETE FROM {self.table} WHERE "{ID_COLUMN}" = ?', [(str(x),) for x in record["ids"]]
+                    )
+                    search.reindex(conn, record["ids"])
+                    self._stamp(conn, record["ids"])
+        return True
+
+    def existing_ids(self, ids):
+        """Subset of ids that are already stored (PRIMARY KEY lookups)."""
+        ids = [str(x) for x in ids]
+        found = set()
+        with self._lock:
+            conn = self._connect()
+            # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                rows = conn.execute(
+                    f'SELECT "{ID_COLUMN}" FROM {self.table} WHERE "{ID_COLUMN}" IN ({", ".join("?" * len(part))})',
+                    part,
+                ).fetchall()
+                found.update(r[0] for r in rows)
+        return found
+
+    def allocate_ids(self, prefix, n=1):
+        """Reserve the next n IDs for prefix (e.g. "REQ-20241215-") in one transaction."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT last FROM id_sequence WHERE prefix = ?", (prefix,)).fetchone()
+                if row is None:
+                    # 해당 날짜 첫 발급: 기존 관리번호 중 최대 번호부터 이어서 (PRIMARY KEY 범위 검색)
+                    self.create()
+                    ids = [r[0] for r in conn.execute(
+                        f'SELECT "{ID_COLUMN}" FROM {self.table} WHERE "{ID_COLUMN}" >= ? AND "{ID_COLUMN}" < ?',
+                        (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+                    )]
+                    last = max_sequence(ids, prefix)
+                else:
+                    last = row[0]
+                conn.execute(
+                    "INSERT INTO id_sequence (prefix, last) VALUES (?, ?) "
+                    "ON CONFLICT(prefix) DO UPDATE SET last = excluded.last",
+                    (prefix, last + n),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [f"{prefix}{seq:03d}" for seq in range(last + 1, last + n + 1)]
+
+    def _has_value_sql(self, col):
+        return f'("{col}" IS NOT NULL AND "{col}" NOT IN ({", ".join(repr(v) for v in status.EMPTY_STRINGS)}))'
+
+    def _status_sql(self, labels=False):
+        """SQL CASE mirroring status.progress_status (labels or STATUS_ORDER rank)."""
+        def out(label):
+            return f"'{label}'" if labels else str(status.STATUS_ORDER.index(label))
+        whens = " ".join(
+            f"WHEN {' OR '.join(self._has_value_sql(c) for c in cols)} THEN {out(label)}"
+            for label, cols in status.STATUS_RULES
+        )
+        return f"CASE {whens} ELSE {out(status.DEFAULT_STATUS)} END"
+
+    def query(self, filters=None, sort_by=None, ascending=True, offset=0, limit=None):
+        """Filter, sort and page in SQL; same contract as query_frame."""
+        filters = filters or {}
+        where, params = [], []
+        for key, col in (("companies", "업체명"), ("projects", "차종")):
+            if filters.get(key):
+                values = list(filters[key])
+                where.append(f'"{col}" IN ({", ".join("?" * len(values))})')
+                params += values
+        if filters.get("statuses"):
+            values = list(filters["statuses"])
+            where.append(f'{self._status_sql(labels=True)} IN ({", ".join("?" * len(values))})')
+            params += values
+        # 날짜는 YYYY-MM-DD 문자열로 저장되므로 앞 10자리를 문자열로 비교
+        if filters.get("due_from"):
+            where.append('substr("납기일", 1, 10) >= ?')
+            params.append(str(filters["due_from"]))
+        if filters.get("due_to"):
+            where.append('substr("납기일", 1, 10) <= ?')
+            params.append(str(filters["due_to"]))
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        # ids 필터: 관리번호 목록(JSON)과 조인하고, 정렬 조건이 없으면 목록 순서대로
+        # (CROSS JOIN: 목록을 바깥 루프로 고정해 관리번호 인덱스로 찾도록)
+        from_sql = self.table
+        rowid = f"{self.table}.rowid"
+        if filters.get("ids") is not None:
+            from_sql = f'json_each(?) AS hit CROSS JOIN {self.table} ON hit.value = {self.table}."{ID_COLUMN}"'
+            params = [json.dumps([str(x) for x in filters["ids"]], ensure_ascii=False)] + params
+            rowid = f"hit.key, {rowid}"
+
+        direction = "ASC" if ascending else "DESC"
+        if sort_by == "진행상태":
+            order_sql = f"ORDER BY {self._status_sql()} {direction}, {rowid}"
+        elif sort_by in self.columns:
+            order_sql = f'ORDER BY "{sort_by}" IS NULL, "{sort_by}" {direction}, {rowid}'
+        else:
+            order_sql = f"ORDER BY {rowid}"
+        page_sql = "" if limit is None else f"LIMIT {int(limit)} OFFSET {int(offset)}"
+
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM {from_sql} {where_sql}", params).fetchone()[0]
+            columns = ", ".join(f'{self.table}."{c}"' for c in self.columns)
+            df = pd.read_sql_query(
+                f"SELECT {columns} FROM {from_sql} {where_sql} {order_sql} {page_sql}",
+                conn, params=params,
+            )
+        return typed_frame(df), total
+
+    def search(self, text, company=None, limit=None):
+        """Ranked [(관리번호, score)] for a search text (see search.search)."""
+        with self._lock:
+            conn = self._connect()
+            self._catch_up_search(conn)
+            return search.search(conn, text, company, limit)
+
+    def due(self, kind, start=None, end=None, company=None, limit=None):
+        """(first limit rows in date order, total matches) of a 납기 range query.
+
+        Same ranges as DueIndex.positions.
+        """
+        # 날짜는 YYYY-MM-DD 문자열(빈 값은 NULL)로 저장되므로 문자열 비교가 곧 날짜 비교
+        if kind == "open":
+            key, where = "납기일", ['"출하일" IS NULL', '"납기일" IS NOT NULL']
+        elif kind == "late":
+            key, where = "출하일", ['"출하일" IS NOT NULL', '"출하일" > "납기일"']
+        else:
+            raise ValueError(f"unknown due kind: {kind}")
+        params = []
+        if start is not None:
+            where.append(f'"{key}" >= ?')
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            where.append(f'"{key}" < ?')
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+        if company is not None:
+            where.append('"업체명" = ?')
+            params.append(str(company))
+        where_sql = " AND ".join(where)
+        page_sql = "" if limit is None else f"LIMIT {int(limit)}"
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where_sql}", params).fetchone()[0]
+            df = pd.read_sql_query(
+                f'SELECT {self._quoted(self.columns)} FROM {self.table} '
+                f'WHERE {where_sql} ORDER BY "{key}", rowid {page_sql}',
+                conn, params=params,
+            )
+        return typed_frame(df), total
+
+    def distinct(self, col):
+        """Sorted distinct non-empty values of a column."""
+        with self._lock:
+            rows = self._connect().execute(
+                f'SELECT DISTINCT "{col}" FROM {self.table} WHERE {self._has_value_sql(col)} ORDER BY 1'
+            ).fetchall()
+        return [str(r[0]) for r in rows]
+
+    def summary(self):
+        """Dashboard aggregates computed with GROUP BY; same contract as summarize_frame."""
+        def counts(expr, where="1"):
+            # value_counts 순서와 같게: 건수 내림차순, 같으면 먼저 나온 값 순
+            rows = self._connect().execute(
+                f"SELECT {expr}, COUNT(*) FROM {self.table} WHERE {where} "
+                f"GROUP BY 1 ORDER BY 2 DESC, MIN(rowid)"
+            ).fetchall()
+            return {str(value): n for value, n in rows}
+
+        with self._lock:
+            return summary_from_counts(
+                counts(self._status_sql(labels=True)),
+                counts('"업체명"', '"업체명" IS NOT NULL'),
+                counts('"차종"', '"차종" IS NOT NULL'),
+            )
@@ -0,0 +1,62 @@
+import pandas as pd
+
+import attachments
+import status
+from storage import DATE_COLUMNS
+
+
+def get_status_color(status):
+    """진행상태에 따른 색상 반환"""
+    status_str = str(status).lower()
+    # 접수 / 자재준비 / 생산중 / 출하준비 / 출하완료
+    if '접수' in status_str:
+        return '#fbbf24'  # 노란색
+    elif '자재준비' in status_str:
+        return '#3b82f6'  # 파란색
+    elif '생산중' in status_str:
+        return '#10b981'  # 초록색
+    elif '출하준비' in status_str:
+        return '#f59e0b'  # 주황색
+    elif '출하완료' in status_str or '완료' in status_str:
+        return '#22c55e'  # 밝은 초록색 (완료)
+    else:
+        return '#94a3b8'  # 회색 (기본)
+
+
+def style_dataframe(df):
+    """데이터프레임에 색상 스타일 적용하여 HTML로 반환"""
+    if df.empty:
+        return df
+    
+    # 첨부파일 목록은 파일 이름만 표시
+    if '첨부파일' in df.columns:
+        df['첨부파일'] = df['첨부파일'].map(attachments.display_names)
+
+    # 진행상태 계산 (날짜 필드 기반, 전체 행을 한 번에 계산)
+    if '진행상태' not in df.columns:
+        df['진행상태'] = status.progress_status(df)
+    
+    # 진행상태별 배경색 (상태 종류가 몇 개뿐이므로 고유값 단위로 계산)
+    status_css = {
+        val: f'background-color: {get_status_color(val)}; color: white; font-weight: bold; padding: 5px; border-radius: 4px; text-align: center;'
+        for val in df['진행상태'].unique()
+    }
+    
+    # 납기 지난 항목 체크
+    overdue_mask = status.overdue_mask(df)
+    
+    # 셀별 스타일 표를 한 번에 만들어 적용
+    def build_styles(frame):
+        css = pd.DataFrame('', index=frame.index, columns=frame.columns)
+        css['진행상태'] = frame['진행상태'].map(status_css)
+        # 납기 지난 행에 빨간색 텍스트 적용
+        css.loc[overdue_mask, :] = css.loc[overdue_mask, :] + 'color: #dc2626; font-weight: bold;'
+        return css
+    
+    # 날짜는 YYYY-MM-DD로, 빈 날짜/수량(NaT, <NA>)은 빈 칸으로 표시
+    date_columns = [c for c in DATE_COLUMNS if c in df.columns]
+    return (
+        df.style.apply(build_styles, axis=None)
+        .format(na_rep="")
+        .format("{:%Y-%m-%d}", subset=date_columns, na_rep="")
+    )
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 테스트 중에는 납기 알림 파일을 만들지 않음
+os.environ.setdefault("DIGEST", "0")
+
+import data_manager  # noqa: E402
+
+
+def reset(backend):
+    """Point data_manager at a fresh store of backend in the cwd (see benchmark._reset)."""
+    data_manager._writer.flush()
+    data_manager.STORAGE_BACKEND = backend
+    data_manager._storage = None
+    data_manager._started = False
+    data_manager.invalidate_cache()
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def backend(request, tmp_path, monkeypatch):
+    """Run the test in an empty directory against each storage backend."""
+    monkeypatch.chdir(tmp_path)
+    reset(request.param)
+    yield request.param
+    data_manager._writer.flush()
+    if data_manager._backups is not None:
+        data_manager._backups.stop()
+    reset(request.param)
+    data_manager._storage = None
+
+
+def spawn(code, backend, *args):
+    """Start `python -c code *args` in the cwd with data_manager on backend (a Popen)."""
+    env = {**os.environ, "STORAGE_BACKEND": backend, "PYTHONPATH": ROOT, "DIGEST": "0"}
+    return subprocess.Popen(
+        [sys.executable, "-c", code, *args], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+
+
+def finish(proc, timeout=120):
+    """Wait for a spawned process; returns its exit code and output."""
+    out, _ = proc.communicate(timeout=timeout)
+    return proc.returncode, out
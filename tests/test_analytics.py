@@ -0,0 +1,60 @@
+import pandas as pd
+
+import analytics
+import data_manager
+
+
+def full_rollup():
+    return analytics.rollup(analytics._source(data_manager.load_data()))
+
+
+def test_rollups_follow_writes_from_changed_rows_only(backend, monkeypatch):
+    data_manager.startup()
+    for i in range(5):
+        data_manager.add_request({"업체명": "A사", "차종": "EV6", "품명": f"분석 {i}"})
+    analytics._rollups = analytics.LeadTimeRollups()
+    pd.testing.assert_frame_equal(analytics.get_rollups(), full_rollup())
+
+    ids = data_manager.load_data().query("품명.str.startswith('분석')")["관리번호"].tolist()
+    data_manager.update_request(ids[0], {"출하일": pd.Timestamp.now().normalize(), "납기일": "2099-12-31"})
+    data_manager.delete_requests_by_ids([ids[1]])
+    data_manager.add_request({"업체명": "B사", "품명": "분석 추가"})
+
+    # 증분 갱신은 대장 전체를 다시 읽지 않음
+    def full_read():
+        raise AssertionError("whole ledger read")
+
+    load_data = data_manager.load_data
+    monkeypatch.setattr(data_manager, "load_data", full_read)
+    table = analytics.get_rollups()
+    assert analytics._rollups.changed == 4
+    monkeypatch.setattr(data_manager, "load_data", load_data)
+    pd.testing.assert_frame_equal(table, full_rollup())
+    assert table.xs("A사", level="업체명")["on_time"].sum() == 1
+
+
+def test_full_save_falls_back_to_whole_ledger(backend):
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "분석"})
+    analytics._rollups = analytics.LeadTimeRollups()
+    analytics.get_rollups()
+
+    df = data_manager.load_data()
+    df.loc[df["품명"] == "분석", "접수일"] = pd.Timestamp("2024-04-01")
+    assert data_manager.save_data(df)
+    pd.testing.assert_frame_equal(analytics.get_rollups(), full_rollup())
+
+
+def test_backlog_carries_forward_to_the_current_month():
+    rows = pd.DataFrame({
+        "관리번호": ["A-1", "A-2"], "업체명": ["A사", "A사"], "차종": ["EV6", "EV6"],
+        "접수일": pd.to_datetime(["2024-01-10", "2024-02-10"]), "출하일": pd.to_datetime(["2024-02-20", None]),
+    })
+    table = analytics.rollup(analytics._source(rows))
+    levels = analytics.backlog(table)["A사"]
+    this_month = pd.Timestamp.now().to_period("M").to_timestamp()
+
+    assert levels.index[-1] == this_month
+    # 2024-02 이후 활동이 없어도 미출하 1건이 이번 달까지 이어짐
+    assert levels[pd.Timestamp("2024-02-01"):].eq(1).all()
+    assert analytics.monthly(table)["미출하 잔량"].iloc[-1] == 1
@@ -0,0 +1,80 @@
+import glob
+import io
+import os
+
+import pytest
+
+import attachments
+import data_manager
+from conftest import reset
+
+
+def upload(content, name="도면.pdf"):
+    fileobj = io.BytesIO(content)
+    fileobj.name = name
+    return fileobj
+
+
+def new_request(files):
+    data_manager.add_request({"업체명": "A사", "품명": "첨부 테스트"}, files=files)
+    df = data_manager.load_data()
+    row = df[df["품명"] == "첨부 테스트"].iloc[-1]
+    return row["관리번호"], attachments.parse(row["첨부파일"])
+
+
+def test_shared_file_is_kept_until_last_request_is_deleted(backend):
+    first, entries = new_request([upload(b"same")])
+    second, _ = new_request([upload(b"same", "사본.pdf")])
+    sha256 = entries[0]["sha256"]
+    assert attachments.ref_count(sha256) == 2
+
+    data_manager.delete_requests_by_ids([first])
+    data_manager._writer.flush()
+    assert attachments.ref_count(sha256) == 1
+    assert os.path.exists(attachments.blob_path(sha256))
+
+    data_manager.delete_requests_by_ids([second])
+    data_manager._writer.flush()
+    assert attachments.ref_count(sha256) == 0
+    assert not os.path.exists(attachments.blob_path(sha256))
+
+
+def test_failed_delete_keeps_attachment_until_replayed(backend, monkeypatch):
+    request_id, entries = new_request([upload(b"drawing")])
+    sha256 = entries[0]["sha256"]
+    store = data_manager.get_storage()
+
+    def fail(records):
+        raise OSError("disk full")
+
+    # apply_batch만 잠시 바꿈 (monkeypatch.undo()는 backend 픽스처의 chdir까지 되돌림)
+    with monkeypatch.context() as patch:
+        patch.setattr(store, "apply_batch", fail)
+        assert data_manager.delete_requests_by_ids([request_id])
+        data_manager._writer.flush()
+    # 삭제가 반영되지 않았으므로 요청과 첨부파일 모두 그대로
+    assert attachments.ref_count(sha256) == 1
+    assert os.path.exists(attachments.blob_path(sha256))
+    assert glob.glob(f"{store.path}.*.pending")
+
+    # 다음 시작 때 대기 저널을 다시 반영하면서 삭제와 첨부파일 정리가 함께 처리됨
+    reset(backend)
+    data_manager.startup()
+    assert os.path.abspath(data_manager.get_storage().path) == os.path.abspath(store.path)
+    assert request_id not in set(data_manager.load_data()["관리번호"])
+    assert attachments.ref_count(sha256) == 0
+    assert not os.path.exists(attachments.blob_path(sha256))
+    assert glob.glob(f"{store.path}.*.pending") == []
+
+
+def test_stored_file_is_referenced_before_release_can_remove_it(backend):
+    entry = attachments.store_and_ref(upload(b"race"), "도면.pdf", "REQ-A")
+    # 다른 요청의 정리(release)가 끼어들어도 방금 참조한 파일은 남음
+    attachments.release(["REQ-B"])
+    assert attachments.ref_count(entry["sha256"]) == 1
+    assert os.path.exists(attachments.blob_path(entry["sha256"]))
+
+    attachments.release(["REQ-A"])
+    with pytest.raises(FileNotFoundError):
+        attachments.add_ref(entry["sha256"], "REQ-C")
+    assert attachments.ref_count(entry["sha256"]) == 0
@@ -0,0 +1,19 @@
+import data_manager
+
+
+def test_restore_runs_after_queued_writes(backend):
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "백업 전"})
+    data_manager._writer.flush()
+    data_manager._backups.backup(full=True)
+    before = data_manager.load_data()
+
+    # 아직 반영 대기 중인 쓰기 뒤에 복원이 실행되므로 복원 결과가 남음
+    data_manager.add_request({"업체명": "A사", "품명": "백업 후"})
+    assert data_manager.restore_backup() == len(before)
+
+    df = data_manager.load_data()
+    assert sorted(df["관리번호"]) == sorted(before["관리번호"])
+    assert "백업 후" not in set(df["품명"])
+    assert data_manager.search_requests("백업 후").empty
+    assert not data_manager.search_requests("백업 전").empty
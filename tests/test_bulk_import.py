@@ -0,0 +1,62 @@
+import io
+
+import pandas as pd
+
+import data_manager
+
+
+def workbook(rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def test_rows_without_ids_get_new_ids(backend):
+    before = len(data_manager.load_data())
+    report = data_manager.bulk_import(workbook([
+        {"접수일": "2025-01-02", "업체명": "A사", "품명": "커넥터", "요청수량": 10},
+        {"접수일": "2025-01-03", "업체명": "B사", "품명": "하네스", "요청수량": 5},
+    ]))
+
+    assert report == {"rows": 2, "imported": 2, "errors": [], "ignored_columns": [], "ok": True}
+    df = data_manager.load_data()
+    assert len(df) == before + 2
+    added = df[df["품명"].isin(["커넥터", "하네스"])]
+    assert added["관리번호"].str.startswith("REQ-").all()
+    assert added["관리번호"].is_unique
+
+
+def test_legacy_headers_are_mapped(backend):
+    report = data_manager.bulk_import(workbook([
+        {"요청일": "2025-01-02", "업체명": "A사", "품명": "브라켓", "수량": 3, "납기요청일": "2025-02-01", "연락처": "010"},
+    ]))
+
+    assert report["ok"] and report["imported"] == 1 and report["ignored_columns"] == []
+    row = data_manager.load_data().query("품명 == '브라켓'").iloc[0]
+    assert row["요청수량"] == 3
+    assert row["납기일"] == pd.Timestamp("2025-02-01")
+    assert row["관리번호"].startswith("REQ-")
+
+
+def test_invalid_rows_are_reported_and_skipped(backend):
+    before = len(data_manager.load_data())
+    report = data_manager.bulk_import(workbook([
+        {"관리번호": "REQ-X-1", "업체명": "A사", "품명": "정상", "요청수량": 1, "납기일": "2025-02-01"},
+        {"관리번호": None, "업체명": "A사", "품명": "정상 번호없음", "요청수량": 2, "납기일": None},
+        {"관리번호": None, "업체명": "B사", "품명": "정상 번호없음 2", "요청수량": 0, "납기일": "2025-03-01"},
+        {"관리번호": "REQ-X-2", "업체명": "A사", "품명": "날짜 오류", "요청수량": 1, "납기일": "내일"},
+        {"관리번호": "REQ-X-3", "업체명": "A사", "품명": "수량 오류", "요청수량": -4, "납기일": None},
+    ]))
+
+    assert report["ok"]
+    assert report["rows"] == 5
+    assert report["imported"] == 3
+    assert sorted((e["행"], e["관리번호"], e["컬럼"]) for e in report["errors"]) == [
+        (5, "REQ-X-2", "납기일"),
+        (6, "REQ-X-3", "요청수량"),
+    ]
+    df = data_manager.load_data()
+    assert len(df) == before + 3
+    assert set(df["품명"]) >= {"정상", "정상 번호없음", "정상 번호없음 2"}
+    assert not df["관리번호"].isin(["REQ-X-2", "REQ-X-3"]).any()
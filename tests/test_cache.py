@@ -0,0 +1,20 @@
+import pandas as pd
+
+import data_manager
+
+
+def test_loaded_frame_can_be_edited_without_touching_the_cache(backend):
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "캐시"})
+    df = data_manager.load_data()
+    df.loc[df["품명"] == "캐시", "품명"] = "수정"
+    df["비고"] = "세션 전용"
+
+    again = data_manager.load_data()
+    assert (again["품명"] == "캐시").sum() == 1
+    assert not (again["비고"] == "세션 전용").any()
+    assert again.attrs["data_version"] == df.attrs["data_version"]
+
+
+def test_import_leaves_pandas_options_alone():
+    assert pd.get_option("mode.copy_on_write") in (False, "warn") or int(pd.__version__.split(".")[0]) >= 3
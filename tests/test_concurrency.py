@@ -0,0 +1,70 @@
+import textwrap
+
+import data_manager
+from conftest import finish, spawn
+
+ADD_REQUESTS = textwrap.dedent("""
+    import sys
+    import data_manager
+
+    name, count = sys.argv[1], int(sys.argv[2])
+    for i in range(count):
+        assert data_manager.add_request({"업체명": name, "품명": f"{name}-{i}", "요청수량": 1})
+    assert data_manager._writer.flush(60)
+""")
+
+LOCKED_INCREMENT = textwrap.dedent("""
+    import sys
+    import time
+    from storage import FileLock
+
+    lock = FileLock("counter.lock")
+    for _ in range(int(sys.argv[1])):
+        with lock:
+            # 읽고-쓰기 사이에 다른 프로세스가 끼어들면 증가분이 사라짐
+            with open("counter.txt") as f:
+                value = int(f.read() or 0)
+            time.sleep(0.001)
+            with open("counter.txt", "w") as f:
+                f.write(str(value + 1))
+""")
+
+
+def test_file_lock_serializes_processes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "counter.txt").write_text("0")
+    procs = [spawn(LOCKED_INCREMENT, "file", "25") for _ in range(4)]
+    for proc in procs:
+        code, out = finish(proc)
+        assert code == 0, out
+    assert (tmp_path / "counter.txt").read_text() == "100"
+
+
+def test_file_lock_is_reentrant_within_a_thread(tmp_path):
+    from storage import FileLock, try_lock
+
+    lock = FileLock(str(tmp_path / "x.lock"))
+    with lock:
+        with lock:
+            assert try_lock(str(tmp_path / "x.lock")) is None
+        assert try_lock(str(tmp_path / "x.lock")) is None
+    fh = try_lock(str(tmp_path / "x.lock"))
+    assert fh is not None
+    fh.close()
+
+
+def test_concurrent_add_request_keeps_every_row(backend):
+    # 저장소는 먼저 만들어 두고 여러 프로세스가 동시에 등록
+    data_manager.startup()
+    before = data_manager.load_data()
+    procs = [spawn(ADD_REQUESTS, backend, f"P{n}", "10") for n in range(4)]
+    for proc in procs:
+        code, out = finish(proc)
+        assert code == 0, out
+
+    data_manager.invalidate_cache()
+    df = data_manager.load_data()
+    assert len(df) == len(before) + 40
+    assert df["관리번호"].is_unique
+    added = df[df["업체명"].astype(str).str.startswith("P")]
+    assert sorted(added["품명"]) == sorted(f"P{n}-{i}" for n in range(4) for i in range(10))
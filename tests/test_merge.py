@@ -0,0 +1,51 @@
+import pandas as pd
+
+import data_manager
+
+BASE = [
+    {"관리번호": "REQ-M-001", "업체명": "A사", "품명": "커넥터", "요청수량": 10, "비고": "기존"},
+    {"관리번호": "REQ-M-002", "업체명": "B사", "품명": "하네스", "요청수량": 5, "비고": "기존"},
+]
+
+
+def stored(request_id):
+    return data_manager.load_data().set_index("관리번호").loc[request_id]
+
+
+def test_blank_cells_keep_stored_values(backend):
+    data_manager.save_data(pd.DataFrame(BASE), base_version=None)
+    assert data_manager.merge_data(pd.DataFrame([
+        {"관리번호": "REQ-M-001", "품명": "", "요청수량": 20, "비고": "  "},
+        {"관리번호": "REQ-M-002", "품명": "브라켓", "요청수량": None, "납기일": "2025-03-01"},
+    ]))
+
+    first, second = stored("REQ-M-001"), stored("REQ-M-002")
+    assert (first["품명"], first["요청수량"], first["비고"]) == ("커넥터", 20, "기존")
+    assert (second["품명"], second["요청수량"], second["비고"]) == ("브라켓", 5, "기존")
+    assert second["납기일"] == pd.Timestamp("2025-03-01")
+    assert len(data_manager.load_data()) == 2
+
+
+def test_new_rows_are_appended_and_repeated_ids_merged(backend):
+    data_manager.save_data(pd.DataFrame(BASE), base_version=None)
+    assert data_manager.merge_data(pd.DataFrame([
+        {"관리번호": "REQ-M-003", "업체명": "C사", "품명": "볼트", "요청수량": 1, "비고": "첫 행"},
+        {"관리번호": "REQ-M-001", "업체명": "", "품명": "커넥터 LH", "요청수량": None, "비고": ""},
+        {"관리번호": "REQ-M-003", "업체명": "", "품명": "", "요청수량": 3, "비고": "뒤 행"},
+        {"관리번호": "REQ-M-001", "업체명": "", "품명": "", "요청수량": 30, "비고": ""},
+    ]))
+
+    df = data_manager.load_data()
+    assert df["관리번호"].tolist() == ["REQ-M-001", "REQ-M-002", "REQ-M-003"]
+    first, added = stored("REQ-M-001"), stored("REQ-M-003")
+    assert (first["업체명"], first["품명"], first["요청수량"], first["비고"]) == ("A사", "커넥터 LH", 30, "기존")
+    assert (added["업체명"], added["품명"], added["요청수량"], added["비고"]) == ("C사", "볼트", 3, "뒤 행")
+
+
+def test_rows_without_ids_are_added(backend):
+    data_manager.save_data(pd.DataFrame(BASE), base_version=None)
+    assert data_manager.merge_data(pd.DataFrame([{"업체명": "D사", "품명": "가스켓", "요청수량": 2}]))
+
+    df = data_manager.load_data()
+    assert len(df) == 3
+    assert df.iloc[-1]["관리번호"].startswith("REQ-") and df.iloc[-1]["품명"] == "가스켓"
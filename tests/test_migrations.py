@@ -0,0 +1,79 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import data_manager
+import migrations
+from storage import COLUMNS
+
+# 버전별 구 대장 (모두 텍스트, 스키마 버전 기록 없음) - 변환 결과는 EXPECTED로 같아야 함
+LEGACY = {
+    0: {"ID": "OLD-1", "Request Date": "2024-01-02", "Company": "A사", "Part Name": "커넥터",
+        "Quantity": "12", "Target Date": "2024/03/05", "Status": "접수", "Remarks": "급함"},
+    1: {"관리번호": "OLD-1", "요청일": "2024-01-02", "업체명": "A사", "품명": "커넥터",
+        "수량": "12", "납기요청일": "2024/03/05", "진행상태": "접수", "연락처": "010", "비고": "급함"},
+    2: {"요청사항": "급함", "관리번호": "OLD-1", "업체명": "A사", "품명": "커넥터",
+        "접수일": "2024-01-02", "요청수량": "12", "납기일": "2024/03/05"},
+    3: {**{c: "" for c in COLUMNS}, "관리번호": "OLD-1", "접수일": "2024-01-02", "업체명": "A사",
+        "품명": "커넥터", "요청수량": "12", "납기일": "2024/03/05", "요청사항": "급함"},
+}
+EXPECTED = {"관리번호": "OLD-1", "접수일": pd.Timestamp("2024-01-02"), "업체명": "A사", "품명": "커넥터",
+            "요청수량": 12, "납기일": pd.Timestamp("2024-03-05"), "요청사항": "급함"}
+
+
+def seed(backend, row):
+    """Write row as an unversioned store of the old shape (no schema version recorded)."""
+    store = data_manager.get_storage()
+    df = pd.DataFrame([row])
+    if backend == "sqlite":
+        with sqlite3.connect(store.path) as conn:
+            df.to_sql(store.table, conn, index=False)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), store.snapshot_path)
+        with open(store.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1}, f)
+    return store
+
+
+def check_current(df):
+    assert list(df.columns) == COLUMNS
+    row = df.iloc[0]
+    for col, value in EXPECTED.items():
+        assert row[col] == value, col
+    assert pd.api.types.is_datetime64_any_dtype(df["납기일"])
+
+
+@pytest.mark.parametrize("version", sorted(LEGACY))
+def test_pending_steps_run_once(backend, version):
+    store = seed(backend, LEGACY[version])
+    assert migrations.detect_version(store.load_raw().columns) == version
+
+    steps = data_manager.startup()
+
+    assert [s[0] for s in steps] == [s[0] for s in migrations.pending(version)]
+    assert store.schema_version() == migrations.SCHEMA_VERSION
+    check_current(data_manager.load_data())
+    # 다시 실행해도 변환하지 않음
+    assert migrations.migrate_store(store) == []
+
+
+def test_new_store_is_stamped_without_rewrite(backend):
+    data_manager.startup()
+    store = data_manager.get_storage()
+    assert store.schema_version() == migrations.SCHEMA_VERSION
+    # 최초 생성(저장 1회) 후 마이그레이션으로 다시 쓰지 않음
+    assert store.data_version() == 1
+
+
+def test_legacy_xlsx_import_is_stamped(backend):
+    pd.DataFrame([LEGACY[1]]).to_excel(data_manager.DATA_FILE, index=False)
+
+    assert data_manager.startup() == []
+    store = data_manager.get_storage()
+    assert store.schema_version() == migrations.SCHEMA_VERSION
+    check_current(data_manager.load_data())
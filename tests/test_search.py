@@ -0,0 +1,146 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import data_manager
+import search
+import storage
+from conftest import reset
+
+ROWS = [
+    {"관리번호": "REQ-20250101-001", "업체명": "A사", "품명": "와이어 하네스"},
+    {"관리번호": "REQ-20250101-002", "업체명": "B사", "품명": "하네스 커넥터"},
+    {"관리번호": "REQ-20250102-001", "업체명": "A사", "품명": "브라켓", "비고": "하네스 포함"},
+]
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["관리번호", *search.SEARCH_FIELDS])
+
+
+def found(conn, text, company=None):
+    return {request_id for request_id, _ in search.search(conn, text, company)}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    search.rebuild(conn, frame(ROWS))
+    return conn
+
+
+def test_substring_and_company_scope(conn):
+    assert found(conn, "하네스") == {"REQ-20250101-001", "REQ-20250101-002", "REQ-20250102-001"}
+    assert found(conn, "하네스", "A사") == {"REQ-20250101-001", "REQ-20250102-001"}
+    assert found(conn, "커넥터") == {"REQ-20250101-002"}
+    assert found(conn, "없는말") == set()
+
+
+def test_id_exact_and_prefix(conn):
+    assert search.search(conn, "req-20250101-002")[0] == ("REQ-20250101-002", search.ID_SCORE)
+    assert found(conn, "REQ-20250101") == {"REQ-20250101-001", "REQ-20250101-002"}
+    assert found(conn, "REQ-20250101", "B사") == {"REQ-20250101-002"}
+    # 짧은 접두어는 관리번호로 찾지 않음
+    assert found(conn, "REQ") == set()
+
+
+def test_short_words_are_checked_in_the_stored_text(conn):
+    # trigram보다 짧은 단어는 색인 대신 본문에서 확인 (다른 단어와 함께 써도 됨)
+    assert found(conn, "포함") == {"REQ-20250102-001"}
+    assert found(conn, "포함", "B사") == set()
+    assert found(conn, "하네스 와이") == {"REQ-20250101-001"}
+
+
+def test_writes_keep_doc_numbers_and_drop_removed_rows(conn):
+    rows = [*ROWS[:2], {**ROWS[2], "비고": "", "품명": "볼트"}, {"관리번호": "REQ-NEW", "업체명": "C사", "품명": "볼트"}]
+    docs = dict(conn.execute(f"SELECT id, doc FROM {search.DOCS_TABLE}").fetchall())
+    search.sync(conn, frame(rows))
+    assert found(conn, "볼트") == {"REQ-20250102-001", "REQ-NEW"}
+    assert found(conn, "하네스") == {"REQ-20250101-001", "REQ-20250101-002"}
+    # 나중에 등록된 요청이 먼저 (바뀐 요청도 원래 순서 유지)
+    assert [x for x, _ in search.search(conn, "볼트")] == ["REQ-NEW", "REQ-20250102-001"]
+
+    search.reindex(conn, ["REQ-20250101-001"])
+    assert found(conn, "하네스") == {"REQ-20250101-002"}
+    stored = dict(conn.execute(f"SELECT id, doc FROM {search.DOCS_TABLE}").fetchall())
+    assert stored.pop("REQ-NEW") > max(docs.values())
+    assert stored == {x: doc for x, doc in docs.items() if x != "REQ-20250101-001"}
+    assert conn.execute(f"SELECT COUNT(*) FROM {search.TEXT_TABLE}").fetchone()[0] == len(stored) + 1
+
+
+def test_sync_reindexes_only_changed_rows(conn):
+    texts = conn.execute(f"SELECT rowid, * FROM {search.TEXT_TABLE}").fetchall()
+    changes = conn.total_changes
+    search.sync(conn, frame(ROWS))
+    assert conn.total_changes == changes
+    assert conn.execute(f"SELECT rowid, * FROM {search.TEXT_TABLE}").fetchall() == texts
+
+
+def test_matches_are_ranked_by_field_weight(conn):
+    # 품명에서 찾은 요청이 비고에서 찾은 요청보다 위로
+    assert [x for x, _ in search.search(conn, "하네스", "A사")] == ["REQ-20250101-001", "REQ-20250102-001"]
+    assert search.search(conn, "하네스", limit=1) == search.search(conn, "하네스")[:1]
+
+
+def test_ledger_search_follows_writes(backend):
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "검색용 하네스"})
+    data_manager._writer.flush()
+    [request_id] = data_manager.load_data().query("품명 == '검색용 하네스'")["관리번호"]
+    store = data_manager.get_storage()
+    assert [x for x, _ in store.search("검색용")] == [request_id]
+    assert [x for x, _ in store.search(request_id)] == [request_id]
+
+    data_manager.update_request(request_id, {"품명": "검색용 브라켓"})
+    data_manager._writer.flush()
+    assert store.search("하네스") == []
+    assert [x for x, _ in store.search("브라켓", "A사")] == [request_id]
+    assert store.search("브라켓", "B사") == []
+
+
+def test_bulk_merge_is_found_after_catch_up(backend, monkeypatch):
+    monkeypatch.setattr(storage, "BULK_WRITE_ROWS", 2)
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "기존 하네스"})
+    data_manager._writer.flush()
+    store = data_manager.get_storage()
+    assert len(store.search("하네스")) == 1
+
+    # 큰 병합은 색인을 미뤘다가 다음 검색 때 따라잡음
+    assert data_manager.merge_data(pd.DataFrame([
+        {"관리번호": "REQ-BULK-001", "업체명": "A사", "품명": "대량 하네스"},
+        {"관리번호": "REQ-BULK-002", "업체명": "B사", "품명": "대량 브라켓"},
+    ]))
+    assert {x for x, _ in store.search("대량")} == {"REQ-BULK-001", "REQ-BULK-002"}
+    assert [x for x, _ in store.search("대량", "B사")] == ["REQ-BULK-002"]
+
+
+def test_index_of_older_version_is_rebuilt(backend):
+    data_manager.startup()
+    data_manager.add_request({"업체명": "A사", "품명": "재색인 하네스"})
+    data_manager._writer.flush()
+    store = data_manager.get_storage()
+    path = store.path if backend == "sqlite" else store.search_path
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE meta SET value = ? WHERE key = 'search_version'", (search.INDEX_VERSION - 1,))
+        db.execute(f"DELETE FROM {search.DOCS_TABLE}")
+        db.execute(f"DELETE FROM {search.TEXT_TABLE}")
+
+    # 다음 시작 후 첫 검색 때 다시 색인
+    reset(backend)
+    assert len(data_manager.get_storage().search("재색인")) == 1
+
+
+def test_query_requests_keeps_best_matches_only(backend, monkeypatch):
+    monkeypatch.setattr(data_manager, "SEARCH_LIMIT", 3)
+    data_manager.startup()
+    for i in range(6):
+        data_manager.add_request({"업체명": "A사", "품명": f"상한 하네스 {i}"})
+    data_manager._writer.flush()
+
+    page, total = data_manager.query_requests({"text": "상한"}, offset=0, limit=2)
+    assert total == 3 and len(page) == 2
+    # 요청한 페이지가 상한을 넘으면 그만큼 더 가져옴
+    page, total = data_manager.query_requests({"text": "상한"}, offset=4, limit=2)
+    assert total == 6 and len(page) == 2
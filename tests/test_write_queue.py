@@ -0,0 +1,97 @@
+import glob
+import os
+import textwrap
+import threading
+
+import pytest
+
+import data_manager
+import storage
+from conftest import finish, reset, spawn
+
+# 쓰기 스레드를 멈춰 둔 채 요청을 등록하고 바로 종료 (대기 저널에만 남은 상태)
+CRASH_AFTER_POST = textwrap.dedent("""
+    import os
+    import sys
+    import time
+    import data_manager
+
+    applied, pending = int(sys.argv[1]), int(sys.argv[2])
+    for i in range(applied):
+        data_manager.add_request({"업체명": "반영", "품명": f"applied-{i}"})
+    data_manager._writer.flush()
+    data_manager._writer._apply = lambda records: time.sleep(3600)
+    for i in range(pending):
+        data_manager.add_request({"업체명": "대기", "품명": f"pending-{i}"})
+    os._exit(0)
+""")
+
+
+def attached(tmp_path, apply):
+    queue = storage.WriteQueue()
+    queue.attach(str(tmp_path / "store"), apply)
+    return queue
+
+
+def test_submit_runs_in_order_on_one_thread():
+    queue = storage.WriteQueue()
+    seen = []
+    results = [queue.submit(lambda i=i: seen.append((i, threading.current_thread().name)) or i) for i in range(5)]
+    assert results == list(range(5))
+    assert [i for i, _ in seen] == list(range(5))
+    assert {name for _, name in seen} == {"storage-writer"}
+    with pytest.raises(ValueError):
+        queue.submit(lambda: int("x"))
+
+
+def test_posts_are_applied_in_order_and_journal_cleared(tmp_path):
+    batches = []
+    queue = attached(tmp_path, lambda records: batches.append([r["n"] for r in records]))
+    for n in range(20):
+        queue.post([{"op": "insert", "n": n}])
+    assert queue.flush(10)
+
+    assert [n for batch in batches for n in batch] == list(range(20))
+    # 짧은 시간 안의 쓰기는 모아서 반영
+    assert len(batches) < 20
+    assert queue.pending() == 0
+    assert glob.glob(str(tmp_path / "store.*.pending")) == []
+
+
+def test_failed_batch_stays_journaled_and_is_replayed(tmp_path):
+    def fail(records):
+        raise OSError("disk full")
+
+    queue = attached(tmp_path, fail)
+    queue.post([{"op": "insert", "n": 1}, {"op": "insert", "n": 2}])
+    assert queue.flush(10)
+    [path] = glob.glob(str(tmp_path / "store.*.pending"))
+    assert [r["n"] for r in storage.pending_records(storage.Journal(path).read())] == [1, 2]
+
+    replayed = []
+    queue.attach(str(tmp_path / "store"), lambda records: replayed.extend(r["n"] for r in records))
+    assert replayed == [1, 2]
+    assert storage.pending_records(storage.Journal(path).read()) == []
+
+
+def test_pending_records_skip_done_ranges():
+    records = [{"op": "insert", "seq": n} for n in range(1, 6)] + [{"op": "done", "first": 1, "last": 3}]
+    assert [r["seq"] for r in storage.pending_records(records)] == [4, 5]
+
+
+@pytest.mark.parametrize("applied", [0, 3])
+def test_journal_left_by_killed_process_is_replayed(backend, applied):
+    data_manager.startup()
+    before = len(data_manager.load_data())
+    code, out = finish(spawn(CRASH_AFTER_POST, backend, str(applied), "5"))
+    assert code == 0, out
+    assert glob.glob(os.path.abspath(f"{data_manager.get_storage().path}.*.pending"))
+
+    # 다음 시작 때 종료된 프로세스의 저널을 반영
+    reset(backend)
+    data_manager.startup()
+    df = data_manager.load_data()
+    assert len(df) == before + applied + 5
+    assert df["관리번호"].is_unique
+    assert sorted(df.loc[df["업체명"] == "대기", "품명"]) == [f"pending-{i}" for i in range(5)]
+    assert glob.glob(os.path.abspath(f"{data_manager.get_storage().path}.*.pending")) == []